@@ -1,67 +1,84 @@
+import os
 from flask import Flask, render_template
 from flask_login import LoginManager, login_required, current_user
-from models.file1 import db, User
-from controllers.auth import auth_bp
-from werkzeug.security import generate_password_hash
-from controllers.admin import admin_bp
-from controllers.user import user_bp
-from flask_migrate import Migrate
+from models.file1 import db
+from config import Config
+from services.user_cache import user_cache
 
 
-
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'secret!'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///parking_app.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-
-migrate = Migrate(app, db)
 # Flask-Login setup
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
-login_manager.init_app(app)
+# API clients get a 401 instead of a redirect to the login page
+login_manager.blueprint_login_views['api'] = None
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
-
-def seed_admin():
-    if not User.query.filter_by(role='admin').first():
-        admin = User(username='admin', full_name='Super User', password=generate_password_hash('Admin'),
-                     role='admin')
-        db.session.add(admin)
-        db.session.commit()
-with app.app_context():
-    db.create_all()
-    seed_admin()
+    return user_cache.load(int(user_id))
 
-# Register the authentication blueprint
-app.register_blueprint(auth_bp)
-app.register_blueprint(admin_bp)
-app.register_blueprint(user_bp)
 
 # Dashboards
-@app.route('/admin_dashboard')
 @login_required
 def admin_dashboard():
     if current_user.role != 'admin':
         return "Not authorized", 403
     return render_template('admin_dashboard.html', user=current_user)
 
-@app.route('/user_dashboard')
 @login_required
 def user_dashboard():
     if current_user.role != 'user':
         return "Not authorized", 403
     return render_template('user_dashboard.html', user=current_user)
 
-@app.route('/')
 def home():
     return render_template('index.html')
 
+
+def create_app(config=Config):
+    """Build the app. Nothing here touches the database: run ``flask init-db`` /
+    ``flask db upgrade`` and ``flask seed-admin`` to create the schema and admin user."""
+    # Blueprints and their service modules are imported here, not at module import
+    from flask_migrate import Migrate
+    from controllers.auth import auth_bp
+    from controllers.admin import admin_bp
+    from controllers.user import user_bp
+    from controllers.api import api_bp
+    from commands import register_commands
+    from services import database
+    from services.fragments import fragments
+    from services.nearby import nearby
+    from services.passwords import passwords
+    from services.profiling import profiler
+    from services.pubsub import hub
+    from services.versions import lot_versions
+
+    app = Flask(__name__)
+    app.config.from_object(config)
+    db.init_app(app)
+    database.init_app(app)
+    profiler.init_app(app)
+    user_cache.init_app(app)
+    lot_versions.init_app(app)
+    hub.init_app(app)
+    fragments.init_app(app)
+    nearby.init_app(app)
+    passwords.init_app(app)
+    Migrate(app, db, render_as_batch=True)
+    register_commands(app)
+    login_manager.init_app(app)
+
+    # Register the authentication blueprint
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(user_bp)
+    app.register_blueprint(api_bp)
+    app.add_url_rule('/admin_dashboard', view_func=admin_dashboard)
+    app.add_url_rule('/user_dashboard', view_func=user_dashboard)
+    app.add_url_rule('/', view_func=home)
+    return app
+
+
 if __name__ == '__main__':
-    import os
+    app = create_app()
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,73 @@
+"""Polling clients: HTML scraping vs. the JSON API, with and without conditional GETs.
+
+--clients threads poll one lot each for --seconds while one extra user keeps
+reserving and releasing (--churn cycles/s) so some polls see a change.
+
+    python -m benchmarks.api_polling --clients 8 --seconds 5
+"""
+import argparse
+import threading
+import time
+from sqlalchemy import event
+from benchmarks.common import login_client, make_app, seed_lots, seed_users
+from models.file1 import db
+
+
+def poll(mode, client, lot_id, deadline, counts):
+    etag = None
+    while time.perf_counter() < deadline:
+        if mode == 'html':
+            resp = client.get('/user/dashboard')
+        else:
+            headers = {'If-None-Match': etag} if mode == 'etag' and etag else {}
+            resp = client.get(f'/api/v1/lots/{lot_id}/availability', headers=headers)
+            etag = resp.headers.get('ETag', etag)
+        counts[resp.status_code] = counts.get(resp.status_code, 0) + 1
+
+
+def churn(client, lot_id, rate, deadline):
+    while time.perf_counter() < deadline:
+        client.post(f'/user/reserve/{lot_id}', data={'vehicle_number': 'TN01AB1234'})
+        client.post('/user/release')
+        time.sleep(1 / rate)
+
+
+def run(mode, n_clients, seconds, rate):
+    app = make_app()
+    with app.app_context():
+        lot_ids = seed_lots(n_clients, 50)
+        user_ids = seed_users(n_clients + 1)
+        statements = [0]
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *a: statements.__setitem__(0, statements[0] + 1))
+    pollers = [login_client(app, uid) for uid in user_ids[:-1]]
+    churner = login_client(app, user_ids[-1])
+    per_thread = [{} for _ in pollers]
+    statements[0] = 0
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=poll, args=(mode, client, lot_ids[i], deadline, per_thread[i]))
+               for i, client in enumerate(pollers)]
+    threads.append(threading.Thread(target=churn, args=(churner, lot_ids[0], rate, deadline)))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = sum(sum(c.values()) for c in per_thread)
+    not_modified = sum(c.get(304, 0) for c in per_thread)
+    print(f"{mode:<8}{total / seconds:>12.0f}{100 * not_modified / total:>10.1f}%"
+          f"{statements[0] / total:>14.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--churn', type=float, default=5, help='reserve/release cycles per second')
+    args = parser.parse_args()
+    print(f"{'mode':<8}{'polls/s':>12}{'304s':>11}{'queries/poll':>14}")
+    for mode in ('html', 'json', 'etag'):
+        run(mode, args.clients, args.seconds, args.churn)
+
+
+if __name__ == '__main__':
+    main()
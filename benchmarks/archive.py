@@ -0,0 +1,107 @@
+"""Hot-table queries before and after archiving closed history, with archival running online.
+
+Seeds --rows closed reservations spread over the last two years plus one open
+reservation per user, then times the hot queries (active-reservation lookup,
+first page of a user's history and of the admin records, a reserve/release
+cycle) on the full table. Runs ``archive_closed`` while a thread keeps
+reserving and releasing, reporting archival throughput and any failed cycles,
+and times the same queries again against the small hot table.
+
+    python -m benchmarks.archive --rows 500000
+"""
+import argparse
+import random
+import threading
+from datetime import datetime, timedelta
+from benchmarks.common import Timer, login_client, make_app, seed_lots, seed_users
+from models.file1 import db, ParkingSpot, Reservation
+from services import archive, reservations
+
+SEED_BATCH = 50000
+
+
+def seed_history(n, user_ids, spot_ids, now):
+    rnd = random.Random(11)
+    for start in range(0, n, SEED_BATCH):
+        rows = []
+        for i in range(start, min(start + SEED_BATCH, n)):
+            parked = now - timedelta(seconds=rnd.randint(3600, 730 * 86400))
+            rows.append({'spot_id': spot_ids[i % len(spot_ids)], 'user_id': user_ids[i % len(user_ids)],
+                         'parking_timestamp': parked,
+                         'leaving_timestamp': parked + timedelta(seconds=rnd.randint(600, 86400)),
+                         'parking_cost': 20.0, 'vehicle_number': 'TN01AB1234'})
+        db.session.execute(Reservation.__table__.insert(), rows)
+    db.session.commit()
+
+
+def hot_queries(app, user_ids, admin_client, user_client, lot_id, repeat):
+    with app.app_context():
+        with Timer() as active:
+            for i in range(repeat):
+                reservations.active_reservation(user_ids[i % len(user_ids)])
+    with Timer() as history:
+        for _ in range(repeat):
+            user_client.get('/user/history')
+    with Timer() as records:
+        for _ in range(repeat):
+            admin_client.get('/admin/parking_records')
+    with Timer() as cycle:
+        for _ in range(repeat):
+            user_client.post(f'/user/reserve/{lot_id}', data={'vehicle_number': 'TN01AB1234'})
+            user_client.post('/user/release')
+    return [1000 * t.elapsed / repeat for t in (active, history, records, cycle)]
+
+
+def churn(client, lot_id, stop, counts):
+    while not stop.is_set():
+        ok = client.post(f'/user/reserve/{lot_id}', data={'vehicle_number': 'TN01AB1234'}).status_code == 302
+        ok = client.post('/user/release').status_code == 302 and ok
+        counts['ok' if ok else 'failed'] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=180, help='archive reservations older than this')
+    parser.add_argument('--batch', type=int, default=archive.ARCHIVE_BATCH)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    app = make_app()
+    now = datetime.utcnow()
+    with app.app_context():
+        lot_ids = seed_lots(20, 100)
+        user_ids = seed_users(args.users)
+        admin_id, = seed_users(1, role='admin')
+        spot_ids = db.session.execute(db.select(ParkingSpot.id)).scalars().all()
+        seed_history(args.rows, user_ids, spot_ids, now)
+        for uid in user_ids[:200]:
+            reservations.reserve(uid, lot_ids[uid % len(lot_ids)], 'TN01AB1234')
+    admin_client = login_client(app, admin_id)
+    user_client = login_client(app, user_ids[-1])
+    churn_client = login_client(app, user_ids[-2])
+
+    before = hot_queries(app, user_ids, admin_client, user_client, lot_ids[0], args.repeat)
+
+    stop, counts = threading.Event(), {'ok': 0, 'failed': 0}
+    worker = threading.Thread(target=churn, args=(churn_client, lot_ids[1], stop, counts))
+    worker.start()
+    with app.app_context(), Timer() as moving:
+        moved = archive.archive_closed(args.days, batch_rows=args.batch)
+        hot, archived = archive.counts()
+    stop.set()
+    worker.join()
+    print(f"archived {moved:,} rows in {moving.elapsed:.1f}s ({moved / moving.elapsed:,.0f} rows/s); "
+          f"{hot:,} hot, {archived:,} archived")
+    print(f"reserve/release cycles during archival: {counts['ok']} ok, {counts['failed']} failed")
+
+    after = hot_queries(app, user_ids, admin_client, user_client, lot_ids[0], args.repeat)
+    print(f"{'ms per call':<28}{'before':>10}{'after':>10}")
+    for name, b, a in zip(('active reservation lookup', 'user history, first page',
+                           'admin records, first page', 'reserve + release'), before, after):
+        print(f"{name:<28}{b:>10.2f}{a:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
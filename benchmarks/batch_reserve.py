@@ -0,0 +1,84 @@
+"""Fleet check-in: one batch request vs. one request per vehicle.
+
+Parks --vehicles vehicles across --lots lots and releases them again, first
+through the per-vehicle API (POST /lots/<id>/reservations then
+/reservations/<id>/release, one user per vehicle as fleets script it today)
+and then through POST /reservations/batch and /reservations/batch/release.
+Reports wall time, vehicles per second and SQL statements per vehicle.
+
+    python -m benchmarks.batch_reserve --vehicles 200
+"""
+import argparse
+from sqlalchemy import event
+from benchmarks.common import Timer, login_client, make_app, seed_lots, seed_users
+from models.file1 import db, ParkingLot
+
+
+class Statements:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def report(label, n, timer, statements):
+    print(f"{label:<22}{timer.elapsed * 1000:>10.0f}{n / timer.elapsed:>14.0f}{statements / n:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--vehicles', type=int, default=200)
+    parser.add_argument('--lots', type=int, default=4)
+    parser.add_argument('--spots', type=int, default=100)
+    args = parser.parse_args()
+
+    app = make_app(BATCH_MAX_VEHICLES=max(args.vehicles, 200))
+    with app.app_context():
+        lot_ids = seed_lots(args.lots, args.spots)
+        *driver_ids, fleet_id = seed_users(args.vehicles + 1)
+        statements = Statements(db.engine)
+    vehicles = [(lot_ids[i % len(lot_ids)], f'TN01FL{i:04d}') for i in range(args.vehicles)]
+    drivers = [login_client(app, uid) for uid in driver_ids]
+    fleet = login_client(app, fleet_id)
+    for client in drivers[:3] + [fleet]:
+        client.get('/api/v1/reservations/active')  # first request per client loads the session user
+
+    print(f"{args.vehicles} vehicles over {args.lots} lots")
+    print(f"{'':<22}{'ms':>10}{'vehicles/s':>14}{'queries/veh':>14}")
+    statements.count = 0
+    res_ids = []
+    with Timer() as t:
+        for client, (lot_id, number) in zip(drivers, vehicles):
+            resp = client.post(f'/api/v1/lots/{lot_id}/reservations', json={'vehicle_number': number})
+            assert resp.status_code == 201, resp.json
+            res_ids.append(resp.json['id'])
+    report('per-vehicle reserve', args.vehicles, t, statements.count)
+    statements.count = 0
+    with Timer() as t:
+        for client, res_id in zip(drivers, res_ids):
+            assert client.post(f'/api/v1/reservations/{res_id}/release').status_code == 200
+    report('per-vehicle release', args.vehicles, t, statements.count)
+
+    statements.count = 0
+    with Timer() as t:
+        resp = fleet.post('/api/v1/reservations/batch',
+                          json={'vehicles': [{'lot_id': lot_id, 'vehicle_number': number}
+                                             for lot_id, number in vehicles]})
+    assert resp.status_code == 201, resp.json
+    report('batch reserve', args.vehicles, t, statements.count)
+    statements.count = 0
+    with Timer() as t:
+        resp = fleet.post('/api/v1/reservations/batch/release',
+                          json={'vehicle_numbers': [number for _, number in vehicles]})
+    assert resp.status_code == 200, resp.json
+    report('batch release', args.vehicles, t, statements.count)
+
+    with app.app_context():
+        for lot in ParkingLot.query:
+            assert (lot.available_spots, lot.occupied_spots) == (args.spots, 0)
+
+
+if __name__ == '__main__':
+    main()
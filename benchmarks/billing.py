@@ -0,0 +1,103 @@
+"""Batched (NumPy) vs. per-row cost recomputation.
+
+Part 1 prices --rows synthetic reservations in memory: billing.cost() in a loop
+vs. one billing.costs() call, and checks both agree on every row.
+Part 2 recomputes parking_cost in a seeded database: an ORM loop that prices
+and updates one Reservation at a time vs. billing.recompute_costs().
+
+    python -m benchmarks.billing --rows 1000000 --db-rows 200000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from benchmarks.common import Timer, make_app, seed_lots, seed_users
+from models.file1 import db, ParkingLot, ParkingSpot, Reservation
+from services import billing
+
+SEED_BATCH = 50000
+
+
+def synthetic(n, seed=3):
+    rnd = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    parked, left, price = [], [], []
+    for i in range(n):
+        p = start + timedelta(seconds=rnd.randint(0, 365 * 86400))
+        parked.append(p)
+        left.append(p + timedelta(seconds=rnd.randint(60, 3 * 86400)))
+        price.append(rnd.choice([10.0, 20.0, 35.5, 50.0]))
+    return parked, left, price
+
+
+def in_memory(n):
+    import numpy as np
+
+    parked, left, price = synthetic(n)
+    billing.costs(parked[:1], left[:1], price[:1])  # warm-up: its imports aren't part of the timing
+    with Timer() as per_row:
+        slow = [billing.cost(p, l, c) for p, l, c in zip(parked, left, price)]
+    with Timer() as batched:
+        fast = billing.costs(parked, left, price)
+    assert np.allclose(np.array(slow), fast), 'batched and per-row costs differ'
+    print(f"in memory, {n:,} rows: per-row {per_row.elapsed:.2f}s, batched {batched.elapsed:.2f}s "
+          f"({per_row.elapsed / batched.elapsed:.0f}x)")
+
+
+def seed_reservations(n, user_ids, spot_ids):
+    parked, left, _ = synthetic(n, seed=5)
+    for start in range(0, n, SEED_BATCH):
+        db.session.execute(Reservation.__table__.insert(), [
+            {'spot_id': spot_ids[i % len(spot_ids)], 'user_id': user_ids[i % len(user_ids)],
+             'parking_timestamp': parked[i], 'leaving_timestamp': left[i], 'vehicle_number': 'TN01AB1234'}
+            for i in range(start, min(start + SEED_BATCH, n))
+        ])
+    db.session.commit()
+
+
+def per_row_recompute(chunk_rows=billing.BACKFILL_CHUNK):
+    query = (Reservation.query
+             .options(db.joinedload(Reservation.spot).joinedload(ParkingSpot.lot))
+             .filter(Reservation.leaving_timestamp.is_not(None))
+             .order_by(Reservation.id)
+             .yield_per(chunk_rows))
+    for res in query:
+        res.parking_cost = billing.cost(res.parking_timestamp, res.leaving_timestamp, res.spot.lot.price)
+    db.session.commit()
+
+
+def in_database(n):
+    app = make_app()
+    with app.app_context():
+        lot_ids = seed_lots(10, 50)
+        for i, lot in enumerate(ParkingLot.query.all()):
+            lot.price = 10.0 + 5 * i
+        db.session.commit()
+        spot_ids = [sid for (sid,) in db.session.query(ParkingSpot.id)]
+        seed_reservations(n, seed_users(100), spot_ids)
+
+        with Timer() as per_row:
+            per_row_recompute()
+        expected = db.session.query(func.sum(Reservation.parking_cost)).scalar()
+        db.session.query(Reservation).update({Reservation.parking_cost: None})
+        db.session.commit()
+        with Timer() as batched:
+            updated = billing.recompute_costs()
+        got = db.session.query(func.sum(Reservation.parking_cost)).scalar()
+        assert updated == n and abs(expected - got) < 0.01, (updated, expected, got)
+    print(f"database, {n:,} rows across {len(lot_ids)} lots: per-row ORM {per_row.elapsed:.2f}s, "
+          f"chunked batched {batched.elapsed:.2f}s ({per_row.elapsed / batched.elapsed:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--db-rows', type=int, default=200000)
+    args = parser.parse_args()
+    in_memory(args.rows)
+    if args.db_rows:
+        in_database(args.db_rows)
+
+
+if __name__ == '__main__':
+    main()
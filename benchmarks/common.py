@@ -0,0 +1,110 @@
+"""Shared helpers for the benchmark / stress scripts.
+
+Run the scripts from the repository root, e.g. ``python -m benchmarks.suite``.
+Every script works on its own throwaway SQLite file, never on instance/parking_app.db.
+"""
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from app import create_app
+from config import Config
+from models.file1 import db, User, ParkingLot, ParkingSpot, Reservation
+
+
+def make_app(database_uri=None, **config):
+    """Build the app with create_app, bound to a temporary database; config overrides settings."""
+    if database_uri is None:
+        fd, path = tempfile.mkstemp(suffix='.db', prefix='parking_bench_')
+        os.close(fd)
+        database_uri = f'sqlite:///{path}'
+    settings = dict(
+        SECRET_KEY='bench',
+        SQLALCHEMY_DATABASE_URI=database_uri,
+        SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 30}},
+    )
+    settings.update(config)
+    app = create_app(type('BenchConfig', (Config,), settings))
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_lots(n_lots, spots_per_lot, price=20.0):
+    lots = []
+    for i in range(n_lots):
+        lot = ParkingLot(prime_location_name=f'Lot {i}', address=f'{i} Bench Road',
+                         pin_code=f'{600000 + i}', price=price,
+                         maximum_number_of_spots=spots_per_lot,
+                         available_spots=spots_per_lot, occupied_spots=0)
+        db.session.add(lot)
+        lots.append(lot)
+    db.session.flush()
+    db.session.execute(
+        ParkingSpot.__table__.insert(),
+        [{'lot_id': lot.id, 'status': 'A'} for lot in lots for _ in range(spots_per_lot)]
+    )
+    db.session.commit()
+    return [lot.id for lot in lots]
+
+
+def seed_users(n_users, role='user'):
+    password = generate_password_hash('bench', method='pbkdf2:sha256:1')
+    db.session.execute(
+        User.__table__.insert(),
+        [{'username': f'{role}{i}@bench', 'full_name': f'Bench {role} {i}',
+          'password': password, 'role': role} for i in range(n_users)]
+    )
+    db.session.commit()
+    return [uid for (uid,) in db.session.query(User.id).filter(User.role == role).order_by(User.id)]
+
+
+def seed_reservations(n, user_ids, n_spots, start=datetime(2025, 1, 1)):
+    """n reservations 17 minutes apart on spot ids 1..n_spots; the last len(user_ids) stay open."""
+    rnd = random.Random(n)
+    rows = []
+    for i in range(n):
+        parked = start + timedelta(minutes=17 * i)
+        closed = i < n - len(user_ids)
+        rows.append({'spot_id': rnd.randint(1, n_spots), 'user_id': rnd.choice(user_ids),
+                     'parking_timestamp': parked,
+                     'leaving_timestamp': parked + timedelta(hours=2) if closed else None,
+                     'parking_cost': 40.0 if closed else None, 'vehicle_number': 'TN01AB1234'})
+    db.session.execute(Reservation.__table__.insert(), rows)
+    db.session.commit()
+
+
+def seed_history(n, spot_ids, user_ids, days=365, price=20.0, batch=50000):
+    """n closed, billed reservations over the last ``days`` days (spot statuses are untouched)."""
+    rnd = random.Random(n)
+    start = datetime.utcnow() - timedelta(days=days)
+    for first in range(0, n, batch):
+        rows = []
+        for _ in range(min(batch, n - first)):
+            parked = start + timedelta(seconds=rnd.randint(0, days * 86400))
+            minutes = rnd.randint(10, 600)
+            rows.append({'spot_id': rnd.choice(spot_ids), 'user_id': rnd.choice(user_ids),
+                         'parking_timestamp': parked, 'leaving_timestamp': parked + timedelta(minutes=minutes),
+                         'parking_cost': price * -(-minutes // 60), 'vehicle_number': 'TN01AB1234'})
+        db.session.execute(Reservation.__table__.insert(), rows)
+    db.session.commit()
+
+
+def login_client(app, user_id):
+    """Test client with a Flask-Login session for user_id (skips password hashing)."""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    return client
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,87 @@
+"""Reserve/release throughput with several worker processes on one database, per engine configuration.
+
+Each worker process stands in for a gunicorn worker: it builds its own app and
+engine and loops POST /user/reserve/<lot> + POST /user/release for its users.
+"Locked" counts requests that failed with a 500 (SQLite "database is locked").
+
+    python -m benchmarks.db_load --workers 4 --seconds 10
+    python -m benchmarks.db_load --database-url postgresql://... # adds a server-DB run
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from benchmarks.common import login_client, make_app, seed_lots, seed_users
+from config import engine_options
+from models.file1 import db
+
+# SQLite settings before this change (rollback journal, full fsync, pysqlite's 5 s wait) vs. now
+SQLITE_CONFIGS = {
+    'sqlite-default': dict(SQLITE_JOURNAL_MODE='DELETE', SQLITE_SYNCHRONOUS='FULL',
+                           SQLITE_BUSY_TIMEOUT_MS=5000, SQLITE_MMAP_SIZE=0,
+                           SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 5}}),
+    'sqlite-wal': dict(SQLITE_JOURNAL_MODE='WAL', SQLITE_SYNCHRONOUS='NORMAL',
+                       SQLITE_BUSY_TIMEOUT_MS=5000, SQLITE_MMAP_SIZE=256 * 1024 * 1024,
+                       SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 5}}),
+}
+
+
+def worker(uri, config, user_ids, lot_id, seconds, results):
+    app = make_app(uri, **config)
+    app.logger.setLevel(logging.CRITICAL)
+    clients = [login_client(app, uid) for uid in user_ids]
+    cycles = locked = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for client in clients:
+            reserved = client.post(f'/user/reserve/{lot_id}', data={'vehicle_number': 'TN01AB1234'})
+            released = client.post('/user/release')
+            if reserved.status_code == 500 or released.status_code == 500:
+                locked += 1
+            else:
+                cycles += 1
+    results.put((cycles, locked))
+
+
+def run(name, uri, config, n_workers, users_per_worker, seconds):
+    app = make_app(uri, **config)
+    with app.app_context():
+        (lot_id,) = seed_lots(1, n_workers * users_per_worker)
+        user_ids = seed_users(n_workers * users_per_worker)
+        db.engine.dispose()  # don't hand pooled connections to forked workers
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=worker, args=(
+                 uri, config, user_ids[i::n_workers], lot_id, seconds, results))
+             for i in range(n_workers)]
+    for p in procs:
+        p.start()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    cycles = sum(c for c, _ in totals)
+    locked = sum(l for _, l in totals)
+    print(f"{name:<16}{n_workers:>8}{cycles / seconds:>14.1f}{locked:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--users', type=int, default=4, help='users per worker')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--database-url', help='server database to benchmark as well (will be written to)')
+    args = parser.parse_args()
+
+    print(f"{'config':<16}{'workers':>8}{'cycles/s':>14}{'locked':>10}")
+    for name, config in SQLITE_CONFIGS.items():
+        fd, path = tempfile.mkstemp(suffix='.db', prefix='parking_load_')
+        os.close(fd)
+        run(name, f'sqlite:///{path}', config, args.workers, args.users, args.seconds)
+    if args.database_url:
+        config = {'SQLALCHEMY_ENGINE_OPTIONS': engine_options(args.database_url)}
+        run('server', args.database_url, config, args.workers, args.users, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
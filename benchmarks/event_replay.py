@@ -0,0 +1,112 @@
+"""Reservation event log: write cost, replay speed and checkpoints.
+
+Imports --lots x --spots spots (logging a spot-created event each) and
+appends --events reserve/release events in bulk. Times:
+
+- the extra INSERT on the reserve/release path (per-transaction, with and
+  without the log);
+- a full replay from the first event;
+- writing and loading a checkpoint;
+- replaying a checkpoint plus --delta newer events.
+
+Each rebuilt state is checked against parking_spots and the lot counters.
+
+    python -m benchmarks.event_replay --events 2000000
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime
+from benchmarks.common import Timer, make_app, seed_users
+from models.file1 import db, ParkingLot, ParkingSpot
+from services import events, provisioning, reservations
+
+APPEND_BATCH = 50000
+
+
+def append_events(n, spot_ids, rnd):
+    """n synthetic events that leave every spot free again: reserve/release pairs."""
+    at = datetime.utcnow()
+    table = events._table
+    rows = []
+    for _ in range(n // 2):
+        lot_id, spot_id = rnd.choice(spot_ids)
+        rows.append({'kind': events.RESERVED, 'lot_id': lot_id, 'spot_id': spot_id, 'at': at})
+        rows.append({'kind': events.RELEASED, 'lot_id': lot_id, 'spot_id': spot_id, 'at': at})
+        if len(rows) >= APPEND_BATCH:
+            db.session.execute(table.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(table.insert(), rows)
+    db.session.commit()
+
+
+def reserve_release(user_id, lot_ids, n, rnd):
+    with Timer() as t:
+        for _ in range(n):
+            reservations.release(reservations.reserve(user_id, rnd.choice(lot_ids), 'TN01AB1234'))
+    return 1000 * t.elapsed / n
+
+
+def rate(n, seconds):
+    return f"{n / seconds / 1e6 * 60:.1f}M events/min"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lots', type=int, default=100)
+    parser.add_argument('--spots', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=2000000)
+    parser.add_argument('--delta', type=int, default=100000, help='events logged after the checkpoint')
+    parser.add_argument('--cycles', type=int, default=300, help='reserve/release cycles for the write cost')
+    args = parser.parse_args()
+
+    rnd = random.Random(5)
+    app = make_app()
+    with app.app_context():
+        lots = [{'prime_location_name': f'Lot {i}', 'address': f'{i} Bench Road', 'pin_code': f'{600000 + i}',
+                 'price': 20.0, 'maximum_number_of_spots': args.spots} for i in range(args.lots)]
+        lot_ids = provisioning.import_lots(lots)
+        db.session.commit()
+        user_id, = seed_users(1)
+
+        # write path: the same reserve/release transactions with and without the log
+        with_log = reserve_release(user_id, lot_ids, args.cycles, rnd)
+        record = events.record
+        events.record = lambda *a, **kw: None
+        try:
+            without_log = reserve_release(user_id, lot_ids, args.cycles, rnd)
+        finally:
+            events.record = record
+        print(f"reserve + release: {with_log:.2f} ms with the log, {without_log:.2f} ms without")
+
+        spot_ids = db.session.execute(db.select(ParkingSpot.lot_id, ParkingSpot.id)).all()
+        with Timer() as t:
+            append_events(args.events, spot_ids, rnd)
+        total = db.session.query(db.func.max(events._table.c.id)).scalar()
+        print(f"{total:,} events in the log ({args.events:,} appended in bulk: {rate(args.events, t.elapsed)})")
+
+        with Timer() as t:
+            state = events.replay()
+        print(f"full replay: {t.elapsed:.2f} s, {rate(total, t.elapsed)}")
+        assert events.diff(state) == (0, [])
+
+        path = os.path.join(tempfile.mkdtemp(), 'spots.ckpt')
+        with Timer() as t:
+            state.save(path)
+        with Timer() as t2:
+            state = events.SpotState.load(path)
+        print(f"checkpoint: {os.path.getsize(path) / 1024:.0f} KiB, saved in {t.elapsed * 1000:.0f} ms, "
+              f"loaded in {t2.elapsed * 1000:.0f} ms")
+
+        append_events(args.delta, spot_ids, rnd)
+        with Timer() as t:
+            state = events.replay(events.SpotState.load(path))
+        print(f"checkpoint + {args.delta:,} new events: {t.elapsed:.2f} s")
+        assert events.diff(state) == (0, [])
+        assert state.lots() == {lot.id: [lot.available_spots, lot.occupied_spots] for lot in ParkingLot.query}
+
+
+if __name__ == '__main__':
+    main()
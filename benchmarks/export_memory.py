@@ -0,0 +1,83 @@
+"""Peak memory of the reservation export at growing table sizes.
+
+Exports the ledger to CSV and XLSX (discarding the output) and reports
+throughput and the process's peak RSS after each size. A flat peak across
+sizes means the export streams instead of materializing the table.
+--tracemalloc reports the exact Python heap peak per run instead (much slower).
+
+    python -m benchmarks.export_memory --sizes 10000,100000,1000000
+"""
+import argparse
+import os
+import tempfile
+import resource
+import tracemalloc
+from datetime import datetime, timedelta
+from benchmarks.common import make_app, seed_lots, seed_users, Timer
+from models.file1 import db, Reservation
+from services import export
+
+SEED_BATCH = 5000
+
+
+def grow_reservations(target, n_users, n_spots):
+    have = Reservation.query.count()
+    start = datetime(2024, 1, 1)
+    while have < target:
+        n = min(SEED_BATCH, target - have)
+        rows = []
+        for i in range(have, have + n):
+            parked = start + timedelta(minutes=i)
+            rows.append({'spot_id': i % n_spots + 1, 'user_id': i % n_users + 1,
+                         'parking_timestamp': parked, 'leaving_timestamp': parked + timedelta(minutes=95),
+                         'parking_cost': 40.0, 'vehicle_number': 'TN01AB1234'})
+        db.session.execute(Reservation.__table__.insert(), rows)
+        db.session.commit()
+        have += n
+
+
+def run_export(fmt):
+    rows = export.reservation_rows()
+    if fmt == 'csv':
+        with open(os.devnull, 'w') as out:
+            for chunk in export.iter_csv(rows):
+                out.write(chunk)
+    else:
+        with tempfile.TemporaryFile() as tmp:
+            export.write_xlsx(rows, tmp)
+
+
+def measure(fmt, trace):
+    if trace:
+        tracemalloc.start()
+    with Timer() as t:
+        run_export(fmt)
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return f'heap peak {peak / 2**20:6.1f} MiB', t.elapsed
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    return f'max RSS {rss:6.1f} MiB', t.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--formats', default='csv,xlsx')
+    parser.add_argument('--tracemalloc', action='store_true')
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed_lots(10, 100)
+        seed_users(1000)
+        for size in sorted(int(s) for s in args.sizes.split(',')):
+            grow_reservations(size, 1000, 1000)
+            for fmt in args.formats.split(','):
+                memory, elapsed = measure(fmt, args.tracemalloc)
+                print(f'{fmt:4} {size:>10,} rows: {memory}, '
+                      f'{elapsed:6.2f}s ({size / elapsed:,.0f} rows/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Dashboard render time with and without the lot fragment cache.
+
+Seeds --lots lots and times the user dashboard, the admin dashboard and the
+admin lot panel with the cache off, cold (first render) and warm. Between warm
+renders --churn reservations/releases land on random lots, so each pass
+re-renders only the lots that changed. Also reports the hit ratio and what a
+small FRAGMENT_CACHE_BYTES does to it.
+
+    python -m benchmarks.fragments --lots 1000
+"""
+import argparse
+import random
+from benchmarks.common import Timer, login_client, make_app, seed_lots, seed_users
+from services.fragments import ByteLRU, fragments
+
+PAGES = {'user dashboard': ('user', '/user/dashboard'),
+         'admin dashboard': ('admin', '/admin'),
+         'admin lot panel': ('admin', '/admin/lots_panel')}
+
+
+def churn(client, lot_ids, n, rnd):
+    for _ in range(n):
+        client.post(f'/user/reserve/{rnd.choice(lot_ids)}', data={'vehicle_number': 'TN01AB1234'})
+        client.post('/user/release')
+
+
+def timed(client, path, repeat):
+    with Timer() as t:
+        for _ in range(repeat):
+            assert client.get(path).status_code == 200
+    return 1000 * t.elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lots', type=int, default=1000)
+    parser.add_argument('--spots', type=int, default=10)
+    parser.add_argument('--churn', type=int, default=10, help='reserve/release cycles between warm renders')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        lot_ids = seed_lots(args.lots, args.spots)
+        user_id, churner_id = seed_users(2)
+        admin_id, = seed_users(1, role='admin')
+    clients = {'user': login_client(app, user_id), 'admin': login_client(app, admin_id)}
+    churner = login_client(app, churner_id)
+    rnd = random.Random(4)
+
+    print(f"{args.lots} lots; ms per page{'':<6}{'off':>10}{'cold':>10}{'warm':>10}{'warm+churn':>12}")
+    for name, (who, path) in PAGES.items():
+        client = clients[who]
+        client.get(path)  # first request per client pays for the session/user load
+        fragments.enabled = False
+        off = timed(client, path, args.repeat)
+        fragments.enabled = True
+        fragments.clear()
+        cold = timed(client, path, 1)
+        warm = timed(client, path, args.repeat)
+        samples = []
+        for _ in range(args.repeat):
+            churn(churner, lot_ids, args.churn, rnd)
+            samples.append(timed(client, path, 1))
+        print(f"{name:<31}{off:>10.1f}{cold:>10.1f}{warm:>10.1f}{sum(samples) / len(samples):>12.1f}")
+
+    m = fragments.metrics()
+    print(f"hit ratio {m['hit_ratio']:.1%}, {m['entries']} fragments, {m['bytes'] / 1024:.0f} KiB")
+
+    # a budget smaller than one page's fragments: LRU eviction keeps memory bounded
+    fragments.local = ByteLRU(m['bytes'] // 4)
+    fragments.hits = fragments.misses = 0
+    client = clients['admin']
+    small = timed(client, '/admin/lots_panel', args.repeat)
+    m = fragments.metrics()
+    print(f"lot panel with a {m['max_bytes'] / 1024:.0f} KiB budget: {small:.1f} ms, "
+          f"hit ratio {m['hit_ratio']:.1%}, {m['evictions']} evictions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Reservation latency during a login flood, with and without the hashing pool.
+
+Simulates one app process with --server-threads request threads: every
+request (from any client) waits in a FIFO queue for a free thread, as it
+would in a threaded WSGI server. --reservers clients loop reserve -> release
+while --flooders clients post logins (real scrypt hashes) at --login-rate per
+second in total, without backing off on a 503. Each mode runs for --seconds:
+
+    baseline  no login traffic
+    inline    hashing on the request thread (PASSWORD_POOL_WORKERS=0, the old behaviour)
+    pool      the bounded pool with its defaults; excess logins get a fast 503
+    pool-1    the same with a single hashing worker (for hosts with few cores)
+
+Prints reservation p50 / p99 and how the logins were answered.
+
+    python -m benchmarks.login_flood --seconds 10
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from benchmarks.common import login_client, make_app, seed_lots, seed_users
+from models.file1 import db, User
+from services.passwords import passwords
+
+MODES = {'baseline': {}, 'inline': {'PASSWORD_POOL_WORKERS': 0}, 'pool': {},
+         'pool-1': {'PASSWORD_POOL_WORKERS': 1}}
+
+
+def run(mode, args):
+    app = make_app(**MODES[mode])
+    with app.app_context():
+        lot_ids = seed_lots(args.lots, args.spots)
+        reserver_ids = seed_users(args.reservers)
+        db.session.execute(
+            User.__table__.insert(),
+            [{'username': f'flood{i}@bench', 'full_name': 'Flood', 'role': 'user',
+              'password': generate_password_hash('flood')} for i in range(args.flooders)]
+        )
+        db.session.commit()
+    server = ThreadPoolExecutor(args.server_threads)
+    deadline = time.perf_counter() + args.seconds
+    latencies, answers = [], Counter()
+    lock = threading.Lock()
+
+    def reserver(user_id, rnd):
+        client = login_client(app, user_id)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            server.submit(client.post, f'/user/reserve/{rnd.choice(lot_ids)}',
+                          data={'vehicle_number': 'TN01AB1234'}).result()
+            server.submit(client.post, '/user/release').result()
+            with lock:
+                latencies.append(1000 * (time.perf_counter() - start) / 2)
+
+    def flooder(i):
+        client = app.test_client()
+        interval = args.flooders / args.login_rate
+        next_at = time.perf_counter() + interval * i / args.flooders
+        while next_at < deadline:
+            time.sleep(max(next_at - time.perf_counter(), 0))
+            next_at += interval
+            resp = server.submit(client.post, '/login',
+                                 data={'username': f'flood{i}@bench', 'password': 'flood'}).result()
+            with lock:
+                answers[resp.status_code] += 1
+            client.get('/logout')
+
+    threads = [threading.Thread(target=reserver, args=(uid, random.Random(uid))) for uid in reserver_ids]
+    if mode != 'baseline':
+        threads += [threading.Thread(target=flooder, args=(i,)) for i in range(args.flooders)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    server.shutdown()
+    passwords.shutdown()
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(0.99 * (len(latencies) - 1))]
+    logins = ', '.join(f'{n} x {status}' for status, n in sorted(answers.items())) or '-'
+    print(f"{mode:<10}{len(latencies):>8}{p50:>10.1f}{p99:>10.1f}   {logins}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--server-threads', type=int, default=8)
+    parser.add_argument('--reservers', type=int, default=4)
+    parser.add_argument('--flooders', type=int, default=32)
+    parser.add_argument('--login-rate', type=float, default=50, help='login attempts per second, all flooders')
+    parser.add_argument('--lots', type=int, default=20)
+    parser.add_argument('--spots', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.server_threads} request threads, {args.reservers} reservers, "
+          f"{args.login_rate:g} logins/s from {args.flooders} clients")
+    print(f"{'mode':<10}{'reserves':>8}{'p50 ms':>10}{'p99 ms':>10}   logins (count x status)")
+    for mode in MODES:
+        run(mode, args)
+
+
+if __name__ == '__main__':
+    main()
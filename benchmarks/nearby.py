@@ -0,0 +1,98 @@
+"""Nearest lots with free spots at 100k lots: the in-memory pin index vs. SQL.
+
+Seeds --lots lot rows (no spots; counters only) with pin codes spread over a
+few hundred districts and --full of them full, then answers "k nearest lots
+with free spots" for random pins with NearbyLots and with the equivalent
+ORDER BY distance query. Also times building the index and the incremental
+refresh after one lot changes.
+
+    python -m benchmarks.nearby --lots 100000
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from benchmarks.common import Timer, make_app
+from models.file1 import db, ParkingLot
+from services.nearby import NearbyLots
+
+SEED_BATCH = 20000
+
+
+def seed(n, full_ratio, rnd):
+    districts = [rnd.randint(110, 855) for _ in range(300)]
+    for first in range(0, n, SEED_BATCH):
+        rows = []
+        for i in range(first, min(first + SEED_BATCH, n)):
+            free = 0 if rnd.random() < full_ratio else rnd.randint(1, 50)
+            rows.append({'prime_location_name': f'Lot {i}', 'address': f'{i} Bench Road',
+                         'pin_code': f'{rnd.choice(districts)}{rnd.randint(0, 999):03d}', 'price': 20.0,
+                         'maximum_number_of_spots': 50, 'available_spots': free, 'occupied_spots': 50 - free})
+        db.session.execute(ParkingLot.__table__.insert(), rows)
+    db.session.commit()
+
+
+def sql_nearest(pin, k):
+    distance = db.func.abs(db.cast(ParkingLot.pin_code, db.Integer) - int(pin))
+    return db.session.execute(
+        db.select(ParkingLot.id, ParkingLot.prime_location_name, ParkingLot.pin_code, ParkingLot.available_spots)
+        .where(ParkingLot.available_spots > 0).order_by(distance, ParkingLot.id).limit(k)
+    ).all()
+
+
+def latencies(fn, pins):
+    samples = []
+    for pin in pins:
+        start = time.perf_counter()
+        fn(pin)
+        samples.append(1000 * (time.perf_counter() - start))
+    samples.sort()
+    return statistics.median(samples), samples[int(0.99 * (len(samples) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lots', type=int, default=100000)
+    parser.add_argument('--full', type=float, default=0.8, help='fraction of lots with no free spot')
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    rnd = random.Random(9)
+    app = make_app()
+    with app.app_context():
+        seed(args.lots, args.full, rnd)
+        index = NearbyLots(refresh=0)
+        with Timer() as build:
+            index.rebuild()
+        tracemalloc.start()
+        probe = NearbyLots(refresh=0)
+        probe.rebuild()
+        size = tracemalloc.get_traced_memory()[0]
+        del probe
+        tracemalloc.stop()
+        print(f"{args.lots:,} lots, {args.full:.0%} full; index built in {build.elapsed * 1000:.0f} ms, "
+              f"{size / 2**20:.1f} MiB")
+
+        pins = [f'{rnd.randint(110, 855)}{rnd.randint(0, 999):03d}' for _ in range(args.lookups)]
+        p50, p99 = latencies(lambda pin: index.nearest(pin, args.k), pins)
+        print(f"{'index lookup':<20} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+        p50, p99 = latencies(lambda pin: sql_nearest(pin, args.k), pins[:100])
+        print(f"{'SQL ORDER BY':<20} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+
+        # ranking differs on purpose (shared pin prefix first), but every suggestion must have room
+        assert all(free > 0 for pin in pins[:100] for *_, free in index.nearest(pin, args.k))
+
+        lot = db.session.get(ParkingLot, 1)
+        lot.pin_code = '999999'
+        db.session.commit()
+        index.mark_dirty(lot.id)
+        with Timer() as refresh:
+            index.nearest('999999', 1)
+        print(f"refresh after one lot edit: {refresh.elapsed * 1000:.2f} ms (vs. {build.elapsed * 1000:.0f} ms rebuild, "
+              f"which runs in a background thread)")
+
+
+if __name__ == '__main__':
+    main()
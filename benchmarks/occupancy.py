@@ -0,0 +1,84 @@
+"""Spot status for one big lot: ParkingSpot objects vs. the per-lot occupancy map.
+
+Seeds one lot with --spots spots (--occupied fraction taken) and answers
+"free count", "first free spot" and "status grid" three ways: loading ORM rows,
+rebuilding the map (cold), and reusing it (warm). Reports latency and the peak
+Python memory allocated per answer, then times the lot detail page.
+
+    python -m benchmarks.occupancy --spots 10000
+"""
+import argparse
+import random
+import tracemalloc
+from benchmarks.common import Timer, login_client, make_app, seed_lots, seed_users
+from models.file1 import db, ParkingLot, ParkingSpot
+from services.occupancy import occupancy
+
+
+def orm_path(lot):
+    spots = ParkingSpot.query.filter_by(lot_id=lot.id).all()
+    free = sum(1 for s in spots if s.status == 'A')
+    first = min((s.id for s in spots if s.status == 'A'), default=None)
+    grid = [(s.id, s.status) for s in spots]
+    return free, first, len(grid)
+
+
+def map_path(lot):
+    m = occupancy.get(lot)
+    return m.free_count, m.first_free(), sum(1 for _ in m.grid())
+
+
+def measure(name, fn, lot, repeat, cold=False):
+    # memory is measured on a separate call so tracing doesn't skew the timings
+    if cold:
+        occupancy.forget()
+    db.session.expunge_all()
+    tracemalloc.start()
+    answer = fn(lot)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    with Timer() as t:
+        for _ in range(repeat):
+            if cold:
+                occupancy.forget()
+            db.session.expunge_all()
+            fn(lot)
+    print(f"{name:<12}{1000 * t.elapsed / repeat:>10.2f}{peak / 1024:>12.0f}   {answer}")
+    return answer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--spots', type=int, default=10000)
+    parser.add_argument('--occupied', type=float, default=0.6)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        lot_id, = seed_lots(1, args.spots)
+        user_id, = seed_users(1)
+        ids = db.session.execute(db.select(ParkingSpot.id).where(ParkingSpot.lot_id == lot_id)).scalars().all()
+        taken = random.sample(ids, int(args.occupied * len(ids)))
+        db.session.execute(db.update(ParkingSpot).where(ParkingSpot.id.in_(taken)).values(status='O'))
+        lot = db.session.get(ParkingLot, lot_id)
+        lot.available_spots, lot.occupied_spots = len(ids) - len(taken), len(taken)
+        db.session.commit()
+
+        print(f"{'path':<12}{'ms/answer':>10}{'peak KiB':>12}   (free, first free, grid cells)")
+        lot = db.session.get(ParkingLot, lot_id)
+        results = {measure('orm', orm_path, lot, args.repeat),
+                   measure('map (cold)', map_path, lot, args.repeat, cold=True),
+                   measure('map (warm)', map_path, lot, args.repeat)}
+        assert len(results) == 1, "paths disagree"
+
+    client = login_client(app, user_id)
+    client.get(f'/user/lot/{lot_id}')
+    with Timer() as page:
+        for _ in range(args.repeat):
+            client.get(f'/user/lot/{lot_id}')
+    print(f"/user/lot/{lot_id} page: {1000 * page.elapsed / args.repeat:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
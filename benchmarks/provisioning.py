@@ -0,0 +1,66 @@
+"""Spot provisioning throughput: one ORM object per spot vs. bulk INSERT / DELETE.
+
+    python -m benchmarks.provisioning --spots 5000 --lots 1000
+"""
+import argparse
+from benchmarks.common import make_app, Timer
+from models.file1 import db, ParkingLot, ParkingSpot
+from services import provisioning
+
+
+def new_lot(n):
+    lot = ParkingLot(prime_location_name='Garage', address='1 Bench Road', pin_code='600001',
+                     price=20.0, maximum_number_of_spots=n, available_spots=n, occupied_spots=0)
+    db.session.add(lot)
+    db.session.flush()
+    return lot
+
+
+def per_object(n):
+    lot = new_lot(n)
+    for _ in range(n):
+        db.session.add(ParkingSpot(lot_id=lot.id, status='A'))
+    db.session.commit()
+
+
+def bulk(n):
+    lot = new_lot(n)
+    provisioning.add_spots(lot.id, n)
+    db.session.commit()
+    return lot.id
+
+
+def report(label, rows, elapsed):
+    print(f'{label:32} {rows:>9,} rows {elapsed:7.3f}s {rows / elapsed:>12,.0f} rows/s')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--spots', type=int, default=5000)
+    parser.add_argument('--lots', type=int, default=1000)
+    parser.add_argument('--spots-per-lot', type=int, default=50)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        with Timer() as t:
+            per_object(args.spots)
+        report('lot_add, ORM loop', args.spots, t.elapsed)
+        with Timer() as t:
+            lot_id = bulk(args.spots)
+        report('lot_add, bulk insert', args.spots, t.elapsed)
+        with Timer() as t:
+            provisioning.remove_free_spots(lot_id, args.spots // 2)
+            db.session.commit()
+        report('lot_edit shrink, bulk delete', args.spots // 2, t.elapsed)
+
+        lots = [{'prime_location_name': f'Lot {i}', 'address': f'{i} Import Street', 'pin_code': f'{600000 + i}',
+                 'price': 30.0, 'maximum_number_of_spots': args.spots_per_lot} for i in range(args.lots)]
+        with Timer() as t:
+            provisioning.import_lots(lots)
+            db.session.commit()
+        report(f'import {args.lots} lots (spots)', args.lots * args.spots_per_lot, t.elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Usage rollups: incremental vs. rebuilt consistency, backfill speed, chart latency vs. history size.
+
+1. Users reserve and release through the app; the rollups kept up by those
+   requests must equal what rebuild-rollups computes from the reservations.
+2. For each history size, seed reservations, time the backfill, then time
+   the 30-day chart from the rollups against a GROUP BY over reservations.
+
+    python -m benchmarks.rollups --sizes 10000 300000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from benchmarks.common import Timer, login_client, make_app, seed_lots, seed_users
+from models.file1 import db, LotUsageRollup, ParkingSpot, Reservation
+from services import rollups
+
+SEED_BATCH = 20000
+
+
+def rollup_rows(lot_id):
+    return sorted((r.granularity, r.bucket_start, r.reservations_started, round(r.spot_seconds, 3),
+                   round(r.revenue, 2), r.peak_occupied)
+                  for r in LotUsageRollup.query.filter_by(lot_id=lot_id))
+
+
+def consistency(n_users, rounds):
+    app = make_app()
+    with app.app_context():
+        (lot_id,) = seed_lots(1, n_users // 2)
+        clients = [login_client(app, uid) for uid in seed_users(n_users)]
+    rnd = random.Random(1)
+    for _ in range(rounds):
+        for client in rnd.sample(clients, len(clients) // 2):
+            client.post(f'/user/reserve/{lot_id}', data={'vehicle_number': 'TN01AB1234'})
+        for client in rnd.sample(clients, len(clients) // 2):
+            client.post('/user/release')
+    with app.app_context():
+        incremental = rollup_rows(lot_id)
+        rollups.rebuild_lot(lot_id)
+        db.session.commit()
+        rebuilt = rollup_rows(lot_id)
+        assert incremental == rebuilt, (incremental, rebuilt)
+        n = Reservation.query.count()
+    print(f"consistency: {n} reservations via the app, incremental == rebuilt rollups")
+
+
+def seed_history(n, spot_ids, user_ids, days=365):
+    rnd = random.Random(n)
+    start = datetime.utcnow() - timedelta(days=days)
+    for first in range(0, n, SEED_BATCH):
+        rows = []
+        for _ in range(min(SEED_BATCH, n - first)):
+            parked = start + timedelta(seconds=rnd.randint(0, days * 86400))
+            left = parked + timedelta(minutes=rnd.randint(10, 600))
+            rows.append({'spot_id': rnd.choice(spot_ids), 'user_id': rnd.choice(user_ids),
+                         'parking_timestamp': parked, 'leaving_timestamp': left,
+                         'parking_cost': 20.0, 'vehicle_number': 'TN01AB1234'})
+        db.session.execute(Reservation.__table__.insert(), rows)
+    db.session.commit()
+
+
+def timed(fn, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def scan_chart(days=30):
+    since = datetime.utcnow() - timedelta(days=days)
+    day = db.func.date(Reservation.parking_timestamp)
+    return (db.session.query(day, db.func.count(Reservation.id), db.func.sum(Reservation.parking_cost))
+            .filter(Reservation.parking_timestamp >= since)
+            .group_by(day).all())
+
+
+def scaling(size, n_lots):
+    app = make_app()
+    with app.app_context():
+        lot_ids = seed_lots(n_lots, 20)
+        spot_ids = [sid for (sid,) in db.session.query(ParkingSpot.id)]
+        seed_history(size, spot_ids, seed_users(200))
+        with Timer() as backfill:
+            for lot_id in lot_ids:
+                rollups.rebuild_lot(lot_id)
+                db.session.commit()
+        chart_ms = timed(lambda: rollups.series('day', 30))
+        hourly_ms = timed(lambda: rollups.series('hour', 48, lot_ids[0]))
+        scan_ms = timed(scan_chart, repeat=5)
+    print(f"{size:>10,} reservations: backfill {backfill.elapsed:6.2f}s | 30-day chart {chart_ms:6.2f} ms, "
+          f"48-hour lot chart {hourly_ms:6.2f} ms | GROUP BY over reservations {scan_ms:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=40)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 300000])
+    parser.add_argument('--lots', type=int, default=20)
+    args = parser.parse_args()
+    consistency(args.users, args.rounds)
+    for size in args.sizes:
+        scaling(size, args.lots)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Lot search latency: FTS5 index vs. the old ilike('%term%') scan (all matches, as before).
+
+    python -m benchmarks.search --lots 100000
+"""
+import argparse
+import random
+import statistics
+import time
+from sqlalchemy import or_
+from benchmarks.common import make_app
+from models.file1 import db, ParkingLot
+from services import provisioning, search
+
+AREAS = ['Anna Nagar', 'Adyar', 'Banjara Hills', 'Brigade Road', 'Koramangala', 'Indiranagar', 'Whitefield',
+         'Gachibowli', 'Velachery', 'Tambaram', 'Andheri', 'Bandra', 'Powai', 'Salt Lake', 'Park Street',
+         'Connaught Place', 'Karol Bagh', 'Saket', 'Hitech City', 'Marina', 'Egmore', 'Guindy', 'Porur']
+KINDS = ['Mall', 'Metro', 'Station', 'Hospital', 'Market', 'Tower', 'Plaza', 'Stadium', 'Airport', 'Campus']
+STREETS = ['Main Road', 'Cross Street', 'High Road', 'Avenue', 'Salai', 'Lane', 'Circle', 'Bypass']
+TERMS = ['koramangala', 'kora', 'anna nagar mall', 'metro', 'gachi tower', 'salai', '6000', '560034', 'egm']
+
+
+def make_lots(n):
+    rnd = random.Random(7)
+    return [{'prime_location_name': f'{rnd.choice(AREAS)} {rnd.choice(KINDS)} {i}',
+             'address': f'{rnd.randint(1, 300)} {rnd.choice(AREAS)} {rnd.choice(STREETS)}',
+             'pin_code': str(rnd.randint(110000, 699999)), 'price': 20.0,
+             'maximum_number_of_spots': 1} for i in range(n)]
+
+
+def ilike_search(term):
+    pattern = f'%{term}%'
+    return (ParkingLot.query.filter(or_(ParkingLot.address.ilike(pattern),
+                                        ParkingLot.prime_location_name.ilike(pattern),
+                                        ParkingLot.pin_code.ilike(pattern))).all())
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lots', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        provisioning.import_lots(make_lots(args.lots))
+        db.session.commit()
+        print(f'{args.lots:,} lots; latency in ms (p50 / p99)')
+        print(f"{'term':18} {'ilike scan':>16} {'fts page':>16} {'autocomplete':>16}")
+        for term in TERMS:
+            cols = [timed(lambda: ilike_search(term), args.repeat),
+                    timed(lambda: search.search_lots(term), args.repeat),
+                    timed(lambda: search.autocomplete(term), args.repeat)]
+            print(f'{term:18} ' + ' '.join(f'{p50:7.2f} / {p99:6.2f}' for p50, p99 in cols))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""Live viewers against the server as deployed: gunicorn started from the Procfile.
+
+Runs the Procfile's web command (gthread workers, 32 threads) on a throwaway
+database, logs in as an admin through /login and opens --subscribers
+GET /admin/lots/live streams. Each accepted stream holds a request thread, so
+past PUBSUB_MAX_SUBSCRIBERS the worker must answer 503 with Retry-After. While
+every accepted stream stays open, --probes requests to other pages are timed;
+they would hang if the streams held all the threads. Then one user reserves
+and releases --events times over HTTP, and every accepted viewer must receive
+every event. A --reconnect share drops halfway and comes back with
+Last-Event-ID to be replayed what it missed. Last, one panel render is timed,
+which is what each viewer would pay per refresh when polling.
+
+    python -m benchmarks.sse_subscribers --subscribers 40 --events 100
+    python -m benchmarks.sse_subscribers --max-subscribers 1000   # no cap: probes time out
+"""
+import argparse
+import http.client
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+from benchmarks.common import Timer, login_client, make_app, seed_lots, seed_users
+
+PROBE_TIMEOUT = 10
+
+
+def procfile_web():
+    """The Procfile's web command as an argument list."""
+    with open('Procfile') as f:
+        for line in f:
+            if line.startswith('web:'):
+                return shlex.split(line[len('web:'):])
+    raise SystemExit('Procfile has no web process')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(database_uri, port, max_subscribers):
+    # same command and worker flags as production; only the app factory and bind differ
+    command = procfile_web()[:-1] + [f'benchmarks.common:make_app({database_uri!r})',
+                                     '--bind', f'127.0.0.1:{port}', '--log-level', 'warning']
+    env = dict(os.environ)
+    if max_subscribers is not None:
+        env['PUBSUB_MAX_SUBSCRIBERS'] = str(max_subscribers)
+    server = subprocess.Popen([sys.executable, '-m'] + command, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            status, _ = fetch(port, 'GET', '/login')
+            if status == 200:
+                return server, command
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit('gunicorn did not start')
+
+
+def fetch(port, method, path, cookie=None, body=None, timeout=PROBE_TIMEOUT):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    headers = {'Cookie': cookie} if cookie else {}
+    if body is not None:
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        body = urlencode(body)
+    try:
+        conn.request(method, path, body, headers)
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status, resp
+    finally:
+        conn.close()
+
+
+def login(port, username, password):
+    """Sign in through the real login form; returns the session cookie."""
+    status, resp = fetch(port, 'POST', '/login', body={'username': username, 'password': password})
+    assert status == 302, f'login failed: {status}'
+    return resp.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def open_stream(port, cookie, last_event_id=None, timeout=60):
+    """(connection, response) for a live feed; the response status is 503 when refused."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    headers = {'Cookie': cookie, 'Accept': 'text/event-stream'}
+    if last_event_id:
+        headers['Last-Event-ID'] = last_event_id
+    conn.request('GET', '/admin/lots/live', headers=headers)
+    return conn, conn.getresponse()
+
+
+def read_frames(resp):
+    """Yield each SSE frame of the response as a list of lines."""
+    lines = []
+    while True:
+        line = resp.readline()
+        if not line:
+            return
+        line = line.decode().rstrip('\n')
+        if line:
+            lines.append(line)
+        elif lines:
+            yield lines
+            lines = []
+
+
+def viewer(stream, port, cookie, expected, reconnect_at, arrivals, outcome):
+    received, last_id = 0, None
+    while stream is not None:
+        (conn, resp), stream = stream, None
+        for frame in read_frames(resp):
+            if frame[0].startswith(':'):
+                continue
+            if frame[0] == 'event: resync':
+                outcome.append('resync')
+                conn.close()
+                return
+            last_id = frame[0].split(': ', 1)[1]
+            arrivals.append((int(last_id.rsplit('-', 1)[1]), time.perf_counter()))
+            received += 1
+            if received == reconnect_at:
+                conn.close()
+                # back with the id of the last event seen; the slot frees once the server notices
+                for _ in range(100):
+                    stream = open_stream(port, cookie, last_id)
+                    if stream[1].status == 200:
+                        break
+                    stream[0].close()
+                    time.sleep(0.1)
+                outcome.append('reconnected')
+                break
+            if received == expected:
+                break
+        conn.close()
+    outcome.append('complete' if received == expected else 'short')
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (1000 * statistics.median(samples), 1000 * samples[int(0.99 * (len(samples) - 1))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subscribers', type=int, default=40)
+    parser.add_argument('--max-subscribers', type=int, default=None,
+                        help='PUBSUB_MAX_SUBSCRIBERS for the server (default: the app default)')
+    parser.add_argument('--events', type=int, default=100, help='reserve+release pairs (2 events each)')
+    parser.add_argument('--probes', type=int, default=100, help='other page requests while the streams are open')
+    parser.add_argument('--reconnect', type=float, default=0.25, help='share of viewers that reconnect halfway')
+    parser.add_argument('--lots', type=int, default=20)
+    parser.add_argument('--spots', type=int, default=50)
+    args = parser.parse_args()
+
+    app = make_app()
+    database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    with app.app_context():
+        lot_ids = seed_lots(args.lots, args.spots)
+        seed_users(1)
+        admin_id, = seed_users(1, role='admin')
+
+    port = free_port()
+    server, command = start_server(database_uri, port, args.max_subscribers)
+    try:
+        print('server:', shlex.join(command))
+        admin = login(port, 'admin0@bench', 'bench')
+        user = login(port, 'user0@bench', 'bench')
+
+        streams, refused, retry_after, stuck = [], 0, set(), False
+        for _ in range(args.subscribers):
+            try:
+                conn, resp = open_stream(port, admin, timeout=PROBE_TIMEOUT)
+            except OSError:  # not even answered: every thread is held by a stream
+                stuck = True
+                break
+            if resp.status == 200:
+                streams.append((conn, resp))
+            else:
+                assert resp.status == 503, resp.status
+                retry_after.add(resp.getheader('Retry-After'))
+                resp.read()
+                conn.close()
+                refused += 1
+        print(f"streams: {len(streams)} accepted, {refused} refused with 503 "
+              f"(Retry-After {', '.join(sorted(retry_after)) or '-'})"
+              + (f"; the next one got no answer within {PROBE_TIMEOUT}s" if stuck else ''))
+
+        # every accepted stream is open now; the other routes must still be served
+        latencies, failed = [], 0
+        for i in range(args.probes):
+            started = time.perf_counter()
+            try:
+                status, _ = (fetch(port, 'GET', '/login') if i % 2 else
+                             fetch(port, 'GET', '/user/dashboard', cookie=user))
+                failed += status != 200
+            except OSError:  # timed out: no thread left to serve it
+                stuck = True
+                break
+            latencies.append(time.perf_counter() - started)
+        if latencies:
+            p50, p99 = percentiles(latencies)
+            print(f"other pages while streaming: {len(latencies)}/{args.probes} answered, "
+                  f"p50 {p50:.1f} ms  p99 {p99:.1f} ms, {failed} failed")
+        if stuck:
+            print(f"other pages while streaming: no answer within {PROBE_TIMEOUT}s; "
+                  "the streams hold every request thread")
+            return
+
+        expected = 2 * args.events
+        reconnecting = int(len(streams) * args.reconnect)
+        per_viewer = [[] for _ in streams]
+        outcome = []
+        threads = [threading.Thread(target=viewer, args=(stream, port, admin, expected,
+                                                         expected // 2 if i < reconnecting else None,
+                                                         per_viewer[i], outcome))
+                   for i, stream in enumerate(streams)]
+        for t in threads:
+            t.start()
+        sent_at = []  # the worker numbers its events 1, 2, ... in the order of these writes
+        with Timer() as writes:
+            for _ in range(args.events):
+                sent_at.append(time.perf_counter())
+                fetch(port, 'POST', f'/user/reserve/{lot_ids[0]}', cookie=user, body={'vehicle_number': 'TN01AB1234'})
+                sent_at.append(time.perf_counter())
+                fetch(port, 'POST', '/user/release', cookie=user)
+        for t in threads:
+            t.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    flat = [received - sent_at[n - 1] for arrivals in per_viewer for n, received in arrivals]
+    print(f"viewers {len(streams)}, events {expected}, writes took {writes.elapsed:.2f}s")
+    print(f"delivered {len(flat)}/{expected * len(streams)}  complete {outcome.count('complete')}  "
+          f"resynced {outcome.count('resync')}  reconnected with Last-Event-ID {outcome.count('reconnected')}")
+    if flat:
+        p50, p99 = percentiles(flat)
+        print(f"write-to-receive latency  p50 {p50:.2f} ms  p99 {p99:.2f} ms")
+
+    admin_client = login_client(app, admin_id)
+    admin_client.get('/admin/lots_panel')
+    with Timer() as render:
+        for _ in range(20):
+            admin_client.get('/admin/lots_panel')
+    per_render = render.elapsed / 20
+    print(f"lots panel render {1000 * per_render:.1f} ms; polling once per event would cost "
+          f"{per_render * expected * len(streams):.0f}s of worker time for the same updates")
+
+
+if __name__ == '__main__':
+    main()
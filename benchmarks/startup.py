@@ -0,0 +1,56 @@
+"""Cold-start time: fresh interpreter -> import app -> create_app() -> first response.
+
+Each run is a new Python process, so module imports are measured as a gunicorn
+worker would pay them. The database URL points at a file that does not exist;
+the run fails if startup (or serving the home page) created it.
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r'''
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+application = app.create_app()
+t2 = time.perf_counter()
+status = application.test_client().get('/').status_code
+t3 = time.perf_counter()
+heavy = sorted(m for m in ('numpy', 'pandas', 'matplotlib', 'openpyxl') if m in sys.modules)
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'first_response': t3 - t2,
+                  'total': t3 - t0, 'status': status, 'heavy_modules': heavy}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db_path = os.path.join(tempfile.mkdtemp(prefix='parking_startup_'), 'never_created.db')
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}')
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, '-c', CHILD], cwd=repo_root, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+
+    for key in ('import', 'create_app', 'first_response', 'total'):
+        samples = [r[key] * 1000 for r in runs]
+        print(f"{key:<16} median {statistics.median(samples):8.1f} ms   max {max(samples):8.1f} ms")
+    print(f"heavy modules loaded: {runs[-1]['heavy_modules'] or 'none'}")
+    assert all(r['status'] == 200 for r in runs), 'home page did not return 200'
+    assert not os.path.exists(db_path), 'startup opened the database'
+    print('OK: no database access during startup')
+
+
+if __name__ == '__main__':
+    main()
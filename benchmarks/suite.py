@@ -0,0 +1,193 @@
+"""Whole-app load test: seeded data, concurrent users and admins, per-route latency.
+
+Seeds --lots x --spots spots, --users users and --history closed reservations
+through the bulk insert paths, then for --seconds runs --threads user threads,
+each looping search -> reserve -> release page -> release on its own session,
+and --admin-threads threads loading the dashboard and the parking records.
+Every request's latency and SQL statement count are recorded per route.
+
+Prints p50 / p99 latency, throughput and queries per request, and with --json
+writes the same numbers (plus the setup and git revision) to a file. With
+--compare BASELINE.json the run is checked against an earlier result: the exit
+status is 1 if any route's p99 grew by more than --max-regression or it issues
+more queries than before.
+
+    python -m benchmarks.suite --threads 8 --seconds 20 --json run.json
+    python -m benchmarks.suite --compare run.json
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event
+from benchmarks.common import make_app, seed_history, seed_lots, seed_users, login_client
+from models.file1 import db, ParkingSpot
+from services import stats
+
+SEARCH_TERMS = ['Bench Road', 'Lot 1', '6000', 'Lot 42']
+
+
+class Recorder:
+    """Latency and statement counts per route, collected from many threads."""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)   # route -> [(seconds, statements, status)]
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        # the test client runs the request on the calling thread
+        self._local.statements = getattr(self._local, 'statements', 0) + 1
+
+    def call(self, route, send):
+        self._local.statements = 0
+        start = time.perf_counter()
+        resp = send()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.samples[route].append((elapsed, self._local.statements, resp.status_code))
+        return resp
+
+
+def user_loop(recorder, client, lot_ids, deadline, rnd):
+    while time.perf_counter() < deadline:
+        recorder.call('user.search', lambda: client.post(
+            '/user/search', data={'location': rnd.choice(SEARCH_TERMS)}))
+        lot_id = rnd.choice(lot_ids)
+        recorder.call('user.reserve_spot', lambda: client.post(
+            f'/user/reserve/{lot_id}', data={'vehicle_number': 'TN01AB1234'}))
+        recorder.call('user.release_page', lambda: client.get('/user/release'))
+        recorder.call('user.release_spot', lambda: client.post('/user/release'))
+
+
+def admin_loop(recorder, client, deadline):
+    while time.perf_counter() < deadline:
+        recorder.call('admin.dashboard', lambda: client.get('/admin'))
+        recorder.call('admin.parking_records', lambda: client.get('/admin/parking_records'))
+
+
+def percentile(sorted_values, p):
+    return sorted_values[max(math.ceil(p * len(sorted_values)) - 1, 0)]
+
+
+def summarize(samples, seconds):
+    routes = {}
+    for route, rows in sorted(samples.items()):
+        latencies = sorted(r[0] for r in rows)
+        routes[route] = {
+            'requests': len(rows),
+            'errors': sum(1 for r in rows if r[2] >= 500),
+            'p50_ms': round(1000 * percentile(latencies, 0.50), 3),
+            'p99_ms': round(1000 * percentile(latencies, 0.99), 3),
+            'throughput_rps': round(len(rows) / seconds, 2),
+            'queries_per_request': round(sum(r[1] for r in rows) / len(rows), 2),
+        }
+    total = sum(r['requests'] for r in routes.values())
+    return routes, {'requests': total, 'throughput_rps': round(total / seconds, 2),
+                    'errors': sum(r['errors'] for r in routes.values())}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(routes, baseline, max_regression):
+    """Print deltas against a baseline result; returns the routes that regressed."""
+    regressed = []
+    print(f"\n{'vs. baseline':<24}{'p99':>10}{'rps':>10}{'queries':>10}")
+    for route, now in routes.items():
+        before = baseline['routes'].get(route)
+        if before is None:
+            continue
+        p99 = now['p99_ms'] / before['p99_ms'] - 1 if before['p99_ms'] else 0
+        rps = now['throughput_rps'] / before['throughput_rps'] - 1 if before['throughput_rps'] else 0
+        queries = now['queries_per_request'] - before['queries_per_request']
+        bad = p99 > max_regression or queries > 0.5
+        if bad:
+            regressed.append(route)
+        print(f"{route:<24}{p99:>+10.0%}{rps:>+10.0%}{queries:>+10.2f}{'  REGRESSED' if bad else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lots', type=int, default=50)
+    parser.add_argument('--spots', type=int, default=100, help='spots per lot')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--history', type=int, default=100000, help='closed reservations to seed')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent user sessions')
+    parser.add_argument('--admin-threads', type=int, default=1)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', metavar='PATH', help='write results to PATH')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare with an earlier --json result')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='allowed relative p99 growth per route (default 0.25)')
+    args = parser.parse_args()
+
+    setup = {k: getattr(args, k) for k in ('lots', 'spots', 'users', 'history', 'threads',
+                                           'admin_threads', 'seconds', 'seed')}
+    stats.cache.invalidate()
+    app = make_app()
+    started = time.perf_counter()
+    with app.app_context():
+        lot_ids = seed_lots(args.lots, args.spots)
+        user_ids = seed_users(args.users)
+        admin_ids = seed_users(max(args.admin_threads, 1), role='admin')
+        spot_ids = db.session.execute(db.select(ParkingSpot.id)).scalars().all()
+        seed_history(args.history, spot_ids, user_ids)
+        recorder = Recorder(db.engine)
+    print(f"seeded {args.lots} lots x {args.spots} spots, {args.users} users, "
+          f"{args.history:,} reservations in {time.perf_counter() - started:.1f}s")
+
+    rnd = random.Random(args.seed)
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=user_loop, args=(recorder, login_client(app, uid), lot_ids, deadline,
+                                                        random.Random(rnd.random())))
+               for uid in rnd.sample(user_ids, args.threads)]
+    threads += [threading.Thread(target=admin_loop, args=(recorder, login_client(app, uid), deadline))
+                for uid in admin_ids[:args.admin_threads]]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    routes, total = summarize(recorder.samples, args.seconds)
+    print(f"{'route':<24}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>10}")
+    for route, r in routes.items():
+        print(f"{route:<24}{r['requests']:>10}{r['errors']:>8}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['throughput_rps']:>10.1f}{r['queries_per_request']:>10.2f}")
+    print(f"{'total':<24}{total['requests']:>10}{total['errors']:>8}{'':>20}{total['throughput_rps']:>10.1f}")
+
+    result = {
+        'meta': {'revision': git_revision(), 'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+                 'python': platform.python_version(), 'setup': setup},
+        'routes': routes,
+        'total': total,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"results written to {args.json}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['meta']['setup'] != setup:
+            print("note: the baseline was run with a different setup")
+        if compare(routes, baseline, args.max_regression) or total['errors']:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
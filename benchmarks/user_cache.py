@@ -0,0 +1,49 @@
+"""Requests/sec on authenticated pages with and without the load_user identity cache.
+
+    python -m benchmarks.user_cache --requests 3000 --users 50
+"""
+import argparse
+import itertools
+from sqlalchemy import event
+from benchmarks.common import Timer, login_client, make_app, seed_lots, seed_users
+from models.file1 import db
+
+PATHS = ['/user/dashboard', '/user/edit_profile']
+
+
+def run(enabled, n_requests, n_users):
+    app = make_app(USER_CACHE_ENABLED=enabled)
+    with app.app_context():
+        seed_lots(20, 20)
+        user_ids = seed_users(n_users)
+        statements = [0]
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+    clients = itertools.cycle([login_client(app, uid) for uid in user_ids])
+    results = {}
+    for path in PATHS:
+        for _ in range(n_users):  # warm up: one request per user
+            next(clients).get(path)
+        statements[0] = 0
+        with Timer() as t:
+            for _ in range(n_requests):
+                assert next(clients).get(path).status_code == 200
+        results[path] = (n_requests / t.elapsed, statements[0] / n_requests)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    without = run(False, args.requests, args.users)
+    with_cache = run(True, args.requests, args.users)
+    print(f"{'path':<22}{'no cache req/s':>16}{'cached req/s':>14}{'queries/req':>14}")
+    for path in PATHS:
+        (rps_off, q_off), (rps_on, q_on) = without[path], with_cache[path]
+        print(f"{path:<22}{rps_off:>16.0f}{rps_on:>14.0f}{f'{q_off:.1f} -> {q_on:.1f}':>14}")
+
+
+if __name__ == '__main__':
+    main()
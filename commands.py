@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+import click
+from flask import current_app
+from werkzeug.security import generate_password_hash
+from models.file1 import db, User, ParkingLot, ParkingSpot
+from services import archive, billing, events, export, provisioning, rollups, signals
+
+
+def register_commands(app):
+    app.cli.add_command(init_db)
+    app.cli.add_command(seed_admin)
+    app.cli.add_command(rebuild_lot_counters)
+    app.cli.add_command(export_reservations)
+    app.cli.add_command(import_lots)
+    app.cli.add_command(set_role)
+    app.cli.add_command(backfill_costs)
+    app.cli.add_command(rebuild_rollups)
+    app.cli.add_command(archive_reservations)
+    app.cli.add_command(replay_events)
+
+
+# --- SCHEMA / SEED DATA ---
+@click.command('init-db')
+def init_db():
+    """Create all tables on an empty database and mark it as migrated to the latest revision."""
+    from flask_migrate import stamp
+    db.create_all()
+    stamp()
+    click.echo("Database created")
+
+
+@click.command('seed-admin')
+def seed_admin():
+    """Create the default admin account if there is no admin yet."""
+    if User.query.filter_by(role='admin').first():
+        click.echo("Admin already exists")
+        return
+    admin = User(username='admin', full_name='Super User', password=generate_password_hash('Admin', current_app.config['PASSWORD_HASH_METHOD']),
+                 role='admin')
+    db.session.add(admin)
+    db.session.commit()
+    click.echo("Created admin user 'admin'")
+
+
+# --- LOT COUNTERS: consistency check / rebuild ---
+@click.command('rebuild-lot-counters')
+@click.option('--check', is_flag=True, help='Only report drift, do not fix it.')
+def rebuild_lot_counters(check):
+    """Recount available/occupied spots per lot from parking_spots."""
+    counts = dict(
+        ((lot_id, status), n) for lot_id, status, n in
+        db.session.query(ParkingSpot.lot_id, ParkingSpot.status, db.func.count(ParkingSpot.id))
+        .group_by(ParkingSpot.lot_id, ParkingSpot.status)
+    )
+    drifted = 0
+    for lot in ParkingLot.query.all():
+        available = counts.get((lot.id, 'A'), 0)
+        occupied = counts.get((lot.id, 'O'), 0)
+        if (lot.available_spots, lot.occupied_spots) == (available, occupied):
+            continue
+        drifted += 1
+        click.echo(f"Lot {lot.id}: stored {lot.available_spots}/{lot.occupied_spots}, "
+                   f"actual {available}/{occupied}")
+        if not check:
+            lot.available_spots = available
+            lot.occupied_spots = occupied
+            lot.bump_version()
+    if not check:
+        db.session.commit()
+        signals.lot_changed.send(None)
+    click.echo(f"{drifted} lot(s) out of sync" + ("" if check else ", fixed"))
+    if check and drifted:
+        raise SystemExit(1)
+
+
+# --- EXPORT RESERVATIONS ---
+@click.command('export-reservations')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'xlsx']), default='csv')
+@click.option('--output', '-o', default='-', help="Output file ('-' = stdout, CSV only).")
+@click.option('--start', help='Parked at or after (YYYY-MM-DD or ISO datetime).')
+@click.option('--end', help='Parked before (a plain date includes that whole day).')
+@click.option('--lot-id', type=int)
+def export_reservations(fmt, output, start, end, lot_id):
+    """Stream the reservation ledger with duration and cost to CSV or XLSX."""
+    try:
+        start, end, lot_id = export.parse_filters(start, end, lot_id)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc))
+    rows = export.reservation_rows(start, end, lot_id)
+    if fmt == 'xlsx':
+        if output == '-':
+            raise click.BadParameter('XLSX needs --output FILE')
+        export.write_xlsx(rows, output)
+        return
+    out = sys.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+    try:
+        for chunk in export.iter_csv(rows):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+# --- BULK IMPORT LOTS ---
+@click.command('import-lots')
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+def import_lots(csv_file):
+    """Create lots and their spots from a name,address,pincode,price,max_spots CSV in one transaction."""
+    try:
+        lots = provisioning.read_lots_csv(csv_file.read())
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    provisioning.import_lots(lots)
+    db.session.commit()
+    click.echo(f"Imported {len(lots)} lot(s) with {sum(l['maximum_number_of_spots'] for l in lots)} spots")
+
+
+# --- USER ROLES ---
+@click.command('set-role')
+@click.argument('username')
+@click.argument('role', type=click.Choice(['user', 'admin']))
+def set_role(username, role):
+    """Change a user's role; running workers pick it up within USER_CACHE_TTL (at once with USER_CACHE_URL)."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"No user named {username}")
+    user.role = role
+    db.session.commit()
+    signals.user_changed.send(user.id)
+    click.echo(f"{username} is now {role}")
+
+
+# --- BILLING BACKFILL ---
+@click.command('backfill-costs')
+@click.option('--all', 'recompute_all', is_flag=True, help='Recompute every closed reservation, not just missing costs.')
+@click.option('--after-id', type=int, default=0, help='Resume after this reservation id.')
+@click.option('--chunk', type=int, default=billing.BACKFILL_CHUNK, show_default=True)
+def backfill_costs(recompute_all, after_id, chunk):
+    """Fill in parking_cost for closed reservations in committed chunks (resumable)."""
+    def progress(last_id, updated):
+        click.echo(f"up to reservation {last_id}: {updated} updated")
+    total = billing.recompute_costs(only_missing=not recompute_all, after_id=after_id,
+                                    chunk_rows=chunk, on_chunk=progress)
+    click.echo(f"{total} reservation(s) priced")
+
+
+# --- USAGE ROLLUPS ---
+@click.command('rebuild-rollups')
+@click.option('--lot-id', type=int, help='Only this lot.')
+@click.option('--after-lot', type=int, default=0, help='Resume after this lot id.')
+def rebuild_rollups(lot_id, after_lot):
+    """Recompute hourly/daily usage rollups from reservations, one committed lot at a time."""
+    query = db.session.query(ParkingLot.id).order_by(ParkingLot.id)
+    if lot_id:
+        query = query.filter(ParkingLot.id == lot_id)
+    else:
+        query = query.filter(ParkingLot.id > after_lot)
+    for (lid,) in query.all():
+        buckets = rollups.rebuild_lot(lid)
+        db.session.commit()
+        click.echo(f"lot {lid}: {buckets} bucket(s)")
+
+
+# --- ARCHIVAL ---
+@click.command('archive-reservations')
+@click.option('--older-than-days', type=int, help='Default: ARCHIVE_AFTER_DAYS (180).')
+@click.option('--batch', type=int, default=archive.ARCHIVE_BATCH, show_default=True)
+def archive_reservations(older_than_days, batch):
+    """Move long-closed reservations into reservations_archive in committed batches (resumable)."""
+    if older_than_days is None:
+        older_than_days = current_app.config.get('ARCHIVE_AFTER_DAYS', archive.DEFAULT_AGE_DAYS)
+
+    def progress(last_id, moved):
+        click.echo(f"up to reservation {last_id}: {moved} archived")
+    total = archive.archive_closed(older_than_days, batch_rows=batch, on_batch=progress)
+    hot, archived = archive.counts()
+    click.echo(f"{total} reservation(s) archived; {hot} hot, {archived} in the archive")
+
+
+# --- EVENT LOG REPLAY ---
+@click.command('replay-events')
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help='Start from this checkpoint file if it exists (else from the first event).')
+@click.option('--save', is_flag=True, help='Write the replayed state back to --checkpoint.')
+@click.option('--verify', is_flag=True, help='Compare the result with parking_spots and the lot counters.')
+def replay_events(checkpoint, save, verify):
+    """Rebuild spot statuses and lot occupancy from a checkpoint plus the events logged since."""
+    if save and not checkpoint:
+        raise click.BadParameter('--save needs --checkpoint')
+    state = None
+    if checkpoint and os.path.exists(checkpoint):
+        state = events.SpotState.load(checkpoint)
+        click.echo(f"checkpoint at event {state.last_id}: {len(state.lot_of)} spots")
+    progress = {'applied': 0}
+
+    def count(last_id, applied):
+        progress['applied'] = applied
+    start = time.perf_counter()
+    state = events.replay(state, on_chunk=count)
+    elapsed = time.perf_counter() - start
+    click.echo(f"{progress['applied']} event(s) replayed up to event {state.last_id} in {elapsed:.2f}s; "
+               f"{len(state.lot_of)} spots, {len(state.occupied)} occupied, in {len(state.lots())} lot(s)")
+    if save:
+        state.save(checkpoint)
+        click.echo(f"checkpoint written to {checkpoint}")
+    if verify:
+        spots, drifted = events.diff(state)
+        click.echo(f"{spots} spot(s) and {len(drifted)} lot(s) differ from the tables"
+                   + (f": lots {', '.join(map(str, drifted[:20]))}" if drifted else ""))
+        if spots or drifted:
+            raise SystemExit(1)
@@ -0,0 +1,74 @@
+import os
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def database_uri():
+    uri = os.environ.get('DATABASE_URL', 'sqlite:///parking_app.db')
+    # Heroku-style URLs still use the scheme SQLAlchemy 1.4 dropped
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the URI, tuned from DB_* environment variables."""
+    if uri.startswith('sqlite'):
+        # Pool sizing doesn't matter for a local file; the busy timeout does (see services/database.py)
+        return {'connect_args': {'timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000}}
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        # Servers and proxies drop idle connections; recycle before they do and ping on checkout
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'secret!')
+    SQLALCHEMY_DATABASE_URI = database_uri()
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # SQLite connection pragmas, applied on every new connection
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)
+    SQLITE_MMAP_SIZE = _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+
+    PROFILING_ENABLED = _env_bool('PROFILING_ENABLED', False)
+    STATS_CACHE_TTL = _env_int('STATS_CACHE_TTL', 30)
+    USER_CACHE_ENABLED = _env_bool('USER_CACHE_ENABLED', True)
+    USER_CACHE_SIZE = _env_int('USER_CACHE_SIZE', 1024)
+    USER_CACHE_TTL = _env_int('USER_CACHE_TTL', 60)
+    USER_CACHE_URL = os.environ.get('USER_CACHE_URL')
+    LOT_VERSION_TTL = float(os.environ.get('LOT_VERSION_TTL', 2.0))
+    PUBSUB_BROKER_URL = os.environ.get('PUBSUB_BROKER_URL')
+    PUBSUB_MAX_SUBSCRIBERS = _env_int('PUBSUB_MAX_SUBSCRIBERS', 16)
+    FRAGMENT_CACHE_ENABLED = _env_bool('FRAGMENT_CACHE_ENABLED', True)
+    FRAGMENT_CACHE_BYTES = _env_int('FRAGMENT_CACHE_BYTES', 32 * 1024 * 1024)
+    FRAGMENT_CACHE_TTL = _env_int('FRAGMENT_CACHE_TTL', 300)
+    FRAGMENT_CACHE_URL = os.environ.get('FRAGMENT_CACHE_URL')
+    NEARBY_SUGGESTIONS = _env_int('NEARBY_SUGGESTIONS', 3)
+    NEARBY_REFRESH = _env_int('NEARBY_REFRESH', 60)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_POOL = os.environ.get('PASSWORD_POOL', 'thread')
+    PASSWORD_POOL_WORKERS = _env_int('PASSWORD_POOL_WORKERS', 2)
+    PASSWORD_POOL_QUEUE = _env_int('PASSWORD_POOL_QUEUE', 2)
+    PASSWORD_POOL_TIMEOUT = _env_int('PASSWORD_POOL_TIMEOUT', 5)
+    PASSWORD_MAX_FAILURES = _env_int('PASSWORD_MAX_FAILURES', 5)
+    PASSWORD_FAILURE_WINDOW = _env_int('PASSWORD_FAILURE_WINDOW', 300)
+    BATCH_MAX_VEHICLES = _env_int('BATCH_MAX_VEHICLES', 200)
+    ARCHIVE_AFTER_DAYS = _env_int('ARCHIVE_AFTER_DAYS', 180)
@@ -1,9 +1,18 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash  
-from flask import jsonify
+from flask import jsonify, Response, send_file, stream_with_context
 from flask_login import login_required, current_user
 from models.file1 import db, User, ParkingLot, ParkingSpot, Reservation
-from math import ceil
-from sqlalchemy import or_
+from services.pagination import keyset_page, stream_all, stream_template
+from services import archive, billing, events, export, provisioning, rollups, signals, stats
+from services.occupancy import occupancy
+from services.passwords import passwords
+from services import search as lot_search
+from services.fragments import fragments
+from services.profiling import profiler
+from services.pubsub import hub, Full
+from services.user_cache import user_cache
+import tempfile
+from sqlalchemy.orm import joinedload
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -14,21 +23,15 @@ def dashboard():
     if current_user.role != 'admin':
         return "Not Authorized", 403
     lots = ParkingLot.query.all()
-    users = User.query.filter(User.role != 'admin').all()
-    total_lots = len(lots)
-    total_users = len(users)        # <-- FIXED HERE
-    total_spots = ParkingSpot.query.count()
-    total_reservations = Reservation.query.count()
-    total_revenue = db.session.query(db.func.sum(Reservation.parking_cost)).scalar() or 0
-    total_revenue = f"₹{total_revenue:.2f}"
+    totals = stats.dashboard_totals()
     return render_template(
         'admin_dashboard.html',
-        lots=lots, users=users,
-        total_lots=total_lots,
-        total_users=total_users,
-        total_spots=total_spots,
-        total_reservations=total_reservations,
-        total_revenue=total_revenue
+        lots=lots,
+        total_lots=totals['total_lots'],
+        total_users=totals['total_users'],
+        total_spots=totals['total_spots'],
+        total_reservations=totals['total_reservations'],
+        total_revenue=f"₹{totals['total_revenue']:.2f}"
     )
 
 
@@ -50,18 +53,40 @@ def lot_add():
             address=address,
             pin_code=pincode,
             price=price,
-            maximum_number_of_spots=max_spots
+            maximum_number_of_spots=max_spots,
+            available_spots=max_spots,
+            occupied_spots=0
         )
         db.session.add(new_lot)
+        db.session.flush()
+        # Auto-create spots in bulk (same transaction as the lot and its counters)
+        provisioning.add_spots(new_lot.id, max_spots)
         db.session.commit()
-        # Auto-create spots
-        for _ in range(max_spots):
-            db.session.add(ParkingSpot(lot_id=new_lot.id, status='A'))
-        db.session.commit()
+        signals.lot_changed.send(new_lot.id)
         flash('Parking lot created (and spots auto-generated).')
         return redirect(url_for('admin.dashboard'))
     return render_template('lot_form.html', action='add')
 
+# --- BULK IMPORT LOTS (CSV) ---
+@admin_bp.route('/admin/lots/import', methods=['GET', 'POST'])
+@login_required
+def lots_import():
+    if current_user.role != 'admin':
+        return "Not Authorized", 403
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        try:
+            lots = provisioning.read_lots_csv(upload.read().decode('utf-8-sig') if upload else '')
+        except (ValueError, UnicodeDecodeError) as exc:
+            flash(f'Import failed: {exc}')
+            return redirect(url_for('admin.lots_import'))
+        provisioning.import_lots(lots)
+        db.session.commit()
+        signals.lot_changed.send(None)
+        flash(f"Imported {len(lots)} lot(s) with {sum(l['maximum_number_of_spots'] for l in lots)} spots.")
+        return redirect(url_for('admin.dashboard'))
+    return render_template('lot_import.html')
+
 # --- EDIT LOT ---
 @admin_bp.route('/admin/lots/<int:lot_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -74,15 +99,23 @@ def lot_edit(lot_id):
         lot.address = request.form['address']
         lot.pin_code = request.form['pincode']
         lot.price = float(request.form['price'])
+        lot.bump_version()
         new_max = int(request.form['max_spots'])
         delta = new_max - lot.maximum_number_of_spots
         lot.maximum_number_of_spots = new_max
-        db.session.commit()
-        # If admin increases max_spots, create new spots; if lowers and there are free spots, you may delete them (optional enhancement)
+        # If admin increases max_spots, bulk-create new spots; if lowers, bulk-delete free spots
         if delta > 0:
-            for _ in range(delta):
-                db.session.add(ParkingSpot(lot_id=lot.id, status='A'))
-            db.session.commit()
+            provisioning.add_spots(lot.id, delta)
+            lot.shift_counts(available=delta)
+        elif delta < 0:
+            removed = provisioning.remove_free_spots(lot.id, -delta)
+            lot.shift_counts(available=-removed)
+            if removed < -delta:
+                # Not enough free spots: keep the occupied ones and say so
+                lot.maximum_number_of_spots = new_max + (-delta - removed)
+                flash(f'Only {removed} free spot(s) could be removed; occupied spots were kept.')
+        db.session.commit()
+        signals.lot_changed.send(lot.id)
         flash('Parking lot updated.')
         return redirect(url_for('admin.dashboard'))
     return render_template('lot_form.html', action='edit', lot=lot)
@@ -94,11 +127,13 @@ def lot_delete(lot_id):
     if current_user.role != 'admin':
         return "Not Authorized", 403
     lot = ParkingLot.query.get_or_404(lot_id)
-    if any(spot.status == 'O' for spot in lot.spots):
+    if lot.occupied_spots > 0:
         flash("Cannot delete: some spots are occupied.")
         return redirect(url_for('admin.dashboard'))
+    events.record_lot_deleted(lot.id)
     db.session.delete(lot)
     db.session.commit()
+    signals.lot_changed.send(lot_id)
     flash('Parking lot deleted.')
     return redirect(url_for('admin.dashboard'))
 
@@ -109,8 +144,7 @@ def lot_detail(lot_id):
     if current_user.role != 'admin':
         return "Not Authorized", 403
     lot = ParkingLot.query.get_or_404(lot_id)
-    spots = ParkingSpot.query.filter_by(lot_id=lot_id).all()
-    return render_template('lot_detail.html', lot=lot, spots=spots)
+    return render_template('lot_detail.html', lot=lot, spots=occupancy.get(lot).grid())
 
 # --- USERS AND THEIR SPOTS ---
 @admin_bp.route('/admin/users')
@@ -118,12 +152,16 @@ def lot_detail(lot_id):
 def users_list():
     if current_user.role != 'admin':
         return "Not Authorized", 403
-    users = User.query.filter(User.role != 'admin').all()
-    user_spots = []
-    for u in users:
-        active_res = Reservation.query.filter_by(user_id=u.id, leaving_timestamp=None).order_by(Reservation.id.desc()).first()
-        spot = ParkingSpot.query.get(active_res.spot_id) if active_res else None
-        user_spots.append((u, spot))
+    # One query: every user with the spot of their active reservation (if any)
+    rows = (db.session.query(User, ParkingSpot)
+            .outerjoin(Reservation, db.and_(Reservation.user_id == User.id,
+                                            Reservation.leaving_timestamp.is_(None)))
+            .outerjoin(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+            .filter(User.role != 'admin')
+            .order_by(User.id, Reservation.id)
+            .all())
+    # Later rows win, so a user keeps their most recent active reservation
+    user_spots = list({u.id: (u, spot) for u, spot in rows}.values())
     return render_template('admin_users.html', user_spots=user_spots)
 
 #admin/lots_panel'_____
@@ -148,23 +186,19 @@ def lots_panel():
             # Show lots where this user currently has any (even past) reservation
             user = User.query.filter((User.username == user_search) | (str(User.id) == user_search)).first()
             if user:
-                lot_ids = db.session.query(ParkingLot.id).join(ParkingSpot).join(Reservation).filter(Reservation.user_id==user.id).distinct()
+                spot_ids = archive.across(lambda model: db.select(model.spot_id).where(model.user_id == user.id))
+                lot_ids = db.session.query(ParkingSpot.lot_id).filter(ParkingSpot.id.in_(spot_ids)).distinct()
                 query = query.filter(ParkingLot.id.in_(lot_ids))
             else:
                 query = query.filter(False)  # No results if user not found
 
         if addr_search:
-            query = query.filter(
-                or_(
-                    ParkingLot.address.ilike(f"%{addr_search}%"),
-                    ParkingLot.prime_location_name.ilike(f"%{addr_search}%"),
-                    ParkingLot.pin_code.ilike(f"%{addr_search}%")
-                )
-            )
+            query = query.filter(ParkingLot.id.in_(lot_search.lot_ids(addr_search)))
         filtered_lots = query.all()
 
     return render_template('admin_lots_panel.html',
                            lots=filtered_lots,
+                           occupancy=occupancy.get_many(filtered_lots),
                            user_search=user_search,
                            addr_search=addr_search)
    
@@ -190,12 +224,15 @@ def spot_detail(spot_id):
 
     # Handle spot deletion if POST and spot is available
     if request.method == 'POST':
-        if spot.status == 'A':
-            db.session.delete(spot)
+        # conditional DELETE: a spot claimed since it was loaded above is left alone
+        if provisioning.remove_free_spot(spot_id) is not None:
+            lot.shift_counts(available=-1)
             db.session.commit()
+            signals.spot_removed.send(lot.id, spot_id=spot_id)
             flash('Spot deleted successfully.')
             return redirect(url_for('admin.lots_panel'))
         else:
+            db.session.rollback()
             flash('Occupied spot cannot be deleted.')
             return redirect(url_for('admin.spot_detail', spot_id=spot.id))
 
@@ -219,13 +256,14 @@ def summary():
     if current_user.role != 'admin':
         return "Not Authorized", 403
     lots = ParkingLot.query.all()
-    total_lots = len(lots)
-    total_revenue = db.session.query(db.func.sum(Reservation.parking_cost)).scalar() or 0
+    totals = stats.dashboard_totals()
+    total_lots = totals['total_lots']
+    total_revenue = totals['total_revenue']
     lot_data = [
         {
             'name': lot.prime_location_name,
-            'available': sum(1 for s in lot.spots if s.status == 'A'),
-            'occupied': sum(1 for s in lot.spots if s.status == 'O')
+            'available': lot.available_spots,
+            'occupied': lot.occupied_spots
         }
         for lot in lots
     ]
@@ -233,35 +271,160 @@ def summary():
         'admin_summary.html',
         total_lots=total_lots,
         total_revenue=total_revenue,
-        lot_data=lot_data
+        lot_data=lot_data,
+        lots=lots
     )
 
 
 
 
+# --- USAGE CHARTS (served from the hourly / daily rollups) ---
+@admin_bp.route('/admin/charts/usage')
+@login_required
+def usage_chart():
+    if current_user.role != 'admin':
+        return "Not Authorized", 403
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in rollups.STEPS:
+        return jsonify(error="granularity must be 'hour' or 'day'"), 400
+    return jsonify(rollups.series(granularity, request.args.get('buckets', type=int),
+                                  request.args.get('lot_id', type=int)))
+
+
 # --- ADMIN PARKING HISTORY: All Records, Duration, Cost ---
 @admin_bp.route('/admin/parking_records')
 @login_required
 def parking_records():
     if current_user.role != 'admin':
-        return "Not authorized", 403
-    reservations = (Reservation.query.order_by(Reservation.parking_timestamp.desc()).all())
-    def calc_duration_and_cost(res):
-        if res.leaving_timestamp and res.parking_timestamp and res.spot and res.spot.lot:
-            delta = res.leaving_timestamp - res.parking_timestamp
-            mins = int(delta.total_seconds() // 60)
-            hrs = int(mins // 60)
-            mins_display = mins % 60
-            duration = f"{hrs}h {mins_display}m" if hrs else f"{mins_display}m"
-            lot = res.spot.lot
-            total_hours = delta.total_seconds() / 3600
-            hours_rounded = max(1, int(ceil(total_hours)))
-            cost = hours_rounded * lot.price
-            return duration, f"₹{cost:.2f}"
-        else:
-            return "-", "-"
+        return "Not Authorized", 403
+    # hot and archived reservations, merged newest first
+    query = [model.query.options(joinedload(model.user),
+                                 joinedload(model.spot).joinedload(ParkingSpot.lot))
+             for model in archive.MODELS]
+    # ?stream=1 renders every record while fetching them in chunks; default is one keyset page
+    if request.args.get('stream'):
+        return stream_template(
+            'admin_parking_records.html',
+            reservations=stream_all(query),
+            calc_duration_and_cost=billing.describe
+        )
+    reservations, next_cursor = keyset_page(query, request.args.get('cursor'))
     return render_template(
         'admin_parking_records.html',
         reservations=reservations,
-        calc_duration_and_cost=calc_duration_and_cost
+        next_cursor=next_cursor,
+        lots=ParkingLot.query.order_by(ParkingLot.prime_location_name).all(),
+        calc_duration_and_cost=billing.describe
     )
+
+
+# --- STATS CACHE METRICS ---
+@admin_bp.route('/admin/stats/cache')
+@login_required
+def stats_cache():
+    if current_user.role != 'admin':
+        return "Not Authorized", 403
+    return jsonify(stats.cache.metrics())
+
+
+# --- FRAGMENT CACHE METRICS ---
+@admin_bp.route('/admin/fragments/cache')
+@login_required
+def fragment_cache():
+    if current_user.role != 'admin':
+        return "Not Authorized", 403
+    return jsonify(fragments.metrics())
+
+
+# --- RESERVATION EVENT LOG (tail) ---
+@admin_bp.route('/admin/events')
+@login_required
+def event_log():
+    if current_user.role != 'admin':
+        return "Not Authorized", 403
+    after = request.args.get('after', 0, type=int)
+    limit = min(max(request.args.get('limit', events.TAIL_BATCH, type=int), 1), events.TAIL_BATCH)
+    rows = events.read(after, limit)
+    # pass "next" back as ?after= to continue; it stays put while there is nothing new
+    return jsonify({'events': [events.event_json(row) for row in rows],
+                    'next': rows[-1][0] if rows else after})
+
+
+# --- LIVE OCCUPANCY FEED (Server-Sent Events) ---
+@admin_bp.route('/admin/lots/live')
+@login_required
+def lots_live():
+    if current_user.role != 'admin':
+        return "Not Authorized", 403
+    try:
+        sub = hub.subscribe(request.headers.get('Last-Event-ID'))
+    except Full as exc:
+        # every stream holds a request thread; refuse rather than starve the other routes
+        return "Too many live viewers", 503, {'Retry-After': str(exc.retry_after)}
+    # The stream can stay open for hours; don't keep a pooled connection checked out meanwhile
+    db.session.close()
+    return Response(sub.frames(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# --- REQUEST METRICS (HTML / Prometheus) ---
+@admin_bp.route('/admin/metrics')
+@login_required
+def metrics():
+    if current_user.role != 'admin':
+        return "Not Authorized", 403
+    if request.args.get('format') == 'prometheus':
+        cache = stats.cache.metrics()
+        users = user_cache.metrics()
+        live = hub.metrics()
+        maps = occupancy.metrics()
+        cards = fragments.metrics()
+        hashing = passwords.metrics()
+        body = profiler.prometheus({
+            'parking_stats_cache_hits_total': cache['hits'],
+            'parking_stats_cache_misses_total': cache['misses'],
+            'parking_user_cache_hits_total': users['hits'],
+            'parking_user_cache_misses_total': users['misses'],
+            'parking_live_subscribers': live['subscribers'],
+            'parking_live_events_delivered_total': live['delivered'],
+            'parking_live_subscribers_dropped_total': live['dropped'],
+            'parking_live_subscribers_refused_total': live['refused'],
+            'parking_occupancy_map_hits_total': maps['hits'],
+            'parking_occupancy_map_misses_total': maps['misses'],
+            'parking_fragment_cache_hits_total': cards['hits'] + cards['tier_hits'],
+            'parking_fragment_cache_misses_total': cards['misses'],
+            'parking_fragment_cache_evictions_total': cards['evictions'],
+            'parking_fragment_cache_bytes': cards['bytes'],
+            'parking_password_hashes_total': hashing['hashed'],
+            'parking_password_rejected_total': hashing['rejected'],
+            'parking_password_rehashed_total': hashing['rehashed'],
+            'parking_login_throttled_total': hashing['throttled'],
+        })
+        return Response(body, mimetype='text/plain; version=0.0.4')
+    return render_template('admin_metrics.html', metrics=profiler.snapshot())
+
+
+# --- EXPORT RESERVATIONS (CSV / XLSX), streamed ---
+@admin_bp.route('/admin/export/reservations')
+@login_required
+def export_reservations():
+    if current_user.role != 'admin':
+        return "Not Authorized", 403
+    fmt = request.args.get('format', 'csv')
+    try:
+        start, end, lot_id = export.parse_filters(request.args.get('start'), request.args.get('end'),
+                                                  request.args.get('lot_id'))
+    except ValueError:
+        return "Invalid filter", 400
+    rows = export.reservation_rows(start, end, lot_id)
+    if fmt == 'csv':
+        return Response(stream_with_context(export.iter_csv(rows)), mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment; filename=reservations.csv'})
+    if fmt == 'xlsx':
+        # Write-only workbook spools to disk; the temp file is gone once the response is sent
+        tmp = tempfile.TemporaryFile()
+        export.write_xlsx(rows, tmp)
+        tmp.seek(0)
+        return send_file(tmp, as_attachment=True, download_name='reservations.xlsx',
+                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    return "Unknown format", 400
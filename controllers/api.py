@@ -0,0 +1,282 @@
+import zlib
+from flask import Blueprint, current_app, request, make_response
+from flask_login import login_required, current_user
+from flask_restful import Api, Resource, abort
+from models.file1 import db, ParkingLot, Reservation
+from services import billing, reservations
+from services import search as lot_search
+from services.nearby import nearby
+from services.versions import lot_versions
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+api = Api(api_bp)
+
+PER_PAGE = 50
+
+
+def lot_json(lot):
+    return {
+        'id': lot.id,
+        'name': lot.prime_location_name,
+        'address': lot.address,
+        'pin_code': lot.pin_code,
+        'price': lot.price,
+        'total_spots': lot.total_spots,
+        'available_spots': lot.available_spots,
+        'occupied_spots': lot.occupied_spots,
+        'version': lot.version,
+    }
+
+
+def availability_json(lot_id, available, occupied, version):
+    return {'lot_id': lot_id, 'available_spots': available, 'occupied_spots': occupied,
+            'total_spots': available + occupied, 'version': version}
+
+
+def nearby_json(suggestions):
+    return [{'id': lot_id, 'name': name, 'pin_code': pin, 'available_spots': free}
+            for lot_id, name, pin, free in suggestions]
+
+
+def reservation_json(res):
+    return {
+        'id': res.id,
+        'lot_id': res.spot.lot_id if res.spot else None,
+        'spot_id': res.spot_id,
+        'vehicle_number': res.vehicle_number,
+        'parked_at': res.parking_timestamp.isoformat() if res.parking_timestamp else None,
+        'released_at': res.leaving_timestamp.isoformat() if res.leaving_timestamp else None,
+        'cost': res.parking_cost,
+    }
+
+
+def batch_json(results, alternatives):
+    out = []
+    for r in results:
+        item = {key: r[key] for key in ('key', 'vehicle_number', 'lot_id', 'spot_id', 'reservation_id', 'cost')
+                if key in r}
+        if 'parked_at' in r:
+            item['parked_at'] = r['parked_at'].isoformat()
+        error = r['error']
+        item['status'] = 'failed' if error else 'ok'
+        if error:
+            item['error'] = str(error)
+            if isinstance(error, reservations.LotFullError):
+                # one lookup per full lot, however many vehicles asked for it
+                if error.lot_id not in alternatives:
+                    alternatives[error.lot_id] = nearby_json(nearby.alternatives(error.lot_id))
+                item['alternatives'] = alternatives[error.lot_id]
+        out.append(item)
+    return out
+
+
+def batch_response(results, success):
+    """201/200 if every item succeeded, 207 if some did, 409 if none did."""
+    failed = sum(1 for r in results if r['error'])
+    body = {'succeeded': len(results) - failed, 'failed': failed, 'results': batch_json(results, {})}
+    if not failed:
+        return body, success
+    return body, 207 if failed < len(results) else 409
+
+
+def json_object():
+    """The request's JSON body as a dict ({} without one); 400 for any other JSON value."""
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return {}
+    if not isinstance(payload, dict):
+        abort(400, message="Request body must be a JSON object")
+    return payload
+
+
+def batch_items(payload, key):
+    items = payload.get(key)
+    if not isinstance(items, list) or not items:
+        abort(400, message=f"{key} must be a non-empty list")
+    limit = current_app.config['BATCH_MAX_VEHICLES']
+    if len(items) > limit:
+        abort(400, message=f"At most {limit} {key} per batch")
+    return items
+
+
+def lot_etag(lot_id, version):
+    return f'lot-{lot_id}-v{version}'
+
+
+def all_lots_etag(pairs):
+    return f'lots-{len(pairs)}-{zlib.crc32(repr(pairs).encode()):08x}'
+
+
+def not_modified(etag):
+    """304 if the client already holds ``etag``, else None."""
+    if etag is not None and request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def with_etag(data, etag):
+    response = make_response(data)
+    response.set_etag(etag)
+    # clients may keep the body but must revalidate every time
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+class ApiResource(Resource):
+    method_decorators = [login_required]
+
+
+class LotList(ApiResource):
+    def get(self):
+        page = max(request.args.get('page', 1, type=int), 1)
+        term = request.args.get('q', '').strip()
+        if term:
+            lots, has_more = lot_search.search_lots(term, page, PER_PAGE)
+        else:
+            lots = ParkingLot.query.order_by(ParkingLot.id).offset((page - 1) * PER_PAGE).limit(PER_PAGE + 1).all()
+            lots, has_more = lots[:PER_PAGE], len(lots) > PER_PAGE
+        return {'lots': [lot_json(lot) for lot in lots], 'page': page, 'has_more': has_more}
+
+
+class NearbyLotList(ApiResource):
+    def get(self):
+        pin = request.args.get('pin', '').strip()
+        if not pin:
+            abort(400, message="pin is required")
+        k = min(max(request.args.get('k', nearby.suggestions, type=int), 1), PER_PAGE)
+        return {'pin': pin, 'lots': nearby_json(nearby.nearest(pin, k))}
+
+
+class Lot(ApiResource):
+    def get(self, lot_id):
+        lot = db.session.get(ParkingLot, lot_id)
+        if lot is None:
+            abort(404, message=f"Lot {lot_id} not found")
+        return lot_json(lot)
+
+
+class LotAvailability(ApiResource):
+    def get(self, lot_id):
+        # Answered from the per-worker version map when the client is up to date: no query at all
+        version = lot_versions.cached(lot_id)
+        if version is not None:
+            response = not_modified(lot_etag(lot_id, version))
+            if response is not None:
+                return response
+        row = db.session.execute(
+            db.select(ParkingLot.available_spots, ParkingLot.occupied_spots, ParkingLot.version)
+            .where(ParkingLot.id == lot_id)
+        ).first()
+        if row is None:
+            abort(404, message=f"Lot {lot_id} not found")
+        available, occupied, version = row
+        lot_versions.remember(lot_id, version)
+        etag = lot_etag(lot_id, version)
+        return not_modified(etag) or with_etag(availability_json(lot_id, available, occupied, version), etag)
+
+
+class Availability(ApiResource):
+    def get(self):
+        pairs = lot_versions.cached_all()
+        if pairs is not None:
+            response = not_modified(all_lots_etag(pairs))
+            if response is not None:
+                return response
+        rows = db.session.execute(
+            db.select(ParkingLot.id, ParkingLot.available_spots, ParkingLot.occupied_spots, ParkingLot.version)
+            .order_by(ParkingLot.id)
+        ).all()
+        pairs = lot_versions.remember_all((lot_id, version) for lot_id, _, _, version in rows)
+        etag = all_lots_etag(pairs)
+        return not_modified(etag) or with_etag(
+            {'lots': [availability_json(*row) for row in rows]}, etag)
+
+
+class LotReservations(ApiResource):
+    def post(self, lot_id):
+        if db.session.get(ParkingLot, lot_id) is None:
+            abort(404, message=f"Lot {lot_id} not found")
+        payload = json_object()
+        vehicle_number = payload.get('vehicle_number')
+        if vehicle_number is not None and not isinstance(vehicle_number, str):
+            abort(400, message="vehicle_number must be a string")
+        try:
+            res = reservations.reserve(current_user.id, lot_id, vehicle_number)
+        except reservations.LotFullError as exc:
+            abort(409, message=str(exc), alternatives=nearby_json(nearby.alternatives(lot_id)))
+        except reservations.LotBusyError as exc:
+            return {'message': str(exc)}, 503, {'Retry-After': str(exc.retry_after)}
+        except reservations.ReservationError as exc:
+            abort(409, message=str(exc))
+        return reservation_json(res), 201
+
+
+class BatchReservations(ApiResource):
+    def post(self):
+        """{"lot_id": 3, "vehicles": ["TN01AB1234", {"vehicle_number": "...", "lot_id": 4}, ...]}"""
+        payload = json_object()
+        items = []
+        for vehicle in batch_items(payload, 'vehicles'):
+            if isinstance(vehicle, dict):
+                items.append((vehicle.get('lot_id', payload.get('lot_id')), vehicle.get('vehicle_number')))
+            elif isinstance(vehicle, str):
+                items.append((payload.get('lot_id'), vehicle))
+            else:
+                abort(400, message="Every vehicle must be a vehicle number or an object")
+        if any(not isinstance(lot_id, int) for lot_id, _ in items):
+            abort(400, message="Every vehicle needs an integer lot_id")
+        if any(vehicle_number is not None and not isinstance(vehicle_number, str) for _, vehicle_number in items):
+            abort(400, message="Every vehicle_number must be a string")
+        return batch_response(reservations.reserve_batch(current_user.id, items), 201)
+
+
+class BatchRelease(ApiResource):
+    def post(self):
+        """{"reservation_ids": [1, 2, ...]} or {"vehicle_numbers": ["TN01AB1234", ...]}"""
+        payload = json_object()
+        if 'vehicle_numbers' in payload:
+            keys = batch_items(payload, 'vehicle_numbers')
+            if any(not isinstance(key, str) for key in keys):
+                abort(400, message="vehicle_numbers must be strings")
+            keys = [key.strip() for key in keys]
+            results = reservations.release_batch(current_user.id, keys, by='vehicle')
+        else:
+            keys = batch_items(payload, 'reservation_ids')
+            if any(not isinstance(key, int) for key in keys):
+                abort(400, message="reservation_ids must be integers")
+            results = reservations.release_batch(current_user.id, keys)
+        return batch_response(results, 200)
+
+
+class ActiveReservation(ApiResource):
+    def get(self):
+        res = reservations.active_reservation(current_user.id)
+        if res is None:
+            abort(404, message="No active reservation")
+        return dict(reservation_json(res), cost_so_far=billing.cost_so_far(res))
+
+
+class ReservationRelease(ApiResource):
+    def post(self, res_id):
+        res = db.session.get(Reservation, res_id)
+        if res is None or res.user_id != current_user.id:
+            abort(404, message=f"Reservation {res_id} not found")
+        try:
+            reservations.release(res)
+        except reservations.ReservationError as exc:
+            abort(409, message=str(exc))
+        return reservation_json(res)
+
+
+api.add_resource(LotList, '/lots')
+api.add_resource(NearbyLotList, '/lots/nearby')
+api.add_resource(Lot, '/lots/<int:lot_id>')
+api.add_resource(LotAvailability, '/lots/<int:lot_id>/availability')
+api.add_resource(Availability, '/availability')
+api.add_resource(LotReservations, '/lots/<int:lot_id>/reservations')
+api.add_resource(BatchReservations, '/reservations/batch')
+api.add_resource(BatchRelease, '/reservations/batch/release')
+api.add_resource(ActiveReservation, '/reservations/active')
+api.add_resource(ReservationRelease, '/reservations/<int:res_id>/release')
@@ -1,10 +1,17 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, current_user
 from models.file1 import db, User
-from werkzeug.security import generate_password_hash, check_password_hash
+from services import signals
+from services.passwords import passwords, Busy, Throttled
 
 auth_bp = Blueprint('auth', __name__)
 
+
+def _try_later(template, exc, status):
+    # Busy/Throttled: answer right away instead of tying up a worker on a hash
+    flash(str(exc))
+    return render_template(template), status, {'Retry-After': str(exc.retry_after)}
+
 @auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
@@ -14,9 +21,14 @@ def register():
         if User.query.filter_by(username=username).first():
             flash('Username already registered!')
             return redirect(url_for('auth.register'))
-        user = User(username=username, full_name=full_name, password=generate_password_hash(password), role='user')
+        try:
+            pwhash = passwords.hash(password)
+        except Busy as exc:
+            return _try_later('register.html', exc, 503)
+        user = User(username=username, full_name=full_name, password=pwhash, role='user')
         db.session.add(user)
         db.session.commit()
+        signals.user_changed.send(user.id)
         flash('Registration successful. Please log in.')
         return redirect(url_for('auth.login'))
     return render_template('register.html')
@@ -26,17 +38,30 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        user = User.query.filter_by(username=username).first()
-        if user and check_password_hash(user.password, password):
-            login_user(user)
-            # Redirect based on role
-            if user.role == 'admin':
-                return redirect(url_for('admin_dashboard'))
-            else:
-                return redirect(url_for('user_dashboard'))
-        else:
-            flash('Invalid username or password')
-            return redirect(url_for('auth.login'))
+        try:
+            passwords.throttle.check(username)
+            user = User.query.filter_by(username=username).first()
+            if user and passwords.verify(user.password, password):
+                passwords.throttle.succeeded(username)
+                if passwords.needs_rehash(user.password):
+                    # Hash parameters changed since this password was set; upgrade it now we know it
+                    user.password = passwords.hash(password)
+                    db.session.commit()
+                    passwords.rehashed += 1
+                    signals.user_changed.send(user.id)
+                login_user(user)
+                # Redirect based on role
+                if user.role == 'admin':
+                    return redirect(url_for('admin_dashboard'))
+                else:
+                    return redirect(url_for('user_dashboard'))
+        except Busy as exc:
+            return _try_later('login.html', exc, 503)
+        except Throttled as exc:
+            return _try_later('login.html', exc, 429)
+        passwords.throttle.failed(username)
+        flash('Invalid username or password')
+        return redirect(url_for('auth.login'))
     return render_template('login.html')
 
 @auth_bp.route('/logout')
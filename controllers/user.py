@@ -1,8 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from models.file1 import db, ParkingLot, ParkingSpot, Reservation
-from datetime import datetime
-from math import ceil
+from services import archive, billing, reservations, rollups, signals
+from services import search as lot_search
+from services.nearby import nearby
+from services.occupancy import occupancy
+from services.pagination import keyset_page, stream_all, stream_template
+from sqlalchemy.orm import joinedload
 
 user_bp = Blueprint('user', __name__, url_prefix='/user')
 
@@ -10,55 +14,58 @@ user_bp = Blueprint('user', __name__, url_prefix='/user')
 @login_required
 def dashboard():
     lots = ParkingLot.query.all()
-    active_res = Reservation.query.filter_by(user_id=current_user.id, leaving_timestamp=None).first()
+    active_res = (Reservation.query
+                  .options(joinedload(Reservation.spot).joinedload(ParkingSpot.lot))
+                  .filter_by(user_id=current_user.id, leaving_timestamp=None).first())
     return render_template('user_dashboard.html', lots=lots, active_res=active_res)
 
 @user_bp.route('/history')
 @login_required
 def history():
-    reservations = (Reservation.query
-                    .filter_by(user_id=current_user.id)
-                    .order_by(Reservation.parking_timestamp.desc())
-                    .all())
-
-    def calc_duration_and_cost(res):
-        if res.leaving_timestamp and res.parking_timestamp:
-            delta = res.leaving_timestamp - res.parking_timestamp
-            mins = int(delta.total_seconds() // 60)
-            hrs = int(mins // 60)
-            mins_display = mins % 60
-            duration = f"{hrs}h {mins_display}m" if hrs else f"{mins_display}m"
-            lot = res.spot.lot if res.spot else None
-            cost = 0
-            if lot:
-                total_hours = delta.total_seconds() / 3600
-                hours_rounded = max(1, int(ceil(total_hours)))
-                cost = hours_rounded * lot.price
-            return duration, f"₹{cost:.2f}"
-        else:
-            return "-", "-"
+    # hot and archived reservations, merged newest first
+    query = [model.query
+             .options(joinedload(model.spot).joinedload(ParkingSpot.lot))
+             .filter_by(user_id=current_user.id)
+             for model in archive.MODELS]
+
+    # ?stream=1 renders the whole history while fetching it in chunks; default is one keyset page
+    if request.args.get('stream'):
+        return stream_template(
+            'user_history.html', reservations=stream_all(query), calc_duration_and_cost=billing.describe
+        )
+    reservations, next_cursor = keyset_page(query, request.args.get('cursor'))
     return render_template(
-        'user_history.html', reservations=reservations, calc_duration_and_cost=calc_duration_and_cost
+        'user_history.html', reservations=reservations, next_cursor=next_cursor,
+        calc_duration_and_cost=billing.describe
     )
 
 
 @user_bp.route('/search', methods=['GET', 'POST'])
 @login_required
 def search():
-    search_term = ""
-    if request.method == 'POST':
-        search_term = request.form.get('location', '').strip()
-        if search_term:
-            lots = ParkingLot.query.filter(
-                (ParkingLot.address.ilike(f"%{search_term}%")) |
-                (ParkingLot.prime_location_name.ilike(f"%{search_term}%"))
-            ).all()
-        else:
-            lots = ParkingLot.query.all()
+    # POST from the search box, GET ?location=...&page=N for further pages
+    search_term = request.values.get('location', '').strip()
+    page = request.args.get('page', 1, type=int)
+    has_more = False
+    if search_term:
+        lots, has_more = lot_search.search_lots(search_term, page)
     else:
         lots = ParkingLot.query.all()   # On initial page load, show all lots
 
-    return render_template('user_search.html', lots=lots, search_term=search_term)
+    return render_template('user_search.html', lots=lots, search_term=search_term,
+                           page=page, has_more=has_more)
+
+
+@user_bp.route('/search/autocomplete')
+@login_required
+def search_autocomplete():
+    term = request.args.get('q', '').strip()
+    lots = lot_search.autocomplete(term) if len(term) >= 2 else []
+    return jsonify([
+        {'id': lot.id, 'name': lot.prime_location_name, 'address': lot.address,
+         'pin_code': lot.pin_code, 'available': lot.available_spots}
+        for lot in lots
+    ])
 
 
 
@@ -66,29 +73,17 @@ def search():
 @user_bp.route('/release', methods=['GET', 'POST'])
 @login_required
 def release_page():
-    res = Reservation.query.filter_by(user_id=current_user.id, leaving_timestamp=None).first()
+    res = reservations.active_reservation(current_user.id)
     if not res:
         flash("No active reservation to release.")
         return redirect(url_for('user.dashboard'))
 
-    # Calculate total cost (same logic as before)
-    total_cost = None
-    if res.parking_timestamp:
-        now = datetime.utcnow()
-        delta = now - res.parking_timestamp
-        hours = delta.total_seconds() / 3600
-        hours_rounded = max(1, int(ceil(hours)))
-        total_cost = hours_rounded * res.spot.lot.price if res.spot and res.spot.lot else 0
-
     if request.method == 'POST':
-        res.leaving_timestamp = db.func.now()
-        spot = ParkingSpot.query.get(res.spot_id)
-        spot.status = 'A'
-        res.parking_cost = total_cost
-        db.session.commit()
+        reservations.release(res)
         flash("Spot released. Have a great day!")
         return redirect(url_for('user.dashboard'))
 
+    total_cost = billing.cost_so_far(res)
     return render_template('release_confirm.html', reservation=res, total_cost=total_cost)
 
 
@@ -101,10 +96,7 @@ def release_spot(res_id):
     if res.user_id != current_user.id or res.leaving_timestamp is not None:
         flash('Invalid operation.')
         return redirect(url_for('user.dashboard'))
-    res.leaving_timestamp = db.func.now()
-    spot = ParkingSpot.query.get(res.spot_id)
-    spot.status = 'A'
-    db.session.commit()
+    reservations.release(res)
     flash('Spot released. Thank you!')
     return redirect(url_for('user.dashboard'))
 
@@ -112,8 +104,7 @@ def release_spot(res_id):
 @login_required
 def lot_detail(lot_id):
     lot = ParkingLot.query.get_or_404(lot_id)
-    spots = ParkingSpot.query.filter_by(lot_id=lot_id).all()
-    return render_template('user_lot_detail.html', lot=lot, spots=spots)
+    return render_template('user_lot_detail.html', lot=lot, spots=occupancy.get(lot).grid())
 
 
 
@@ -121,35 +112,19 @@ def lot_detail(lot_id):
 @user_bp.route('/reserve/<int:lot_id>', methods=['POST'])
 @login_required
 def reserve_spot(lot_id):
-
-    
-    # Don't allow multiple active reservations
-    active_res = Reservation.query.filter_by(user_id=current_user.id, leaving_timestamp=None).first()
-    if active_res:
-        flash('You already have an active reservation.')
+    try:
+        reservation = reservations.reserve(current_user.id, lot_id, request.form.get('vehicle_number'))
+    except reservations.LotFullError as exc:
+        flash(str(exc))
+        suggestions = nearby.alternatives(lot_id)
+        if suggestions:
+            flash('Nearby lots with free spots: ' + ', '.join(
+                f'{name} ({pin}, {free} free)' for _, name, pin, free in suggestions))
         return redirect(url_for('user.dashboard'))
-
-    # Find the first available spot in this lot
-    spot = ParkingSpot.query.filter_by(lot_id=lot_id, status='A').first()
-    if not spot:
-        flash('No available spots in this lot.')
-        return redirect(url_for('user.dashboard'))
-
-    # Get vehicle number from submitted form
-    vehicle_number = request.form.get('vehicle_number', '').strip()
-    if not vehicle_number or len(vehicle_number) < 6:
-        flash('Vehicle number is required and must be at least 6 characters.')
+    except reservations.ReservationError as exc:
+        flash(str(exc))
         return redirect(url_for('user.dashboard'))
-
-    # Create reservation with vehicle number
-    spot.status = 'O'
-    reservation = Reservation(
-        spot_id=spot.id,
-        user_id=current_user.id,
-        vehicle_number=vehicle_number
-    )
-    db.session.add(reservation)
-    db.session.commit()
+    spot = reservation.spot
     flash(f'Reservation successful! Spot #{spot.id} in Lot "{spot.lot.prime_location_name}".')
     return redirect(url_for('user.dashboard'))
 
@@ -168,6 +143,7 @@ def edit_profile():
         if email:
             current_user.username = email
         db.session.commit()
+        signals.user_changed.send(current_user.id)
         flash("Profile updated successfully.")
         return redirect(url_for('user.edit_profile'))
     return render_template('edit_profile.html', user=current_user)
@@ -180,13 +156,28 @@ def edit_profile():
 @user_bp.route('/summary')
 @login_required
 def summary():
-    # get all user's reservations
-    reservations = Reservation.query.filter_by(user_id=current_user.id).all()
-    # summary: count per lot name
-    from collections import Counter
-    lot_names = [res.spot.lot.prime_location_name for res in reservations if res.spot and res.spot.lot]
-    count_per_lot = Counter(lot_names)
-    bar_labels = list(count_per_lot.keys())
-    bar_values = list(count_per_lot.values())
+    # summary: count of the user's reservations per lot name (one GROUP BY query)
+    visits = archive.across(lambda model: db.select(model.id, model.spot_id)
+                            .where(model.user_id == current_user.id)).subquery()
+    count_per_lot = (db.session.query(ParkingLot.prime_location_name, db.func.count(visits.c.id))
+                     .join(ParkingSpot, ParkingSpot.lot_id == ParkingLot.id)
+                     .join(visits, visits.c.spot_id == ParkingSpot.id)
+                     .group_by(ParkingLot.prime_location_name)
+                     .order_by(db.func.min(visits.c.id))
+                     .all())
+    bar_labels = [name for name, _ in count_per_lot]
+    bar_values = [count for _, count in count_per_lot]
     return render_template('user_summary.html', bar_labels=bar_labels, bar_values=bar_values)
 
+
+@user_bp.route('/charts/usage')
+@login_required
+def usage_chart():
+    # site-wide or per-lot activity for planning a visit; revenue stays admin-only
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in rollups.STEPS:
+        return jsonify(error="granularity must be 'hour' or 'day'"), 400
+    data = rollups.series(granularity, request.args.get('buckets', type=int),
+                          request.args.get('lot_id', type=int))
+    data.pop('revenue')
+    return jsonify(data)
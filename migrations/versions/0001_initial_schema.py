@@ -0,0 +1,65 @@
+"""initial schema
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+Existing databases created by db.create_all() already match this revision:
+run ``flask db stamp 0001_initial_schema`` on them before ``flask db upgrade``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_initial_schema'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=80), nullable=False),
+        sa.Column('password', sa.String(length=128), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=True),
+        sa.Column('full_name', sa.String(length=120), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username')
+    )
+    op.create_table('parking_lots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('prime_location_name', sa.String(length=100), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('address', sa.String(length=200), nullable=False),
+        sa.Column('pin_code', sa.String(length=10), nullable=False),
+        sa.Column('maximum_number_of_spots', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('parking_spots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('lot_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=1), nullable=True),
+        sa.ForeignKeyConstraint(['lot_id'], ['parking_lots.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reservations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('spot_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('parking_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('leaving_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('parking_cost', sa.Float(), nullable=True),
+        sa.Column('vehicle_number', sa.String(length=32), nullable=True),
+        sa.ForeignKeyConstraint(['spot_id'], ['parking_spots.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('reservations')
+    op.drop_table('parking_spots')
+    op.drop_table('parking_lots')
+    op.drop_table('users')
@@ -0,0 +1,37 @@
+"""materialized available/occupied counters on parking_lots
+
+Revision ID: 0002_lot_spot_counters
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 09:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_lot_spot_counters'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('parking_lots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('available_spots', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('occupied_spots', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the current spot rows
+    op.execute("""
+        UPDATE parking_lots SET
+            available_spots = (SELECT COUNT(*) FROM parking_spots
+                               WHERE parking_spots.lot_id = parking_lots.id AND parking_spots.status = 'A'),
+            occupied_spots = (SELECT COUNT(*) FROM parking_spots
+                              WHERE parking_spots.lot_id = parking_lots.id AND parking_spots.status = 'O')
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('parking_lots', schema=None) as batch_op:
+        batch_op.drop_column('occupied_spots')
+        batch_op.drop_column('available_spots')
@@ -0,0 +1,36 @@
+"""indexes for active-reservation, history and spot-status lookups
+
+Revision ID: 0003_hot_query_indexes
+Revises: 0002_lot_spot_counters
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_hot_query_indexes'
+down_revision = '0002_lot_spot_counters'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text('leaving_timestamp IS NULL')
+
+
+def upgrade():
+    op.create_index('ix_parking_spots_lot_status', 'parking_spots', ['lot_id', 'status'])
+    op.create_index('ix_reservations_user_active', 'reservations', ['user_id'],
+                    sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+    op.create_index('ix_reservations_spot_active', 'reservations', ['spot_id'],
+                    sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+    op.create_index('ix_reservations_user_parked', 'reservations', ['user_id', 'parking_timestamp'])
+    op.create_index('ix_reservations_parking_timestamp', 'reservations', ['parking_timestamp'])
+
+
+def downgrade():
+    op.drop_index('ix_reservations_parking_timestamp', table_name='reservations')
+    op.drop_index('ix_reservations_user_parked', table_name='reservations')
+    op.drop_index('ix_reservations_spot_active', table_name='reservations')
+    op.drop_index('ix_reservations_user_active', table_name='reservations')
+    op.drop_index('ix_parking_spots_lot_status', table_name='parking_spots')
@@ -0,0 +1,51 @@
+"""FTS5 search index over parking lots, pin_code index
+
+Revision ID: 0004_lot_search_index
+Revises: 0003_hot_query_indexes
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_lot_search_index'
+down_revision = '0003_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE parking_lots_fts USING fts5("
+    "prime_location_name, address, pin_code, content='parking_lots', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    "INSERT INTO parking_lots_fts(parking_lots_fts, rank) VALUES('rank', 'bm25(10.0, 4.0, 1.0)')",
+    "CREATE TRIGGER parking_lots_fts_ai AFTER INSERT ON parking_lots BEGIN "
+    "INSERT INTO parking_lots_fts(rowid, prime_location_name, address, pin_code) "
+    "VALUES (new.id, new.prime_location_name, new.address, new.pin_code); END",
+    "CREATE TRIGGER parking_lots_fts_ad AFTER DELETE ON parking_lots BEGIN "
+    "INSERT INTO parking_lots_fts(parking_lots_fts, rowid, prime_location_name, address, pin_code) "
+    "VALUES ('delete', old.id, old.prime_location_name, old.address, old.pin_code); END",
+    "CREATE TRIGGER parking_lots_fts_au AFTER UPDATE OF prime_location_name, address, pin_code "
+    "ON parking_lots BEGIN "
+    "INSERT INTO parking_lots_fts(parking_lots_fts, rowid, prime_location_name, address, pin_code) "
+    "VALUES ('delete', old.id, old.prime_location_name, old.address, old.pin_code); "
+    "INSERT INTO parking_lots_fts(rowid, prime_location_name, address, pin_code) "
+    "VALUES (new.id, new.prime_location_name, new.address, new.pin_code); END",
+    # index the lots that already exist
+    "INSERT INTO parking_lots_fts(parking_lots_fts) VALUES('rebuild')",
+]
+
+
+def upgrade():
+    op.create_index('ix_parking_lots_pin_code', 'parking_lots', ['pin_code'])
+    if op.get_bind().dialect.name == 'sqlite':
+        for ddl in SEARCH_DDL:
+            op.execute(ddl)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in ('parking_lots_fts_au', 'parking_lots_fts_ad', 'parking_lots_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS parking_lots_fts")
+    op.drop_index('ix_parking_lots_pin_code', table_name='parking_lots')
@@ -0,0 +1,36 @@
+"""hourly / daily per-lot usage rollups
+
+Revision ID: 0005_lot_usage_rollups
+Revises: 0004_lot_search_index
+Create Date: 2026-10-18 13:00:00
+
+Fill it for existing reservations with ``flask rebuild-rollups``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_lot_usage_rollups'
+down_revision = '0004_lot_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('lot_usage_rollups',
+        sa.Column('lot_id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(length=4), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('reservations_started', sa.Integer(), nullable=False),
+        sa.Column('spot_seconds', sa.Float(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('peak_occupied', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('lot_id', 'granularity', 'bucket_start')
+    )
+    op.create_index('ix_lot_usage_rollups_window', 'lot_usage_rollups', ['granularity', 'bucket_start'])
+
+
+def downgrade():
+    op.drop_index('ix_lot_usage_rollups_window', table_name='lot_usage_rollups')
+    op.drop_table('lot_usage_rollups')
@@ -0,0 +1,26 @@
+"""per-lot version counter for API ETags
+
+Revision ID: 0006_lot_version
+Revises: 0005_lot_usage_rollups
+Create Date: 2026-10-18 14:00:00
+
+Plain ALTER TABLE (no batch copy), so the lot search triggers on
+parking_lots are left alone.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_lot_version'
+down_revision = '0005_lot_usage_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('parking_lots', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('parking_lots', 'version')
@@ -0,0 +1,45 @@
+"""archive table for closed reservations
+
+Revision ID: 0007_reservations_archive
+Revises: 0006_lot_version
+Create Date: 2026-10-18 15:00:00
+
+Rows are moved here by ``flask archive-reservations``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_reservations_archive'
+down_revision = '0006_lot_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reservations_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('spot_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('parking_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('leaving_timestamp', sa.DateTime(), nullable=False),
+        sa.Column('parking_cost', sa.Float(), nullable=True),
+        sa.Column('vehicle_number', sa.String(length=32), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_reservations_archive_user_parked', 'reservations_archive', ['user_id', 'parking_timestamp'])
+    op.create_index('ix_reservations_archive_parking_timestamp', 'reservations_archive', ['parking_timestamp'])
+    op.create_index('ix_reservations_archive_spot', 'reservations_archive', ['spot_id'])
+
+
+def downgrade():
+    # put archived history back rather than dropping it
+    op.execute('INSERT INTO reservations (id, spot_id, user_id, parking_timestamp, leaving_timestamp, '
+               'parking_cost, vehicle_number) SELECT id, spot_id, user_id, parking_timestamp, '
+               'leaving_timestamp, parking_cost, vehicle_number FROM reservations_archive')
+    op.drop_index('ix_reservations_archive_spot', table_name='reservations_archive')
+    op.drop_index('ix_reservations_archive_parking_timestamp', table_name='reservations_archive')
+    op.drop_index('ix_reservations_archive_user_parked', table_name='reservations_archive')
+    op.drop_table('reservations_archive')
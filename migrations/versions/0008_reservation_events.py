@@ -0,0 +1,44 @@
+"""append-only reservation / spot event log
+
+Revision ID: 0008_reservation_events
+Revises: 0007_reservations_archive
+Create Date: 2026-10-18 17:00:00
+
+The log starts with the current state: one spot-created event per spot and
+one reserved event per occupied spot, so replaying it from the first event
+rebuilds today's spot statuses.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_reservation_events'
+down_revision = '0007_reservations_archive'
+branch_labels = None
+depends_on = None
+
+SPOT_CREATED, RESERVED = 3, 1  # services/events.py
+
+
+def upgrade():
+    op.create_table('reservation_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.SmallInteger(), nullable=False),
+        sa.Column('lot_id', sa.Integer(), nullable=False),
+        sa.Column('spot_id', sa.Integer(), nullable=False),
+        sa.Column('reservation_id', sa.Integer(), nullable=True),
+        sa.Column('at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f'INSERT INTO reservation_events (kind, lot_id, spot_id, at) '
+               f'SELECT {SPOT_CREATED}, lot_id, id, CURRENT_TIMESTAMP FROM parking_spots ORDER BY id')
+    op.execute(f"INSERT INTO reservation_events (kind, lot_id, spot_id, reservation_id, at) "
+               f"SELECT {RESERVED}, s.lot_id, s.id, r.id, COALESCE(r.parking_timestamp, CURRENT_TIMESTAMP) "
+               f"FROM parking_spots s LEFT JOIN reservations r "
+               f"ON r.spot_id = s.id AND r.leaving_timestamp IS NULL "
+               f"WHERE s.status = 'O' ORDER BY s.id")
+
+
+def downgrade():
+    op.drop_table('reservation_events')
@@ -0,0 +1,70 @@
+"""never reuse parking lot ids (SQLite AUTOINCREMENT)
+
+Revision ID: 0009_lot_ids_autoincrement
+Revises: 0008_reservation_events
+Create Date: 2026-10-18 18:00:00
+
+Without AUTOINCREMENT SQLite hands a deleted newest lot's id to the next lot,
+which then inherits everything keyed by (lot id, version): cached fragments,
+occupancy maps, API ETags and the deleted lot's rollups. The table is rebuilt,
+which drops its search-index triggers, so they are created again. The
+sequence starts above every lot id the rollups and the event log still know.
+PostgreSQL sequences never reuse ids; nothing to do there.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_lot_ids_autoincrement'
+down_revision = '0008_reservation_events'
+branch_labels = None
+depends_on = None
+
+# Same triggers as migration 0004
+TRIGGER_DDL = {
+    'parking_lots_fts_ai':
+        "CREATE TRIGGER parking_lots_fts_ai AFTER INSERT ON parking_lots BEGIN "
+        "INSERT INTO parking_lots_fts(rowid, prime_location_name, address, pin_code) "
+        "VALUES (new.id, new.prime_location_name, new.address, new.pin_code); END",
+    'parking_lots_fts_ad':
+        "CREATE TRIGGER parking_lots_fts_ad AFTER DELETE ON parking_lots BEGIN "
+        "INSERT INTO parking_lots_fts(parking_lots_fts, rowid, prime_location_name, address, pin_code) "
+        "VALUES ('delete', old.id, old.prime_location_name, old.address, old.pin_code); END",
+    'parking_lots_fts_au':
+        "CREATE TRIGGER parking_lots_fts_au AFTER UPDATE OF prime_location_name, address, pin_code "
+        "ON parking_lots BEGIN "
+        "INSERT INTO parking_lots_fts(parking_lots_fts, rowid, prime_location_name, address, pin_code) "
+        "VALUES ('delete', old.id, old.prime_location_name, old.address, old.pin_code); "
+        "INSERT INTO parking_lots_fts(rowid, prime_location_name, address, pin_code) "
+        "VALUES (new.id, new.prime_location_name, new.address, new.pin_code); END",
+}
+
+
+def _rebuild(autoincrement):
+    for trigger in TRIGGER_DDL:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    with op.batch_alter_table('parking_lots', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    for ddl in TRIGGER_DDL.values():
+        op.execute(ddl)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(True)
+    highest = op.get_bind().execute(sa.text(
+        "SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM parking_lots "
+        "UNION ALL SELECT MAX(lot_id) FROM lot_usage_rollups "
+        "UNION ALL SELECT MAX(lot_id) FROM reservation_events)"
+    )).scalar() or 0
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'parking_lots'")
+    op.execute(f"INSERT INTO sqlite_sequence (name, seq) VALUES ('parking_lots', {int(highest)})")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(False)
@@ -0,0 +1,48 @@
+"""never reuse parking spot ids (SQLite AUTOINCREMENT)
+
+Revision ID: 0010_spot_ids_autoincrement
+Revises: 0009_lot_ids_autoincrement
+Create Date: 2026-10-18 21:00:00
+
+Shrinking a lot deletes its newest free spots, and without AUTOINCREMENT SQLite
+hands their ids to the next spots created, possibly in another lot. Closed and
+archived reservations of the deleted spot then join to the new one, and their
+history shows the wrong lot and price. The sequence starts above every spot id
+that reservations, the archive and the event log still refer to. PostgreSQL
+sequences never reuse ids; nothing to do there.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_spot_ids_autoincrement'
+down_revision = '0009_lot_ids_autoincrement'
+branch_labels = None
+depends_on = None
+
+
+def _rebuild(autoincrement):
+    with op.batch_alter_table('parking_spots', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(True)
+    highest = op.get_bind().execute(sa.text(
+        "SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM parking_spots "
+        "UNION ALL SELECT MAX(spot_id) FROM reservations "
+        "UNION ALL SELECT MAX(spot_id) FROM reservations_archive "
+        "UNION ALL SELECT MAX(spot_id) FROM reservation_events)"
+    )).scalar() or 0
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'parking_spots'")
+    op.execute(f"INSERT INTO sqlite_sequence (name, seq) VALUES ('parking_spots', {int(highest)})")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(False)
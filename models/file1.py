@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import DDL, event
 
 db = SQLAlchemy()
 
@@ -26,11 +27,63 @@ class ParkingLot(db.Model):
     address = db.Column(db.String(200), nullable=False)
     pin_code = db.Column(db.String(10), nullable=False)
     maximum_number_of_spots = db.Column(db.Integer, nullable=False)
+    # Materialized spot counters, kept in step with ParkingSpot.status on every write
+    available_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    occupied_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped on every availability or lot change; API ETags are built from it
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     spots = db.relationship('ParkingSpot', back_populates='lot', cascade="all, delete-orphan")
 
+    @property
+    def total_spots(self):
+        return (self.available_spots or 0) + (self.occupied_spots or 0)
+
+    def shift_counts(self, available=0, occupied=0):
+        # Applied as "col = col + n" in the UPDATE so concurrent writers don't lose increments
+        if available:
+            self.available_spots = ParkingLot.available_spots + available
+        if occupied:
+            self.occupied_spots = ParkingLot.occupied_spots + occupied
+        self.bump_version()
+
+    def bump_version(self):
+        self.version = ParkingLot.version + 1
+
+    __table_args__ = (
+        # pin-code prefix search (range scan)
+        db.Index('ix_parking_lots_pin_code', 'pin_code'),
+        # never hand a deleted lot's id to a new lot: caches and ETags are keyed by (id, version)
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         return f"<ParkingLot {self.prime_location_name}>"
 
+# Full-text index over lot name/address/pin (SQLite FTS5, external content), kept in
+# sync by triggers so bulk Core inserts are indexed too. Same DDL as migration 0004.
+LOT_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE parking_lots_fts USING fts5("
+    "prime_location_name, address, pin_code, content='parking_lots', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    # rank = bm25 with name matches weighted above address and pin code
+    "INSERT INTO parking_lots_fts(parking_lots_fts, rank) VALUES('rank', 'bm25(10.0, 4.0, 1.0)')",
+    "CREATE TRIGGER parking_lots_fts_ai AFTER INSERT ON parking_lots BEGIN "
+    "INSERT INTO parking_lots_fts(rowid, prime_location_name, address, pin_code) "
+    "VALUES (new.id, new.prime_location_name, new.address, new.pin_code); END",
+    "CREATE TRIGGER parking_lots_fts_ad AFTER DELETE ON parking_lots BEGIN "
+    "INSERT INTO parking_lots_fts(parking_lots_fts, rowid, prime_location_name, address, pin_code) "
+    "VALUES ('delete', old.id, old.prime_location_name, old.address, old.pin_code); END",
+    # only text edits touch the index, not the counter updates on every reservation
+    "CREATE TRIGGER parking_lots_fts_au AFTER UPDATE OF prime_location_name, address, pin_code "
+    "ON parking_lots BEGIN "
+    "INSERT INTO parking_lots_fts(parking_lots_fts, rowid, prime_location_name, address, pin_code) "
+    "VALUES ('delete', old.id, old.prime_location_name, old.address, old.pin_code); "
+    "INSERT INTO parking_lots_fts(rowid, prime_location_name, address, pin_code) "
+    "VALUES (new.id, new.prime_location_name, new.address, new.pin_code); END",
+]
+for _ddl in LOT_SEARCH_DDL:
+    event.listen(ParkingLot.__table__, 'after_create', DDL(_ddl).execute_if(dialect='sqlite'))
+
 # ----- ParkingSpot Table -----
 class ParkingSpot(db.Model):
     __tablename__ = 'parking_spots'
@@ -40,6 +93,13 @@ class ParkingSpot(db.Model):
     lot = db.relationship('ParkingLot', back_populates='spots')
     reservations = db.relationship('Reservation', back_populates='spot')
 
+    __table_args__ = (
+        # first-free-spot lookup: filter_by(lot_id=..., status='A')
+        db.Index('ix_parking_spots_lot_status', 'lot_id', 'status'),
+        # never hand a deleted spot's id to a new spot: closed reservations still point at it
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         return f"<ParkingSpot {self.id} (Lot {self.lot_id}) {self.status}>"
 
@@ -54,10 +114,87 @@ class Reservation(db.Model):
     parking_cost = db.Column(db.Float, nullable=True)
     vehicle_number = db.Column(db.String(32), nullable=True)
 
-    
-
     user = db.relationship('User', back_populates='reservations')
     spot = db.relationship('ParkingSpot', back_populates='reservations')
 
+    __table_args__ = (
+        # active reservation per user / per spot (leaving_timestamp IS NULL); partial, so only open rows are indexed
+        db.Index('ix_reservations_user_active', 'user_id',
+                 sqlite_where=db.text('leaving_timestamp IS NULL'),
+                 postgresql_where=db.text('leaving_timestamp IS NULL')),
+        db.Index('ix_reservations_spot_active', 'spot_id',
+                 sqlite_where=db.text('leaving_timestamp IS NULL'),
+                 postgresql_where=db.text('leaving_timestamp IS NULL')),
+        # per-user history, newest first
+        db.Index('ix_reservations_user_parked', 'user_id', 'parking_timestamp'),
+        # admin parking records, newest first
+        db.Index('ix_reservations_parking_timestamp', 'parking_timestamp'),
+    )
+
     def __repr__(self):
         return f"<Reservation {self.id} (User {self.user_id} - Spot {self.spot_id})>"
+
+# ----- Archived (closed) reservations -----
+class ArchivedReservation(db.Model):
+    """Closed reservations moved out of the hot table by ``flask archive-reservations``.
+
+    Same columns and ids as Reservation, so views can merge both; no foreign
+    keys, so archived history survives deleted spots.
+    """
+    __tablename__ = 'reservations_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    spot_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    parking_timestamp = db.Column(db.DateTime)
+    leaving_timestamp = db.Column(db.DateTime, nullable=False)
+    parking_cost = db.Column(db.Float, nullable=True)
+    vehicle_number = db.Column(db.String(32), nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    user = db.relationship('User', primaryjoin='foreign(ArchivedReservation.user_id) == User.id',
+                           viewonly=True)
+    spot = db.relationship('ParkingSpot', primaryjoin='foreign(ArchivedReservation.spot_id) == ParkingSpot.id',
+                           viewonly=True)
+
+    __table_args__ = (
+        db.Index('ix_reservations_archive_user_parked', 'user_id', 'parking_timestamp'),
+        db.Index('ix_reservations_archive_parking_timestamp', 'parking_timestamp'),
+        db.Index('ix_reservations_archive_spot', 'spot_id'),
+    )
+
+    def __repr__(self):
+        return f"<ArchivedReservation {self.id} (User {self.user_id} - Spot {self.spot_id})>"
+
+# ----- Reservation / spot event log (append-only) -----
+class ReservationEvent(db.Model):
+    """One spot state change, written in the transaction that made it (see services/events.py).
+
+    The id is the log position. No foreign keys: the log outlives deleted spots and lots.
+    """
+    __tablename__ = 'reservation_events'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.SmallInteger, nullable=False)  # events.RESERVED / RELEASED / SPOT_CREATED / SPOT_DELETED
+    lot_id = db.Column(db.Integer, nullable=False)
+    spot_id = db.Column(db.Integer, nullable=False)
+    reservation_id = db.Column(db.Integer, nullable=True)
+    at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ReservationEvent {self.id} kind={self.kind} spot={self.spot_id}>"
+
+# ----- Lot usage rollups (hourly / daily) -----
+class LotUsageRollup(db.Model):
+    __tablename__ = 'lot_usage_rollups'
+    # no foreign key: a lot's history stays charted after the lot is deleted
+    lot_id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(4), primary_key=True)  # 'hour' or 'day'
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    reservations_started = db.Column(db.Integer, nullable=False, default=0)
+    spot_seconds = db.Column(db.Float, nullable=False, default=0)  # occupied time of closed reservations
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    peak_occupied = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # site-wide charts: one granularity over a time window, all lots
+        db.Index('ix_lot_usage_rollups_window', 'granularity', 'bucket_start'),
+    )
@@ -0,0 +1,154 @@
+import random
+import threading
+from collections import deque
+from sqlalchemy import select, update
+from models.file1 import db, ParkingSpot
+from services import signals
+
+
+class Contended(Exception):
+    """The lot has free spots, but other workers claimed each one first; worth retrying."""
+
+    def __init__(self, lot_id):
+        super().__init__(f'Spots in lot {lot_id} are being claimed concurrently')
+        self.lot_id = lot_id
+
+
+class SpotAllocator:
+    """Claims free spots with a conditional UPDATE, fed from per-lot free lists.
+
+    Each worker keeps a small shuffled list of candidate spot ids per lot so a
+    reservation normally costs a single ``UPDATE ... WHERE status = 'A'``.
+    The candidates are only hints: another worker may have taken one already,
+    in which case the UPDATE matches no row and the list, now likely stale, is
+    reloaded from the database. A lot is reported full only when such a fresh
+    read finds no free spot.
+    """
+
+    def __init__(self, batch_size=64, max_attempts=8):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._free = {}
+        self._lock = threading.Lock()
+
+    def _pop(self, lot_id):
+        with self._lock:
+            free = self._free.get(lot_id)
+            return free.popleft() if free else None
+
+    def _refill(self, lot_id):
+        ids = db.session.execute(
+            select(ParkingSpot.id)
+            .where(ParkingSpot.lot_id == lot_id, ParkingSpot.status == 'A')
+            .limit(self.batch_size)
+        ).scalars().all()
+        # Shuffle so concurrent workers refilling the same lot try different spots first
+        random.shuffle(ids)
+        with self._lock:
+            self._free[lot_id] = deque(ids)
+        return bool(ids)
+
+    def claim(self, lot_id):
+        """Mark one free spot of the lot as occupied; return its id, or None if the lot is full.
+
+        Raises Contended if the lot has free spots but other workers took every
+        one this worker tried. The UPDATE runs in the caller's transaction, so a
+        rollback un-claims the spot.
+        """
+        for _ in range(self.max_attempts):
+            spot_id = self._pop(lot_id)
+            if spot_id is None:
+                if not self._refill(lot_id):
+                    return None
+                continue
+            if self._claim(ParkingSpot.id == spot_id) is not None:
+                return spot_id
+            # taken by another worker since the list was read; the rest may be too
+            if not self._refill(lot_id):
+                return None
+        # still losing races: let the database pick whichever spot is free right now
+        free = (select(ParkingSpot.id)
+                .where(ParkingSpot.lot_id == lot_id, ParkingSpot.status == 'A')
+                .limit(1)
+                .with_for_update(skip_locked=True))
+        spot_id = self._claim(ParkingSpot.id == free.scalar_subquery())
+        if spot_id is None and self._refill(lot_id):
+            raise Contended(lot_id)
+        return spot_id
+
+    def _claim(self, which):
+        return db.session.execute(
+            update(ParkingSpot)
+            .where(which, ParkingSpot.status == 'A')
+            .values(status='O')
+            .returning(ParkingSpot.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+
+    def claim_many(self, lot_id, n):
+        """Mark up to n free spots of the lot as occupied; return their ids (fewer if the lot runs out).
+
+        One set-based ``UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING id``
+        per round instead of n single claims. Like claim(), it runs in the
+        caller's transaction.
+        """
+        claimed = []
+        while len(claimed) < n:
+            free = (select(ParkingSpot.id)
+                    .where(ParkingSpot.lot_id == lot_id, ParkingSpot.status == 'A')
+                    .limit(n - len(claimed))
+                    .with_for_update(skip_locked=True))
+            ids = db.session.execute(
+                update(ParkingSpot)
+                .where(ParkingSpot.id.in_(free), ParkingSpot.status == 'A')
+                .values(status='O')
+                .returning(ParkingSpot.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            if not ids:
+                break
+            claimed.extend(ids)
+        # most of this worker's hints for the lot are probably gone now
+        self.forget(lot_id)
+        return claimed
+
+    def release(self, lot_id, spot_id):
+        """Hand a freed spot back to this worker's free list (call after commit)."""
+        with self._lock:
+            free = self._free.get(lot_id)
+            if free is not None and len(free) < self.batch_size:
+                free.append(spot_id)
+
+    def discard(self, lot_id, spot_id):
+        """Drop a deleted spot from this worker's free list."""
+        with self._lock:
+            free = self._free.get(lot_id)
+            if free is not None and spot_id in free:
+                free.remove(spot_id)
+
+    def forget(self, lot_id=None):
+        with self._lock:
+            if lot_id is None:
+                self._free.clear()
+            else:
+                self._free.pop(lot_id, None)
+
+
+allocator = SpotAllocator()
+
+
+def _on_released(lot_id, spot_id=None, **kwargs):
+    allocator.release(lot_id, spot_id)
+
+
+def _on_removed(lot_id, spot_id=None, **kwargs):
+    allocator.discard(lot_id, spot_id)
+
+
+def _on_lot_changed(lot_id, **kwargs):
+    allocator.forget(lot_id)
+
+
+signals.spot_released.connect(_on_released)
+signals.spot_removed.connect(_on_removed)
+signals.lot_changed.connect(_on_lot_changed)
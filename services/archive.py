@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from models.file1 import db, ArchivedReservation, Reservation
+
+ARCHIVE_BATCH = 5000
+DEFAULT_AGE_DAYS = 180  # override with ARCHIVE_AFTER_DAYS
+
+# Hot table first, then the archive; both have Reservation's columns and ids
+MODELS = (Reservation, ArchivedReservation)
+_COPIED = ('id', 'spot_id', 'user_id', 'parking_timestamp', 'leaving_timestamp',
+           'parking_cost', 'vehicle_number')
+
+
+def across(build):
+    """UNION ALL of ``build(model)`` over the hot and archived reservation tables."""
+    return union_all(*(build(model) for model in MODELS))
+
+
+def archive_closed(older_than_days=DEFAULT_AGE_DAYS, batch_rows=ARCHIVE_BATCH, now=None, on_batch=None):
+    """Move reservations released more than ``older_than_days`` ago into the archive table.
+
+    Works through the hot table in id order, ``batch_rows`` at a time. Each batch
+    is copied and deleted in one short committed transaction, so the site stays
+    up while it runs and a run that is interrupted simply continues when started
+    again. ``on_batch(last_id, moved)`` reports progress. Returns the rows moved.
+
+    The newest reservation is never moved: SQLite gives a new row max(id) + 1,
+    which must not collide with an archived id.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=older_than_days)
+    newest = db.session.query(func.max(Reservation.id)).scalar()
+    if newest is None:
+        return 0
+    closed = (Reservation.leaving_timestamp.is_not(None), Reservation.leaving_timestamp < cutoff,
+              Reservation.id < newest)
+    pick = select(Reservation.id).where(*closed).order_by(Reservation.id).limit(batch_rows)
+    copied = [getattr(Reservation, name) for name in _COPIED]
+    total, after_id = 0, 0
+    while True:
+        ids = db.session.execute(pick.where(Reservation.id > after_id)).scalars().all()
+        if not ids:
+            return total
+        # an id range plus the same conditions, rather than thousands of bound ids
+        batch = closed + (Reservation.id > after_id, Reservation.id <= ids[-1])
+        db.session.execute(
+            insert(ArchivedReservation).from_select(
+                _COPIED + ('archived_at',),
+                select(*copied, literal(now, ArchivedReservation.archived_at.type)).where(*batch)
+            )
+        )
+        moved = db.session.execute(
+            delete(Reservation).where(*batch).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        total += moved
+        after_id = ids[-1]
+        if on_batch:
+            on_batch(after_id, total)
+
+
+def counts():
+    """(hot, archived) reservation row counts."""
+    return tuple(db.session.query(func.count(model.id)).scalar() for model in MODELS)
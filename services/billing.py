@@ -0,0 +1,106 @@
+from datetime import datetime
+from math import ceil
+from sqlalchemy import String, select, type_coerce, update
+from models.file1 import db, ParkingLot, ParkingSpot, Reservation
+
+BACKFILL_CHUNK = 50000
+
+
+# --- one reservation (views, release) ---
+def duration_label(seconds):
+    mins = int(seconds // 60)
+    hrs, mins_display = mins // 60, mins % 60
+    return f"{hrs}h {mins_display}m" if hrs else f"{mins_display}m"
+
+
+def cost(parked, left, price):
+    """Whole hours started (at least one) times the lot price; None if anything is missing."""
+    if not (parked and left and price is not None):
+        return None
+    hours_rounded = max(1, int(ceil((left - parked).total_seconds() / 3600)))
+    return round(hours_rounded * price, 2)
+
+
+def duration_and_cost(parked, left, price):
+    if not (parked and left):
+        return '-', None
+    return duration_label((left - parked).total_seconds()), cost(parked, left, price)
+
+
+def cost_so_far(res, now=None):
+    """What releasing ``res`` now would cost."""
+    lot = res.spot.lot if res.spot else None
+    return cost(res.parking_timestamp, now or datetime.utcnow(), lot.price if lot else None)
+
+
+def describe(res):
+    """(duration, "₹cost") for the history / records tables, "-" where unknown.
+
+    The cost is recomputed from the timestamps and the lot's price; the stored
+    parking_cost is only used once the spot or lot is gone.
+    """
+    if not (res.parking_timestamp and res.leaving_timestamp):
+        return "-", "-"
+    lot = res.spot.lot if res.spot else None
+    duration, amount = duration_and_cost(res.parking_timestamp, res.leaving_timestamp,
+                                         lot.price if lot else None)
+    if amount is None:
+        amount = res.parking_cost
+    return duration, "-" if amount is None else f"₹{amount:.2f}"
+
+
+# --- whole batches ---
+def costs(parked, left, price):
+    """Vectorized cost(): equal-length sequences in, float64 array out (NaN where missing).
+
+    Timestamps may be datetimes or ISO strings (as SQLite stores them).
+    """
+    import numpy as np
+    import pandas as pd
+
+    seconds = (pd.to_datetime(left, format='ISO8601')
+               - pd.to_datetime(parked, format='ISO8601')).total_seconds().to_numpy()
+    hours_rounded = np.maximum(1.0, np.ceil(seconds / 3600))
+    # NaT / NaN inputs propagate to NaN
+    return np.round(hours_rounded * np.asarray(price, dtype='float64'), 2)
+
+
+def recompute_costs(only_missing=True, after_id=0, chunk_rows=BACKFILL_CHUNK, on_chunk=None):
+    """Recompute parking_cost for closed reservations, ``chunk_rows`` at a time in id order.
+
+    Each chunk is read with one SELECT, priced with costs() and written with one
+    executemany UPDATE, then committed, so an interrupted run can be resumed by
+    passing the last id reported to ``on_chunk(last_id, updated)``.
+    Returns the number of rows updated.
+    """
+    import numpy as np
+
+    # Timestamps come back as the driver returns them (ISO strings on SQLite): pandas parses
+    # a whole column far faster than the per-row DateTime conversion would
+    stmt = (select(Reservation.id, type_coerce(Reservation.parking_timestamp, String),
+                   type_coerce(Reservation.leaving_timestamp, String), ParkingLot.price)
+            .join(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+            .join(ParkingLot, ParkingLot.id == ParkingSpot.lot_id)
+            .where(Reservation.leaving_timestamp.is_not(None))
+            .order_by(Reservation.id)
+            .limit(chunk_rows))
+    if only_missing:
+        stmt = stmt.where(Reservation.parking_cost.is_(None))
+    total = 0
+    while True:
+        rows = db.session.execute(stmt.where(Reservation.id > after_id)).all()
+        if not rows:
+            return total
+        ids, parked, left, price = zip(*rows)
+        amounts = costs(parked, left, price)
+        valid = ~np.isnan(amounts)
+        db.session.execute(
+            update(Reservation).execution_options(synchronize_session=False),
+            [{'id': i, 'parking_cost': float(a)}
+             for i, a, ok in zip(ids, amounts.tolist(), valid.tolist()) if ok]
+        )
+        db.session.commit()
+        total += int(valid.sum())
+        after_id = ids[-1]
+        if on_chunk:
+            on_chunk(after_id, total)
@@ -0,0 +1,39 @@
+from sqlalchemy import event
+from models.file1 import db
+
+SQLITE_DEFAULTS = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+}
+
+
+def sqlite_pragmas(config):
+    """PRAGMA statements for a new SQLite connection, from the SQLITE_* settings."""
+    return [
+        # WAL lets readers run alongside the single writer instead of failing with "database is locked"
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        # NORMAL is durable in WAL mode except on power loss, and skips an fsync per commit
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+    ]
+
+
+def init_app(app):
+    """Apply per-connection settings to the app's engine (SQLite pragmas; nothing for servers)."""
+    for key, value in SQLITE_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
@@ -0,0 +1,215 @@
+import array
+import os
+import struct
+import time
+from datetime import datetime
+from sqlalchemy import func, insert, literal, select
+from models.file1 import db, ParkingLot, ParkingSpot, ReservationEvent
+
+# Event kinds (ReservationEvent.kind)
+RESERVED, RELEASED, SPOT_CREATED, SPOT_DELETED = 1, 2, 3, 4
+KINDS = {RESERVED: 'reserved', RELEASED: 'released', SPOT_CREATED: 'spot_created', SPOT_DELETED: 'spot_deleted'}
+
+TAIL_BATCH = 1000      # events per read for tailing consumers
+REPLAY_CHUNK = 100000  # rows fetched per round trip while replaying
+CHECKPOINT_MAGIC = b'PEV1'
+_HEADER = struct.Struct('<4sqq')  # magic, last event id, spot count
+
+_table = ReservationEvent.__table__
+
+
+# --- writing, in the caller's transaction ---
+def record(kind, rows, at=None):
+    """Append one ``kind`` event per (lot_id, spot_id, reservation_id) row; the caller commits.
+
+    Written in the same transaction as the change itself, so the log never
+    holds an event that was rolled back or misses one that committed.
+    """
+    if not rows:
+        return
+    at = at or datetime.utcnow()
+    db.session.execute(insert(_table), [
+        {'kind': kind, 'lot_id': lot_id, 'spot_id': spot_id, 'reservation_id': reservation_id, 'at': at}
+        for lot_id, spot_id, reservation_id in rows
+    ])
+
+
+def record_lot_deleted(lot_id, at=None):
+    """A spot-deleted event for every spot of the lot, in one INSERT ... SELECT (call before the delete)."""
+    db.session.execute(
+        insert(_table).from_select(
+            ['kind', 'lot_id', 'spot_id', 'at'],
+            select(literal(SPOT_DELETED), ParkingSpot.lot_id, ParkingSpot.id,
+                   literal(at or datetime.utcnow(), _table.c.at.type))
+            .where(ParkingSpot.lot_id == lot_id).order_by(ParkingSpot.id)
+        )
+    )
+
+
+# --- tailing consumers ---
+def read(after_id=0, limit=TAIL_BATCH):
+    """Up to ``limit`` events after ``after_id``, oldest first: (id, kind, lot_id, spot_id, reservation_id, at)."""
+    return db.session.execute(
+        select(_table.c.id, _table.c.kind, _table.c.lot_id, _table.c.spot_id, _table.c.reservation_id,
+               _table.c.at)
+        .where(_table.c.id > after_id).order_by(_table.c.id).limit(limit)
+    ).all()
+
+
+def follow(after_id=0, batch=TAIL_BATCH, poll=1.0):
+    """Yield events after ``after_id`` forever, polling every ``poll`` seconds once caught up.
+
+    Keep the id of the last event handled as the consumer's position and pass
+    it back in after a restart. SQLite commits one writer at a time, so ids
+    become visible in order. On PostgreSQL concurrent transactions can commit
+    out of id order; reconcile with a replay if a consumer must never miss one.
+    """
+    while True:
+        rows = read(after_id, batch)
+        db.session.rollback()  # end the read transaction so the next poll sees new commits
+        for row in rows:
+            yield row
+        if rows:
+            after_id = rows[-1][0]
+        if len(rows) < batch:
+            time.sleep(poll)
+
+
+def event_json(row):
+    event_id, kind, lot_id, spot_id, reservation_id, at = row
+    return {'id': event_id, 'kind': KINDS.get(kind, kind), 'lot_id': lot_id, 'spot_id': spot_id,
+            'reservation_id': reservation_id, 'at': at.isoformat()}
+
+
+# --- replay ---
+class SpotState:
+    """Spot statuses and lot occupancy as of event ``last_id``.
+
+    Applying an event sets state rather than adjusting it (a reserved spot is
+    occupied, a released one free), so replaying events the state already
+    reflects is harmless. That is what lets a checkpoint be taken from the live
+    tables without stopping writers: read the last event id first, then the
+    spots, and replay from that id.
+    """
+
+    def __init__(self, last_id=0):
+        self.last_id = last_id
+        self.lot_of = {}       # spot_id -> lot_id, for every existing spot
+        self.occupied = set()  # spot ids
+
+    def apply(self, rows):
+        """Apply (id, kind, lot_id, spot_id) rows in id order; returns how many."""
+        lot_of, occupied = self.lot_of, self.occupied
+        n = 0
+        event_id = self.last_id
+        for event_id, kind, lot_id, spot_id in rows:
+            if kind == RESERVED:
+                occupied.add(spot_id)
+            elif kind == RELEASED:
+                occupied.discard(spot_id)
+            elif kind == SPOT_CREATED:
+                lot_of[spot_id] = lot_id
+            elif kind == SPOT_DELETED:
+                lot_of.pop(spot_id, None)
+                occupied.discard(spot_id)
+            n += 1
+        self.last_id = event_id
+        return n
+
+    def status(self, spot_id):
+        if spot_id not in self.lot_of:
+            return None
+        return 'O' if spot_id in self.occupied else 'A'
+
+    def lots(self):
+        """{lot_id: [available, occupied]}."""
+        counts = {}
+        occupied = self.occupied
+        for spot_id, lot_id in self.lot_of.items():
+            row = counts.get(lot_id)
+            if row is None:
+                row = counts[lot_id] = [0, 0]
+            row[spot_id in occupied] += 1
+        return counts
+
+    # --- checkpoints ---
+    @classmethod
+    def from_tables(cls):
+        """The current state straight from parking_spots (a checkpoint without replaying)."""
+        state = cls(db.session.query(func.max(_table.c.id)).scalar() or 0)
+        for spot_id, lot_id, status in db.session.execute(
+                select(ParkingSpot.id, ParkingSpot.lot_id, ParkingSpot.status)
+                .execution_options(yield_per=REPLAY_CHUNK)):
+            state.lot_of[spot_id] = lot_id
+            if status == 'O':
+                state.occupied.add(spot_id)
+        return state
+
+    def save(self, path):
+        """Write the state as a compact binary file: header, spot ids, lot ids, status bytes."""
+        spot_ids = array.array('q', self.lot_of)
+        lot_ids = array.array('q', self.lot_of.values())
+        occupied = self.occupied
+        status = bytes(spot_id in occupied for spot_id in spot_ids)
+        tmp = f'{path}.{os.getpid()}'
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(CHECKPOINT_MAGIC, self.last_id, len(spot_ids)))
+            spot_ids.tofile(f)
+            lot_ids.tofile(f)
+            f.write(status)
+        os.replace(tmp, path)  # a crash mid-write leaves the previous checkpoint intact
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            magic, last_id, n = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != CHECKPOINT_MAGIC:
+                raise ValueError(f'{path} is not an event checkpoint')
+            spot_ids, lot_ids = array.array('q'), array.array('q')
+            spot_ids.fromfile(f, n)
+            lot_ids.fromfile(f, n)
+            status = f.read(n)
+        state = cls(last_id)
+        state.lot_of = dict(zip(spot_ids, lot_ids))
+        state.occupied = {spot_id for spot_id, taken in zip(spot_ids, status) if taken}
+        return state
+
+
+def replay(state=None, chunk_rows=REPLAY_CHUNK, on_chunk=None):
+    """Bring ``state`` (default: empty, before the first event) up to the latest event.
+
+    Streams only the events after ``state.last_id``. ``on_chunk(last_id, applied)``
+    reports progress. Returns the state.
+    """
+    state = state or SpotState()
+    result = db.session.execute(
+        select(_table.c.id, _table.c.kind, _table.c.lot_id, _table.c.spot_id)
+        .where(_table.c.id > state.last_id).order_by(_table.c.id)
+        .execution_options(yield_per=chunk_rows)
+    )
+    applied = 0
+    for rows in result.partitions():
+        applied += state.apply(rows)
+        if on_chunk:
+            on_chunk(state.last_id, applied)
+    return state
+
+
+def diff(state):
+    """Where ``state`` disagrees with the tables: (spots with another status, lots with other counters)."""
+    spots = known = 0
+    for spot_id, status in db.session.execute(
+            select(ParkingSpot.id, ParkingSpot.status).execution_options(yield_per=REPLAY_CHUNK)):
+        replayed = state.status(spot_id)
+        known += replayed is not None
+        if replayed != status:
+            spots += 1
+    spots += len(state.lot_of) - known  # spots the log has but the table doesn't
+    counts = state.lots()
+    lots = []
+    for lot_id, available, occupied in db.session.execute(
+            select(ParkingLot.id, ParkingLot.available_spots, ParkingLot.occupied_spots)):
+        if counts.pop(lot_id, [0, 0]) != [available, occupied]:
+            lots.append(lot_id)
+    lots.extend(counts)  # lots the log still has spots for
+    return spots, lots
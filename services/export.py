@@ -0,0 +1,85 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from models.file1 import db, User, ParkingLot, ParkingSpot
+from services import archive
+from services.billing import duration_and_cost
+
+CHUNK_ROWS = 2000
+COLUMNS = ['reservation_id', 'user', 'username', 'vehicle_number', 'lot', 'spot_id',
+           'parked_at', 'released_at', 'duration', 'cost']
+
+
+def parse_filters(start=None, end=None, lot_id=None):
+    """Turn raw strings (query args / CLI options) into filter values; raises ValueError.
+
+    ``end`` given as a plain date (YYYY-MM-DD) includes that whole day.
+    """
+    start_dt = datetime.fromisoformat(start) if start else None
+    end_dt = None
+    if end:
+        end_dt = datetime.fromisoformat(end)
+        if len(end) == 10:
+            end_dt += timedelta(days=1)
+    return start_dt, end_dt, int(lot_id) if lot_id else None
+
+
+def reservation_rows(start=None, end=None, lot_id=None, chunk_rows=CHUNK_ROWS):
+    """Yield export rows (tuples in COLUMNS order), fetched through a server-side cursor.
+
+    Only ``chunk_rows`` rows are buffered at a time, so memory stays flat
+    however large the table is.
+    """
+    def rows(model):
+        stmt = (select(model.id.label('reservation_id'), User.full_name, User.username, model.vehicle_number,
+                       ParkingLot.prime_location_name, model.spot_id,
+                       model.parking_timestamp, model.leaving_timestamp, ParkingLot.price)
+                .join(User, User.id == model.user_id)
+                .outerjoin(ParkingSpot, ParkingSpot.id == model.spot_id)
+                .outerjoin(ParkingLot, ParkingLot.id == ParkingSpot.lot_id))
+        if start:
+            stmt = stmt.where(model.parking_timestamp >= start)
+        if end:
+            stmt = stmt.where(model.parking_timestamp < end)
+        if lot_id:
+            stmt = stmt.where(ParkingSpot.lot_id == lot_id)
+        return stmt
+
+    # hot and archived reservations in one id-ordered stream
+    stmt = archive.across(rows)
+    stmt = stmt.order_by(stmt.selected_columns.reservation_id)
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=chunk_rows))
+    for partition in result.partitions():
+        for res_id, name, username, vehicle, lot, spot_id, parked, left, price in partition:
+            duration, cost = duration_and_cost(parked, left, price)
+            yield (res_id, name, username, vehicle or '', lot or '', spot_id,
+                   parked.strftime('%Y-%m-%d %H:%M:%S') if parked else '',
+                   left.strftime('%Y-%m-%d %H:%M:%S') if left else '',
+                   duration, '' if cost is None else cost)
+
+
+def iter_csv(rows, chunk_rows=CHUNK_ROWS):
+    """Encode rows as CSV text, one chunk of ``chunk_rows`` rows per yielded string."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def write_xlsx(rows, fileobj):
+    """Write rows to an .xlsx file using openpyxl's write-only (streaming) mode."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Reservations')
+    ws.append(COLUMNS)
+    for row in rows:
+        ws.append(row)
+    wb.save(fileobj)
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+DEFAULT_BYTES = 32 * 1024 * 1024  # per worker; override with FRAGMENT_CACHE_BYTES
+DEFAULT_TTL = 300                  # seconds; override with FRAGMENT_CACHE_TTL
+PRUNE_EVERY = 1000                 # disk tier: sweep expired files every N writes
+
+
+class ByteLRU:
+    """In-process LRU bounded by the total encoded size of its values, with expiry."""
+
+    def __init__(self, max_bytes=DEFAULT_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._data = OrderedDict()  # key -> (expires, size, html)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, html, ttl):
+        size = len(html.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (time.monotonic() + ttl, size, html)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def _pop(self, key):
+        self.bytes -= self._data.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskTier:
+    """Fragments as files in a directory shared by the workers on one host."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._writes = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, hashlib.sha1(key.encode()).hexdigest() + '.html')
+
+    def get(self, key, ttl):
+        name = self._file(key)
+        try:
+            if os.path.getmtime(name) + ttl <= time.time():
+                return None
+            with open(name, encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key, html, ttl):
+        name = self._file(key)
+        tmp = f'{name}.{os.getpid()}.{threading.get_ident()}'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(tmp, name)  # readers never see half a file
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self.prune(ttl)
+
+    def prune(self, ttl):
+        """Delete expired fragments (old lot versions are never read again)."""
+        cutoff = time.time() - ttl
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime <= cutoff:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        self.prune(-1)
+
+
+class RedisTier:
+    """Fragments shared by every worker through Redis, expiring with the TTL."""
+
+    prefix = 'parking:fragment:'
+
+    def __init__(self, url):
+        import redis  # only needed when FRAGMENT_CACHE_URL is a redis:// URL
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key, ttl):
+        raw = self._redis.get(self.prefix + key)
+        return raw.decode() if raw is not None else None
+
+    def set(self, key, html, ttl):
+        self._redis.set(self.prefix + key, html, ex=max(int(ttl), 1))
+
+    def clear(self):
+        for name in self._redis.scan_iter(f'{self.prefix}*'):
+            self._redis.delete(name)
+
+
+def make_tier(url):
+    if not url:
+        return None
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisTier(url)
+    return DiskTier(url[len('file://'):] if url.startswith('file://') else url)
+
+
+class FragmentCache:
+    """Rendered template fragments keyed by the values named in ``{% cache %}``.
+
+    Keys carry the lot's ``version``, which every reservation, release and edit
+    bumps, so a fragment never needs invalidating: a changed lot simply asks for
+    a new key and the old entry ages out of the LRU. Lot ids are never reused
+    (AUTOINCREMENT, migration 0009), so a new lot can't pick up a deleted lot's
+    fragments. A miss in the in-process LRU falls back to the optional second
+    tier (FRAGMENT_CACHE_URL: a directory or a Redis URL) before rendering.
+    """
+
+    def __init__(self):
+        self.local = ByteLRU()
+        self.tier = None
+        self.ttl = DEFAULT_TTL
+        self.enabled = True
+        self.hits = self.tier_hits = self.misses = 0
+
+    def init_app(self, app):
+        app.config.setdefault('FRAGMENT_CACHE_ENABLED', True)
+        app.config.setdefault('FRAGMENT_CACHE_BYTES', DEFAULT_BYTES)
+        app.config.setdefault('FRAGMENT_CACHE_TTL', DEFAULT_TTL)
+        app.config.setdefault('FRAGMENT_CACHE_URL', None)
+        self.enabled = app.config['FRAGMENT_CACHE_ENABLED']
+        self.ttl = app.config['FRAGMENT_CACHE_TTL']
+        self.local = ByteLRU(app.config['FRAGMENT_CACHE_BYTES'])
+        self.tier = make_tier(app.config['FRAGMENT_CACHE_URL'])
+        app.jinja_env.add_extension(FragmentCacheExtension)
+
+    def render(self, key_parts, render):
+        """The cached HTML for ``key_parts``, calling ``render()`` on a miss."""
+        if not self.enabled:
+            return render()
+        key = ':'.join(str(part) for part in key_parts)
+        html = self.local.get(key)
+        if html is not None:
+            self.hits += 1
+            return html
+        if self.tier is not None:
+            html = self.tier.get(key, self.ttl)
+            if html is not None:
+                self.tier_hits += 1
+                self.local.set(key, html, self.ttl)
+                return html
+        self.misses += 1
+        html = str(render())
+        self.local.set(key, html, self.ttl)
+        if self.tier is not None:
+            self.tier.set(key, html, self.ttl)
+        return html
+
+    def clear(self):
+        self.local.clear()
+        if self.tier is not None:
+            self.tier.clear()
+
+    def metrics(self):
+        lookups = self.hits + self.tier_hits + self.misses
+        return {
+            'entries': len(self.local),
+            'bytes': self.local.bytes,
+            'max_bytes': self.local.max_bytes,
+            'hits': self.hits,
+            'tier_hits': self.tier_hits,
+            'misses': self.misses,
+            'evictions': self.local.evictions,
+            'hit_ratio': round((self.hits + self.tier_hits) / lookups, 4) if lookups else None,
+        }
+
+
+fragments = FragmentCache()
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache 'name', lot.id, lot.version %}...{% endcache %}``.
+
+    Every value after the tag is part of the key; include anything else the
+    fragment depends on (e.g. whether the viewer already holds a reservation).
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_cached', [nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _cached(self, key_parts, caller):
+        return Markup(fragments.render(key_parts, caller))
@@ -0,0 +1,197 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app
+from sqlalchemy import select
+from models.file1 import db, ParkingLot
+from services import signals
+
+DEFAULT_SUGGESTIONS = 3  # override with NEARBY_SUGGESTIONS
+DEFAULT_REFRESH = 60     # seconds between background resyncs (0: never); override with NEARBY_REFRESH
+
+
+def _number(pin):
+    return int(pin) if pin.isdigit() else None
+
+
+class NearbyLots:
+    """In-memory proximity index of lots by pin code, with live free-spot counts.
+
+    Lots are kept sorted by pin code, so every pin prefix (same post office,
+    sorting district, region...) is one contiguous slice. A lookup walks outward
+    from the requested pin, numerically nearest first, and only widens to a
+    shorter shared prefix once the longer one is exhausted. It stops after k
+    lots with free spots, without touching the database.
+
+    This worker's reservations and releases adjust the free counts through the
+    signals. Edited, added or deleted lots are reloaded (in one query) on the
+    next lookup. A background thread rebuilds the index every NEARBY_REFRESH
+    seconds to pick up other workers' changes. Suggestions are hints;
+    reserving one still goes through the allocator.
+    """
+
+    def __init__(self, refresh=DEFAULT_REFRESH):
+        self.refresh = refresh
+        self.suggestions = DEFAULT_SUGGESTIONS
+        self._lock = threading.Lock()
+        self._entries = []  # sorted (pin, lot_id)
+        self._numbers = []  # int(pin) per entry, None for non-numeric pins
+        self._lots = {}     # lot_id -> [pin, name, free]
+        self._dirty = set()
+        self._built = False
+        self._thread = None
+
+    def init_app(self, app):
+        app.config.setdefault('NEARBY_REFRESH', DEFAULT_REFRESH)
+        app.config.setdefault('NEARBY_SUGGESTIONS', DEFAULT_SUGGESTIONS)
+        self.refresh = app.config['NEARBY_REFRESH']
+        self.suggestions = app.config['NEARBY_SUGGESTIONS']
+
+    # --- building / refreshing ---
+    def _rows(self, lot_ids=None):
+        stmt = select(ParkingLot.id, ParkingLot.pin_code, ParkingLot.prime_location_name,
+                      ParkingLot.available_spots)
+        if lot_ids is not None:
+            stmt = stmt.where(ParkingLot.id.in_(lot_ids))
+        return db.session.execute(stmt).all()
+
+    def rebuild(self):
+        rows = self._rows()
+        entries = sorted(((pin or '').strip(), lot_id) for lot_id, pin, _, _ in rows)
+        with self._lock:
+            self._entries = entries
+            self._numbers = [_number(pin) for pin, _ in entries]
+            self._lots = {lot_id: [(pin or '').strip(), name, free] for lot_id, pin, name, free in rows}
+            self._dirty.clear()
+            self._built = True
+
+    def _refresh(self):
+        if not self._built:
+            # first lookup in this worker, or after a bulk change
+            self.rebuild()
+            self._start_resync()
+            return
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        rows = {row[0]: row for row in self._rows(dirty)}
+        with self._lock:
+            for lot_id in dirty:
+                self._remove(lot_id)
+                if lot_id in rows:
+                    _, pin, name, free = rows[lot_id]
+                    self._insert(lot_id, (pin or '').strip(), name, free)
+
+    def _start_resync(self):
+        if self._thread is None and self.refresh:
+            app = current_app._get_current_object()
+            self._thread = threading.Thread(target=self._resync_forever, args=(app,),
+                                            name='nearby-resync', daemon=True)
+            self._thread.start()
+
+    def _resync_forever(self, app):
+        while True:
+            time.sleep(self.refresh)
+            with app.app_context():
+                try:
+                    self.rebuild()
+                except Exception:
+                    app.logger.exception('nearby lots: resync failed')
+                finally:
+                    db.session.remove()
+
+    def _remove(self, lot_id):
+        lot = self._lots.pop(lot_id, None)
+        if lot is not None:
+            i = bisect_left(self._entries, (lot[0], lot_id))
+            del self._entries[i]
+            del self._numbers[i]
+
+    def _insert(self, lot_id, pin, name, free):
+        self._lots[lot_id] = [pin, name, free]
+        i = bisect_left(self._entries, (pin, lot_id))
+        self._entries.insert(i, (pin, lot_id))
+        self._numbers.insert(i, _number(pin))
+
+    # --- signals ---
+    def adjust(self, lot_id, delta):
+        with self._lock:
+            lot = self._lots.get(lot_id)
+            if lot is not None:
+                lot[2] = max(lot[2] + delta, 0)
+
+    def mark_dirty(self, lot_id=None):
+        with self._lock:
+            if lot_id is None:
+                self._built = False
+            else:
+                self._dirty.add(lot_id)
+
+    # --- lookups ---
+    def nearest(self, pin, k=None, exclude=()):
+        """Up to k lots with free spots nearest to ``pin``: [(lot_id, name, pin, free)]."""
+        self._refresh()
+        k = k or self.suggestions
+        pin = (pin or '').strip()
+        target = _number(pin)
+        found = []
+        with self._lock:
+            entries, numbers, lots = self._entries, self._numbers, self._lots
+
+            def distance(i):
+                n = numbers[i]
+                return abs(n - target) if n is not None and target is not None else 0
+
+            right = bisect_left(entries, (pin,))
+            left = right - 1
+            for length in range(len(pin), -1, -1):
+                prefix = pin[:length]
+                lo = bisect_left(entries, (prefix,))
+                hi = bisect_left(entries, (prefix + '\uffff',))
+                while len(found) < k and (left >= lo or right < hi):
+                    if left >= lo and (right >= hi or distance(left) <= distance(right)):
+                        i, left = left, left - 1
+                    else:
+                        i, right = right, right + 1
+                    lot_id = entries[i][1]
+                    lot_pin, name, free = lots[lot_id]
+                    if free > 0 and lot_id not in exclude:
+                        found.append((lot_id, name, lot_pin, free))
+                if len(found) >= k:
+                    break
+        return found
+
+    def alternatives(self, lot_id, k=None):
+        """Nearest lots with free spots to ``lot_id`` (itself excluded)."""
+        self._refresh()
+        with self._lock:
+            lot = self._lots.get(lot_id)
+        if lot is None:
+            return []
+        return self.nearest(lot[0], k, exclude={lot_id})
+
+
+nearby = NearbyLots()
+
+
+def _on_reserved(lot_id, **kwargs):
+    nearby.adjust(lot_id, -1)
+
+
+def _on_released(lot_id, **kwargs):
+    nearby.adjust(lot_id, 1)
+
+
+def _on_removed(lot_id, **kwargs):
+    nearby.adjust(lot_id, -1)  # only free spots can be deleted
+
+
+def _on_lot_changed(lot_id, **kwargs):
+    nearby.mark_dirty(lot_id)
+
+
+signals.spot_reserved.connect(_on_reserved)
+signals.spot_released.connect(_on_released)
+signals.spot_removed.connect(_on_removed)
+signals.lot_changed.connect(_on_lot_changed)
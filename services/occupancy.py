@@ -0,0 +1,147 @@
+import threading
+from array import array
+from collections import OrderedDict
+from sqlalchemy import select
+from models.file1 import db, ParkingSpot
+from services import signals
+
+FREE, TAKEN = 0, 1
+MAX_LOTS = 512  # maps kept per worker; a 10k-spot lot costs ~90 KB
+
+
+class OccupancyMap:
+    """A lot's spot statuses as two parallel flat arrays.
+
+    ``ids`` holds the spot ids in ascending order and ``taken`` one byte per
+    spot (1 = occupied), so free counts and first-free lookups run in C over a
+    bytearray instead of over ParkingSpot objects.
+    """
+
+    __slots__ = ('version', 'ids', 'taken')
+
+    def __init__(self, version, ids, taken):
+        self.version = version
+        self.ids = ids
+        self.taken = taken
+
+    @classmethod
+    def from_rows(cls, version, rows):
+        """Build from (spot_id, status) rows ordered by spot id."""
+        ids = array('q')
+        taken = bytearray()
+        for spot_id, status in rows:
+            ids.append(spot_id)
+            taken.append(FREE if status == 'A' else TAKEN)
+        return cls(version, ids, taken)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def occupied_count(self):
+        return self.taken.count(TAKEN)
+
+    @property
+    def free_count(self):
+        return len(self.taken) - self.occupied_count
+
+    def first_free(self):
+        """Lowest free spot id, or None if the lot is full."""
+        index = self.taken.find(FREE)
+        return self.ids[index] if index >= 0 else None
+
+    def grid(self):
+        """(spot_id, 'A' | 'O') pairs in spot order, for templates."""
+        return zip(self.ids, ('O' if t else 'A' for t in self.taken))
+
+    def matches(self, lot):
+        """True if this map still describes ``lot`` as just read from the database.
+
+        A new lot never gets a deleted lot's id (AUTOINCREMENT, migration 0009),
+        so a map cached for a deleted lot is never taken for a new one that
+        starts at the same version and counts.
+        """
+        return (self.version == lot.version
+                and len(self.ids) == lot.available_spots + lot.occupied_spots
+                and self.occupied_count == lot.occupied_spots)
+
+
+class LotOccupancy:
+    """Per-worker cache of OccupancyMap by lot id, validated against the lot's version.
+
+    Every change to a lot's spots bumps ``parking_lots.version`` in the same
+    transaction, so a map is reused for as long as the lot row the caller just
+    loaded carries the same version (and counts). Otherwise it is rebuilt from a
+    single (id, status) column query; no ParkingSpot objects are created.
+    """
+
+    def __init__(self, max_lots=MAX_LOTS):
+        self.max_lots = max_lots
+        self._maps = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, lot):
+        return self.get_many([lot])[lot.id]
+
+    def get_many(self, lots):
+        """{lot.id: OccupancyMap} for the given ParkingLot rows; stale maps reload in one query."""
+        result, stale = {}, {}
+        with self._lock:
+            for lot in lots:
+                occupancy = self._maps.get(lot.id)
+                if occupancy is not None and occupancy.matches(lot):
+                    self._maps.move_to_end(lot.id)
+                    result[lot.id] = occupancy
+                    self.hits += 1
+                else:
+                    stale[lot.id] = lot
+                    self.misses += 1
+        if stale:
+            result.update(self._load(stale))
+        return result
+
+    def _load(self, lots):
+        rows = db.session.execute(
+            select(ParkingSpot.lot_id, ParkingSpot.id, ParkingSpot.status)
+            .where(ParkingSpot.lot_id.in_(list(lots)))
+            .order_by(ParkingSpot.lot_id, ParkingSpot.id)
+        )
+        grouped = {lot_id: [] for lot_id in lots}
+        for lot_id, spot_id, status in rows:
+            grouped[lot_id].append((spot_id, status))
+        loaded = {lot_id: OccupancyMap.from_rows(lots[lot_id].version, spot_rows)
+                  for lot_id, spot_rows in grouped.items()}
+        with self._lock:
+            for lot_id, occupancy in loaded.items():
+                self._maps[lot_id] = occupancy
+                self._maps.move_to_end(lot_id)
+            while len(self._maps) > self.max_lots:
+                self._maps.popitem(last=False)
+        return loaded
+
+    def forget(self, lot_id=None):
+        with self._lock:
+            if lot_id is None:
+                self._maps.clear()
+            else:
+                self._maps.pop(lot_id, None)
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {'lots': len(self._maps), 'hits': self.hits, 'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None}
+
+
+occupancy = LotOccupancy()
+
+
+def _on_lot_event(lot_id, **kwargs):
+    # the version check alone would catch these; dropping the map just frees it sooner
+    occupancy.forget(lot_id)
+
+
+signals.spot_reserved.connect(_on_lot_event)
+signals.spot_released.connect(_on_lot_event)
+signals.spot_removed.connect(_on_lot_event)
+signals.lot_changed.connect(_on_lot_event)
@@ -0,0 +1,95 @@
+import heapq
+from datetime import datetime
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import and_, or_
+
+PER_PAGE = 50
+STREAM_CHUNK_ROWS = 500
+STREAM_BUFFER = 64  # template chunks per write when streaming
+
+
+def encode_cursor(res):
+    return f"{res.parking_timestamp.isoformat()}_{res.id}"
+
+
+def decode_cursor(value):
+    """Parse a "<parking_timestamp>_<id>" cursor; bad or missing cursors mean "first page"."""
+    if not value:
+        return None
+    try:
+        ts, res_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(ts), int(res_id)
+    except ValueError:
+        return None
+
+
+def _model(query):
+    return query.column_descriptions[0]['entity']
+
+
+def newest_first(query):
+    model = _model(query)
+    return query.order_by(model.parking_timestamp.desc(), model.id.desc())
+
+
+def older_than(query, ts, res_id):
+    model = _model(query)
+    return query.filter(or_(
+        model.parking_timestamp < ts,
+        and_(model.parking_timestamp == ts, model.id < res_id)
+    ))
+
+
+def _newest_key(res):
+    # DESC puts NULL timestamps last, as the databases do
+    return (res.parking_timestamp is not None, res.parking_timestamp or datetime.min, res.id)
+
+
+def _merged(iterables):
+    """Merge newest-first row streams into one; a row seen in both tables (mid-archival) once."""
+    if len(iterables) == 1:
+        yield from iterables[0]
+        return
+    last_id = None
+    for res in heapq.merge(*iterables, key=_newest_key, reverse=True):
+        if res.id != last_id:
+            yield res
+        last_id = res.id
+
+
+def _queries(query):
+    return list(query) if isinstance(query, (list, tuple)) else [query]
+
+
+def keyset_page(query, cursor, per_page=PER_PAGE):
+    """One page of reservations, newest first, strictly older than the cursor.
+
+    Keyset (seek) pagination on (parking_timestamp, id): every page is an index
+    range scan of per_page + 1 rows, no matter how deep into the history it is.
+    ``query`` may also be a list of queries (hot and archived reservations):
+    each contributes per_page + 1 rows and the pages are merged.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    position = decode_cursor(cursor)
+    pages = []
+    for q in _queries(query):
+        if position:
+            q = older_than(q, *position)
+        pages.append(newest_first(q).limit(per_page + 1).all())
+    rows = list(_merged(pages))
+    next_cursor = encode_cursor(rows[per_page - 1]) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
+
+
+def stream_all(query):
+    """All reservations, newest first, fetched from the DB in chunks while rendering."""
+    return _merged([newest_first(q).yield_per(STREAM_CHUNK_ROWS) for q in _queries(query)])
+
+
+def stream_template(template_name, **context):
+    """Render a template as a streamed response (Jinja generate + stream_with_context)."""
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER)
+    return Response(stream_with_context(stream))
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt'   # werkzeug's default; override with PASSWORD_HASH_METHOD
+DEFAULT_WORKERS = 2         # concurrent hashes per app process; 0 hashes inline
+DEFAULT_QUEUE = 2           # hashes allowed to wait for a worker before new ones get a 503
+DEFAULT_TIMEOUT = 5         # seconds a request waits for its hash
+MAX_FAILURES = 5            # failed logins per username ...
+FAILURE_WINDOW = 300        # ... within this many seconds before the username is throttled
+TRACKED_USERNAMES = 10000
+
+
+class Busy(Exception):
+    """The hashing pool is full; ask the client to come back in ``retry_after`` seconds."""
+
+    def __init__(self, retry_after=1):
+        super().__init__('Too many sign-ins right now, please try again in a moment.')
+        self.retry_after = retry_after
+
+
+class Throttled(Exception):
+    """Too many failed logins for one username; no hash is computed until the window ends."""
+
+    def __init__(self, retry_after):
+        super().__init__('Too many failed attempts. Please try again later.')
+        self.retry_after = retry_after
+
+
+class FailureThrottle:
+    """Per-username count of failed logins within a fixed window (per worker, LRU-bounded)."""
+
+    def __init__(self, max_failures=MAX_FAILURES, window=FAILURE_WINDOW, maxsize=TRACKED_USERNAMES):
+        self.max_failures = max_failures
+        self.window = window
+        self.maxsize = maxsize
+        self._failures = OrderedDict()  # username -> [count, window_start]
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def check(self, username):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._failures.get(username)
+            if entry is None:
+                return
+            if now - entry[1] >= self.window:
+                del self._failures[username]
+            elif entry[0] >= self.max_failures:
+                self.throttled += 1
+                raise Throttled(int(self.window - (now - entry[1])) + 1)
+
+    def failed(self, username):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._failures.get(username)
+            if entry is None or now - entry[1] >= self.window:
+                entry = self._failures[username] = [0, now]
+            entry[0] += 1
+            self._failures.move_to_end(username)
+            while len(self._failures) > self.maxsize:
+                self._failures.popitem(last=False)
+
+    def succeeded(self, username):
+        with self._lock:
+            self._failures.pop(username, None)
+
+
+class PasswordHasher:
+    """Password hashing on a small bounded pool, so a login storm can't take every worker.
+
+    At most PASSWORD_POOL_WORKERS hashes run at once and PASSWORD_POOL_QUEUE more
+    may wait; beyond that a request fails fast with Busy (503 + Retry-After)
+    instead of queueing. A waiting login still holds its request thread, so keep
+    workers + queue below the server's threads per process: whatever the login
+    rate, the rest stay free for reservations. The pool is a thread pool by
+    default (hashlib's scrypt and PBKDF2 release the GIL) or, with
+    PASSWORD_POOL=process, a process pool.
+    """
+
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.workers = DEFAULT_WORKERS
+        self.timeout = DEFAULT_TIMEOUT
+        self.kind = 'thread'
+        self.throttle = FailureThrottle()
+        self._slots = threading.BoundedSemaphore(DEFAULT_WORKERS + DEFAULT_QUEUE)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._prefix = None
+        self.hashed = self.rejected = self.rehashed = 0
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        app.config.setdefault('PASSWORD_POOL', 'thread')
+        app.config.setdefault('PASSWORD_POOL_WORKERS', DEFAULT_WORKERS)
+        app.config.setdefault('PASSWORD_POOL_QUEUE', DEFAULT_QUEUE)
+        app.config.setdefault('PASSWORD_POOL_TIMEOUT', DEFAULT_TIMEOUT)
+        app.config.setdefault('PASSWORD_MAX_FAILURES', MAX_FAILURES)
+        app.config.setdefault('PASSWORD_FAILURE_WINDOW', FAILURE_WINDOW)
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.kind = app.config['PASSWORD_POOL']
+        self.workers = app.config['PASSWORD_POOL_WORKERS']
+        self.timeout = app.config['PASSWORD_POOL_TIMEOUT']
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1) + app.config['PASSWORD_POOL_QUEUE'])
+        self.throttle = FailureThrottle(app.config['PASSWORD_MAX_FAILURES'], app.config['PASSWORD_FAILURE_WINDOW'])
+        self._prefix = None
+        self.shutdown()
+
+    def _pool(self):
+        # created on first use, i.e. inside the serving (forked) worker
+        with self._lock:
+            if self._executor is None:
+                if self.kind == 'process':
+                    self._executor = ProcessPoolExecutor(self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _run(self, fn, *args):
+        self.hashed += 1
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise Busy()
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # the slot is held until the hash really finishes, even if the request gives up
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            self.rejected += 1
+            raise Busy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if ``pwhash`` wasn't made with the configured method and parameters."""
+        if self._prefix is None:
+            # e.g. 'scrypt' -> 'scrypt:32768:8:1', as werkzeug writes it into the hash
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def metrics(self):
+        return {'method': self.method, 'pool': self.kind, 'workers': self.workers,
+                'hashed': self.hashed, 'rejected': self.rejected, 'rehashed': self.rehashed,
+                'throttled': self.throttle.throttled}
+
+
+passwords = PasswordHasher()
@@ -0,0 +1,167 @@
+import heapq
+import threading
+import time
+from flask import g, has_request_context, request, request_finished, request_started
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+from models.file1 import db
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+SLOWEST_KEPT = 20
+STATEMENT_CHARS = 300
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+class EndpointStats:
+    __slots__ = ('count', 'buckets', 'seconds', 'max_seconds', 'queries', 'db_seconds', 'template_seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * len(BUCKETS)
+        self.seconds = self.max_seconds = self.db_seconds = self.template_seconds = 0.0
+        self.queries = 0
+
+
+class RequestProfiler:
+    """Per-endpoint latency histograms, query counts and DB vs. template time.
+
+    Enabled with PROFILING_ENABLED; when off, init_app connects nothing, so
+    requests and queries pay no cost at all.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._slowest = []  # min-heap of (seconds, seq, endpoint, statement)
+        self._seq = 0
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILING_ENABLED', False)
+        if not app.config['PROFILING_ENABLED']:
+            return
+        self.enabled = True
+        request_started.connect(self._request_started, app)
+        request_finished.connect(self._request_finished, app)
+        before_render_template.connect(self._template_started, app)
+        template_rendered.connect(self._template_finished, app)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # --- request / template signals ---
+    def _request_started(self, sender, **extra):
+        g._prof = {'start': time.perf_counter(), 'queries': 0, 'db': 0.0, 'template': 0.0}
+
+    def _template_started(self, sender, **extra):
+        if '_prof' in g:
+            g._prof['template_start'] = time.perf_counter()
+
+    def _template_finished(self, sender, **extra):
+        prof = g.get('_prof')
+        if prof and 'template_start' in prof:
+            prof['template'] += time.perf_counter() - prof.pop('template_start')
+
+    def _request_finished(self, sender, response, **extra):
+        prof = g.pop('_prof', None)
+        if prof is None:
+            return
+        elapsed = time.perf_counter() - prof['start']
+        endpoint = request.endpoint or '<unmatched>'
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.count += 1
+            stats.seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            stats.queries += prof['queries']
+            stats.db_seconds += prof['db']
+            stats.template_seconds += prof['template']
+            for i, bound in enumerate(BUCKETS):
+                if elapsed <= bound:
+                    stats.buckets[i] += 1
+                    break
+
+    # --- SQLAlchemy cursor events ---
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_prof_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['_prof_start'].pop()
+        endpoint = None
+        if has_request_context() and '_prof' in g:
+            g._prof['queries'] += 1
+            g._prof['db'] += elapsed
+            endpoint = request.endpoint
+        with self._lock:
+            if len(self._slowest) < SLOWEST_KEPT or elapsed > self._slowest[0][0]:
+                self._seq += 1
+                entry = (elapsed, self._seq, endpoint or '-', statement[:STATEMENT_CHARS])
+                if len(self._slowest) < SLOWEST_KEPT:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heapreplace(self._slowest, entry)
+
+    # --- reporting ---
+    def snapshot(self):
+        """Plain-data copy of the current numbers, slowest endpoints first."""
+        with self._lock:
+            endpoints = [
+                {
+                    'endpoint': name,
+                    'count': s.count,
+                    'avg_ms': s.seconds / s.count * 1000,
+                    'max_ms': s.max_seconds * 1000,
+                    'avg_queries': s.queries / s.count,
+                    'avg_db_ms': s.db_seconds / s.count * 1000,
+                    'avg_template_ms': s.template_seconds / s.count * 1000,
+                    'buckets': list(s.buckets),
+                    'seconds': s.seconds,
+                    'queries': s.queries,
+                    'db_seconds': s.db_seconds,
+                    'template_seconds': s.template_seconds,
+                }
+                for name, s in self._endpoints.items()
+            ]
+            slowest = [{'ms': sec * 1000, 'endpoint': ep, 'statement': stmt}
+                       for sec, _, ep, stmt in sorted(self._slowest, reverse=True)]
+        endpoints.sort(key=lambda e: e['avg_ms'], reverse=True)
+        return {'enabled': self.enabled, 'endpoints': endpoints, 'slowest_statements': slowest}
+
+    def prometheus(self, extra_counters=None):
+        """Prometheus text exposition (format 0.0.4)."""
+        snap = self.snapshot()
+        out = [
+            '# HELP parking_request_duration_seconds Request latency by endpoint.',
+            '# TYPE parking_request_duration_seconds histogram',
+        ]
+        for e in snap['endpoints']:
+            label = _label(e['endpoint'])
+            cumulative = 0
+            for bound, n in zip(BUCKETS, e['buckets']):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                out.append(f'parking_request_duration_seconds_bucket{{endpoint="{label}",le="{le}"}} {cumulative}')
+            out.append(f'parking_request_duration_seconds_sum{{endpoint="{label}"}} {e["seconds"]}')
+            out.append(f'parking_request_duration_seconds_count{{endpoint="{label}"}} {e["count"]}')
+        for metric, key, help_text in (
+            ('parking_request_queries_total', 'queries', 'SQL statements issued by endpoint.'),
+            ('parking_request_db_seconds_total', 'db_seconds', 'Time spent in SQL by endpoint.'),
+            ('parking_request_template_seconds_total', 'template_seconds', 'Time spent rendering templates by endpoint.'),
+        ):
+            out.append(f'# HELP {metric} {help_text}')
+            out.append(f'# TYPE {metric} counter')
+            for e in snap['endpoints']:
+                out.append(f'{metric}{{endpoint="{_label(e["endpoint"])}"}} {e[key]}')
+        for metric, value in (extra_counters or {}).items():
+            out.append(f'# TYPE {metric} {"counter" if metric.endswith("_total") else "gauge"}')
+            out.append(f'{metric} {value}')
+        return '\n'.join(out) + '\n'
+
+
+profiler = RequestProfiler()
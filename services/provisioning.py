@@ -0,0 +1,114 @@
+import csv
+import io
+from sqlalchemy import delete, insert, select
+from models.file1 import db, ParkingLot, ParkingSpot
+from services import events
+
+INSERT_CHUNK = 10000
+LOT_CSV_FIELDS = ['name', 'address', 'pincode', 'price', 'max_spots']
+
+
+def add_spots(lot_id, count):
+    """Create ``count`` free spots for a lot with one multi-row INSERT per chunk (and log them)."""
+    for start in range(0, count, INSERT_CHUNK):
+        n = min(INSERT_CHUNK, count - start)
+        spot_ids = db.session.execute(
+            insert(ParkingSpot.__table__).returning(ParkingSpot.__table__.c.id),
+            [{'lot_id': lot_id, 'status': 'A'}] * n
+        ).scalars().all()
+        events.record(events.SPOT_CREATED, [(lot_id, spot_id, None) for spot_id in spot_ids])
+
+
+def remove_free_spots(lot_id, count):
+    """Delete up to ``count`` free spots (newest first) in one statement; returns how many went.
+
+    The status check is part of the DELETE, so a spot claimed concurrently is never removed.
+    """
+    if count <= 0:
+        return 0
+    newest_free = (select(ParkingSpot.id)
+                   .where(ParkingSpot.lot_id == lot_id, ParkingSpot.status == 'A')
+                   .order_by(ParkingSpot.id.desc())
+                   .limit(count))
+    spot_ids = db.session.execute(
+        delete(ParkingSpot)
+        .where(ParkingSpot.id.in_(newest_free), ParkingSpot.status == 'A')
+        .returning(ParkingSpot.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    events.record(events.SPOT_DELETED, [(lot_id, spot_id, None) for spot_id in spot_ids])
+    return len(spot_ids)
+
+
+def remove_free_spot(spot_id):
+    """Delete one spot if it is still free; returns its lot id, or None if it is occupied (or gone).
+
+    As in remove_free_spots, the status check is part of the DELETE.
+    """
+    lot_id = db.session.execute(
+        delete(ParkingSpot)
+        .where(ParkingSpot.id == spot_id, ParkingSpot.status == 'A')
+        .returning(ParkingSpot.lot_id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if lot_id is not None:
+        events.record(events.SPOT_DELETED, [(lot_id, spot_id, None)])
+    return lot_id
+
+
+def read_lots_csv(text):
+    """Parse lot rows from CSV text with a name,address,pincode,price,max_spots header.
+
+    Raises ValueError naming the first bad line; nothing is imported in that case.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [f for f in LOT_CSV_FIELDS if f not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+    lots = []
+    for line_no, row in enumerate(reader, 2):
+        try:
+            lot = {
+                'prime_location_name': row['name'].strip(),
+                'address': row['address'].strip(),
+                'pin_code': row['pincode'].strip(),
+                'price': float(row['price']),
+                'maximum_number_of_spots': int(row['max_spots']),
+            }
+        except (TypeError, ValueError):
+            raise ValueError(f"line {line_no}: bad price or max_spots")
+        if not (lot['prime_location_name'] and lot['address'] and lot['pin_code']):
+            raise ValueError(f"line {line_no}: name, address and pincode are required")
+        if lot['maximum_number_of_spots'] < 1 or lot['price'] < 0:
+            raise ValueError(f"line {line_no}: max_spots must be >= 1 and price >= 0")
+        lots.append(lot)
+    return lots
+
+
+def import_lots(lots):
+    """Insert lots and all their spots with bulk statements; the caller commits.
+
+    Returns the new lot ids in input order.
+    """
+    if not lots:
+        return []
+    rows = [dict(lot, available_spots=lot['maximum_number_of_spots'], occupied_spots=0) for lot in lots]
+    lot_ids = db.session.execute(
+        insert(ParkingLot.__table__).returning(ParkingLot.__table__.c.id, sort_by_parameter_order=True),
+        rows
+    ).scalars().all()
+    spots = []
+    for lot_id, lot in zip(lot_ids, lots):
+        spots.extend([{'lot_id': lot_id, 'status': 'A'}] * lot['maximum_number_of_spots'])
+        if len(spots) >= INSERT_CHUNK:
+            _insert_spots(spots)
+            spots = []
+    if spots:
+        _insert_spots(spots)
+    return lot_ids
+
+
+def _insert_spots(spots):
+    table = ParkingSpot.__table__
+    created = db.session.execute(insert(table).returning(table.c.lot_id, table.c.id), spots).all()
+    events.record(events.SPOT_CREATED, [(lot_id, spot_id, None) for lot_id, spot_id in created])
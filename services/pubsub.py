@@ -0,0 +1,185 @@
+import itertools
+import json
+import os
+import queue
+import threading
+from collections import deque
+from services import signals
+
+SUBSCRIBER_QUEUE = 256   # events buffered per viewer before it is cut off as too slow
+REPLAY_EVENTS = 1024     # recent events kept for clients reconnecting with Last-Event-ID
+HEARTBEAT_SECONDS = 15
+MAX_SUBSCRIBERS = 16     # open streams per worker; each holds a request thread, so keep below --threads
+RETRY_AFTER = 30         # seconds a refused viewer is asked to wait
+CHANNEL = 'parking:occupancy'
+
+
+class Full(Exception):
+    """This worker already serves PUBSUB_MAX_SUBSCRIBERS streams; come back in ``retry_after`` seconds."""
+
+    def __init__(self, retry_after=RETRY_AFTER):
+        super().__init__('Too many live viewers right now, please try again later.')
+        self.retry_after = retry_after
+
+
+class Subscription:
+    """One viewer's queue of encoded SSE frames."""
+
+    def __init__(self, hub, maxsize):
+        self.hub = hub
+        self.queue = queue.Queue(maxsize)
+
+    def frames(self, heartbeat=HEARTBEAT_SECONDS):
+        """Yield SSE frames until the viewer disconnects (or falls too far behind)."""
+        try:
+            yield ': connected\n\n'  # sends the headers now rather than with the first event
+            while True:
+                try:
+                    frame = self.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if frame is None:
+                    # dropped for being too slow: ask the page to reload rather than show stale spots
+                    yield 'event: resync\ndata: {}\n\n'
+                    return
+                yield frame
+        finally:
+            self.hub.unsubscribe(self)
+
+
+class Hub:
+    """In-process fan-out of occupancy events to SSE subscribers.
+
+    Each event is encoded once and the same frame is put on every subscriber's
+    queue, so N viewers cost N queue puts rather than N page renders. With a
+    broker (PUBSUB_BROKER_URL) events go through Redis pub/sub and every worker
+    fans out what it receives, so viewers see changes made in any worker.
+
+    Every open stream holds one of the worker's request threads for as long as
+    the page stays open, so at most PUBSUB_MAX_SUBSCRIBERS streams are served
+    per worker; beyond that subscribe() raises Full (503 + Retry-After) and the
+    remaining threads stay free for logins, reservations and the rest.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # Event ids are "<token>-<n>", n counting per worker; a Last-Event-ID from another
+        # worker (or before a restart) can't be replayed, so that client resyncs instead
+        self._token = f'{os.getpid():x}{id(self) & 0xffff:x}'
+        self._recent = deque(maxlen=REPLAY_EVENTS)  # (id, frame)
+        self.broker = None
+        self.max_subscribers = MAX_SUBSCRIBERS
+        self.published = self.delivered = self.dropped = self.refused = 0
+
+    def init_app(self, app):
+        app.config.setdefault('PUBSUB_BROKER_URL', None)
+        app.config.setdefault('PUBSUB_MAX_SUBSCRIBERS', MAX_SUBSCRIBERS)
+        self.max_subscribers = app.config['PUBSUB_MAX_SUBSCRIBERS']
+        if app.config['PUBSUB_BROKER_URL'] and self.broker is None:
+            self.broker = RedisBroker(app.config['PUBSUB_BROKER_URL'], self._fan_out)
+
+    def subscribe(self, last_event_id=None, maxsize=SUBSCRIBER_QUEUE):
+        sub = Subscription(self, maxsize)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                self.refused += 1
+                raise Full()
+            self._subscribers.add(sub)
+            if last_event_id:
+                for frame in self._missed(last_event_id)[:maxsize]:
+                    sub.queue.put_nowait(frame)
+        return sub
+
+    def _missed(self, last_event_id):
+        token, _, n = last_event_id.partition('-')
+        if token != self._token or not n.isdigit():
+            return [None]
+        n = int(n)
+        if self._recent and self._recent[0][0] > n + 1:
+            return [None]  # the gap is older than the replay buffer
+        return [frame for event_id, frame in self._recent if event_id > n]
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event_type, data):
+        payload = json.dumps({'type': event_type, **data}, separators=(',', ':'))
+        self.published += 1
+        if self.broker is not None:
+            self.broker.publish(payload)
+        else:
+            self._fan_out(payload)
+
+    def _fan_out(self, payload):
+        with self._lock:
+            event_id = next(self._ids)
+            frame = f'id: {self._token}-{event_id}\ndata: {payload}\n\n'
+            self._recent.append((event_id, frame))
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.queue.put_nowait(frame)
+                self.delivered += 1
+            except queue.Full:
+                self._drop(sub)
+
+    def _drop(self, sub):
+        self.dropped += 1
+        self.unsubscribe(sub)
+        with sub.queue.mutex:
+            sub.queue.queue.clear()
+        sub.queue.put_nowait(None)
+
+    def metrics(self):
+        return {'subscribers': self.subscriber_count, 'max_subscribers': self.max_subscribers,
+                'published': self.published, 'delivered': self.delivered, 'dropped': self.dropped,
+                'refused': self.refused, 'broker': self.broker is not None}
+
+
+class RedisBroker:
+    """Relays events between workers through one Redis channel."""
+
+    def __init__(self, url, deliver):
+        import redis  # only needed when PUBSUB_BROKER_URL is set
+        self._redis = redis.Redis.from_url(url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{CHANNEL: lambda message: deliver(message['data'].decode())})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, payload):
+        self._redis.publish(CHANNEL, payload)
+
+
+hub = Hub()
+
+
+# Spot status deltas; clients adjust the lot's counts by one per event
+def _on_reserved(lot_id, spot_id=None, **kwargs):
+    hub.publish('spot', {'lot_id': lot_id, 'spot_id': spot_id, 'status': 'O'})
+
+
+def _on_released(lot_id, spot_id=None, **kwargs):
+    hub.publish('spot', {'lot_id': lot_id, 'spot_id': spot_id, 'status': 'A'})
+
+
+def _on_removed(lot_id, spot_id=None, **kwargs):
+    hub.publish('spot', {'lot_id': lot_id, 'spot_id': spot_id, 'status': 'deleted'})
+
+
+def _on_lot_changed(lot_id, **kwargs):
+    # bulk changes (lot edits, imports): viewers reload that lot (or everything when None)
+    hub.publish('lot', {'lot_id': lot_id})
+
+
+signals.spot_reserved.connect(_on_reserved)
+signals.spot_released.connect(_on_released)
+signals.spot_removed.connect(_on_removed)
+signals.lot_changed.connect(_on_lot_changed)
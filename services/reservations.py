@@ -0,0 +1,255 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import case, func, insert, select, update
+from models.file1 import db, ParkingLot, ParkingSpot, Reservation
+from services import billing, events, rollups, signals
+from services.allocation import allocator, Contended
+
+
+class ReservationError(Exception):
+    """A reserve/release request that can't be honoured; the message is meant for the user."""
+
+
+class LotFullError(ReservationError):
+    """The lot has no free spot left."""
+
+    def __init__(self, message, lot_id):
+        super().__init__(message)
+        self.lot_id = lot_id
+
+
+class LotBusyError(ReservationError):
+    """The lot has free spots, but other reservations kept taking them first; retrying may succeed."""
+
+    def __init__(self, message, lot_id, retry_after=1):
+        super().__init__(message)
+        self.lot_id = lot_id
+        self.retry_after = retry_after
+
+
+def active_reservation(user_id):
+    return Reservation.query.filter_by(user_id=user_id, leaving_timestamp=None).first()
+
+
+def reserve(user_id, lot_id, vehicle_number):
+    """Claim a free spot in the lot for the user and commit; returns the Reservation."""
+    # Don't allow multiple active reservations
+    if active_reservation(user_id):
+        raise ReservationError('You already have an active reservation.')
+    vehicle_number = (vehicle_number or '').strip()
+    if len(vehicle_number) < 6:
+        raise ReservationError('Vehicle number is required and must be at least 6 characters.')
+
+    # Atomically claim a free spot in this lot (conditional UPDATE, no double booking)
+    try:
+        spot_id = allocator.claim(lot_id)
+    except Contended:
+        db.session.rollback()
+        raise LotBusyError('This lot is busy right now, please try again in a moment.', lot_id)
+    if spot_id is None:
+        db.session.rollback()
+        raise LotFullError('No available spots in this lot.', lot_id)
+
+    spot = db.session.get(ParkingSpot, spot_id)
+    spot.lot.shift_counts(available=-1, occupied=1)
+    reservation = Reservation(
+        spot_id=spot.id,
+        user_id=user_id,
+        parking_timestamp=datetime.utcnow(),
+        vehicle_number=vehicle_number
+    )
+    db.session.add(reservation)
+    db.session.flush()  # assigns reservation.id, which the RESERVED event records
+    rollups.record_reserved(spot.lot_id, reservation.parking_timestamp)
+    events.record(events.RESERVED, [(spot.lot_id, spot.id, reservation.id)], at=reservation.parking_timestamp)
+    db.session.commit()
+    signals.spot_reserved.send(spot.lot_id, spot_id=spot.id, reservation_id=reservation.id)
+    return reservation
+
+
+def release(res, now=None):
+    """Close an active reservation, free its spot and commit; returns the cost charged."""
+    if res.leaving_timestamp is not None:
+        raise ReservationError('This reservation is already closed.')
+    now = now or datetime.utcnow()
+    total_cost = billing.cost_so_far(res, now)
+    # Close it only if still open (conditional UPDATE, like the allocator's claim): of two
+    # concurrent releases exactly one matches, and only that one frees the spot
+    closed = db.session.execute(
+        update(Reservation)
+        .where(Reservation.id == res.id, Reservation.leaving_timestamp.is_(None))
+        .values(leaving_timestamp=now, parking_cost=total_cost)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not closed:
+        db.session.rollback()
+        raise ReservationError('This reservation is already closed.')
+    spot = db.session.get(ParkingSpot, res.spot_id)
+    spot.status = 'A'
+    spot.lot.shift_counts(available=1, occupied=-1)
+    rollups.record_released(spot.lot_id, res.parking_timestamp, now, total_cost)
+    events.record(events.RELEASED, [(spot.lot_id, spot.id, res.id)], at=now)
+    db.session.commit()
+    signals.spot_released.send(spot.lot_id, spot_id=spot.id, reservation_id=res.id, cost=total_cost)
+    return total_cost
+
+
+# --- batches (fleet operators) ---
+def _result(**fields):
+    return dict({'lot_id': None, 'spot_id': None, 'reservation_id': None, 'error': None}, **fields)
+
+
+def reserve_batch(user_id, items):
+    """Reserve a spot for each (lot_id, vehicle_number) in one transaction.
+
+    Returns one result dict per item, in order, with ``reservation_id`` and
+    ``spot_id`` set for the vehicles that got a spot and ``error`` (a
+    ReservationError) for the rest. Spots are claimed per lot with set-based
+    UPDATEs, and the lot counters and rollups move once per lot. A fleet user
+    may hold many active reservations, but only one per vehicle.
+    """
+    now = datetime.utcnow()
+    results, seen = [], set()
+    for lot_id, vehicle_number in items:
+        vehicle_number = (vehicle_number or '').strip()
+        result = _result(lot_id=lot_id, vehicle_number=vehicle_number)
+        if len(vehicle_number) < 6:
+            result['error'] = ReservationError('Vehicle number is required and must be at least 6 characters.')
+        elif vehicle_number.upper() in seen:
+            result['error'] = ReservationError('This vehicle is listed more than once.')
+        seen.add(vehicle_number.upper())
+        results.append(result)
+
+    pending = [r for r in results if r['error'] is None]
+    if not pending:
+        return results
+    # plates are compared case-insensitively: 'tn01ab1234' is the same vehicle as 'TN01AB1234'
+    parked = set(db.session.execute(
+        select(func.upper(Reservation.vehicle_number))
+        .where(Reservation.user_id == user_id, Reservation.leaving_timestamp.is_(None),
+               func.upper(Reservation.vehicle_number).in_([r['vehicle_number'].upper() for r in pending]))
+    ).scalars())
+    lots = {lot.id: lot for lot in ParkingLot.query.filter(ParkingLot.id.in_({r['lot_id'] for r in pending}))}
+    by_lot = defaultdict(list)
+    for r in pending:
+        if r['vehicle_number'].upper() in parked:
+            r['error'] = ReservationError('This vehicle already has an active reservation.')
+        elif r['lot_id'] not in lots:
+            r['error'] = ReservationError('Lot not found.')
+        else:
+            by_lot[r['lot_id']].append(r)
+
+    reserved = []
+    for lot_id, wanted in by_lot.items():
+        spot_ids = allocator.claim_many(lot_id, len(wanted))
+        for r in wanted[len(spot_ids):]:
+            r['error'] = LotFullError('No available spots in this lot.', lot_id)
+        if not spot_ids:
+            continue
+        lots[lot_id].shift_counts(available=-len(spot_ids), occupied=len(spot_ids))
+        for r, spot_id in zip(wanted, spot_ids):
+            r['spot_id'] = spot_id
+            r['parked_at'] = now
+            reserved.append(r)
+        rollups.record_reserved(lot_id, now, count=len(spot_ids))
+    if not reserved:
+        db.session.rollback()
+        return results
+    # multi-row INSERT; the returned ids are matched back by vehicle number (unique in the batch)
+    ids = dict(db.session.execute(
+        insert(Reservation).returning(Reservation.vehicle_number, Reservation.id),
+        [{'spot_id': r['spot_id'], 'user_id': user_id, 'parking_timestamp': now,
+          'vehicle_number': r['vehicle_number']} for r in reserved]
+    ).all())
+    for r in reserved:
+        r['reservation_id'] = ids[r['vehicle_number']]
+    events.record(events.RESERVED, [(r['lot_id'], r['spot_id'], r['reservation_id']) for r in reserved], at=now)
+    db.session.commit()
+    for r in reserved:
+        signals.spot_reserved.send(r['lot_id'], spot_id=r['spot_id'], reservation_id=r['reservation_id'])
+    return results
+
+
+def release_batch(user_id, keys, by='id', now=None):
+    """Close several of the user's active reservations in one transaction.
+
+    ``keys`` are reservation ids, or vehicle numbers with ``by='vehicle'``.
+    Returns one result dict per key, in order, with ``cost`` set for the
+    released reservations and ``error`` (a ReservationError) for the rest.
+    """
+    now = now or datetime.utcnow()
+    stmt = (select(Reservation, ParkingSpot.lot_id, ParkingLot.price)
+            .outerjoin(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+            .outerjoin(ParkingLot, ParkingLot.id == ParkingSpot.lot_id)
+            .where(Reservation.user_id == user_id))
+    if by == 'vehicle':
+        # plates match case-insensitively, as in reserve_batch
+        stmt = stmt.where(func.upper(Reservation.vehicle_number).in_({key.upper() for key in keys}),
+                          Reservation.leaving_timestamp.is_(None))
+        found = {res.vehicle_number.upper(): (res, lot_id, price) for res, lot_id, price in db.session.execute(stmt)}
+    else:
+        stmt = stmt.where(Reservation.id.in_(set(keys)))
+        found = {res.id: (res, lot_id, price) for res, lot_id, price in db.session.execute(stmt)}
+
+    results, seen = [], set()
+    closing = []
+    for key in keys:
+        result = _result(key=key)
+        results.append(result)
+        if by == 'vehicle':
+            key = key.upper()
+        if key in seen:
+            result['error'] = ReservationError('This reservation is listed more than once.')
+            continue
+        seen.add(key)
+        if key not in found:
+            result['error'] = ReservationError('No active reservation for this vehicle.' if by == 'vehicle'
+                                               else 'Reservation not found.')
+            continue
+        res, lot_id, price = found[key]
+        if res.leaving_timestamp is not None:
+            result['error'] = ReservationError('This reservation is already closed.')
+            continue
+        closing.append((result, res, lot_id, billing.cost(res.parking_timestamp, now, price)))
+    if not closing:
+        return results
+
+    # Close only the reservations still open when the UPDATE runs; one released
+    # concurrently (e.g. from the site) is reported as closed and frees nothing here
+    costs = {res.id: cost for _, res, _, cost in closing}
+    closed_ids = set(db.session.execute(
+        update(Reservation)
+        .where(Reservation.id.in_(costs), Reservation.leaving_timestamp.is_(None))
+        .values(leaving_timestamp=now, parking_cost=case(costs, value=Reservation.id))
+        .returning(Reservation.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    closed = defaultdict(list)  # lot_id -> [(parked, left, cost)]
+    released = []
+    for result, res, lot_id, cost in closing:
+        if res.id not in closed_ids:
+            result['error'] = ReservationError('This reservation is already closed.')
+            continue
+        result.update(lot_id=lot_id, spot_id=res.spot_id, reservation_id=res.id,
+                      vehicle_number=res.vehicle_number, cost=cost)
+        closed[lot_id].append((res.parking_timestamp, now, cost))
+        released.append(result)
+    if not released:
+        return results
+
+    db.session.execute(
+        update(ParkingSpot)
+        .where(ParkingSpot.id.in_([r['spot_id'] for r in released]))
+        .values(status='A')
+        .execution_options(synchronize_session=False)
+    )
+    for lot in ParkingLot.query.filter(ParkingLot.id.in_(closed)):
+        lot.shift_counts(available=len(closed[lot.id]), occupied=-len(closed[lot.id]))
+    for lot_id, rows in closed.items():
+        rollups.record_released_many(lot_id, rows)
+    events.record(events.RELEASED, [(r['lot_id'], r['spot_id'], r['reservation_id']) for r in released], at=now)
+    db.session.commit()
+    for r in released:
+        signals.spot_released.send(r['lot_id'], spot_id=r['spot_id'], reservation_id=r['reservation_id'],
+                                   cost=r['cost'])
+    return results
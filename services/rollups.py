@@ -0,0 +1,189 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import case, delete, select
+from models.file1 import db, LotUsageRollup, ParkingLot, ParkingSpot
+from services import archive, billing
+
+STEPS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+WINDOW_DEFAULT = {'hour': 48, 'day': 30}   # buckets per chart by default
+WINDOW_MAX = {'hour': 24 * 31, 'day': 366}
+
+_table = LotUsageRollup.__table__
+
+
+def bucket_start(ts, granularity):
+    ts = ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0) if granularity == 'day' else ts
+
+
+def _spread(parked, left, granularity):
+    """(bucket, seconds) for each bucket the interval [parked, left) overlaps."""
+    t = parked
+    while t < left:
+        end = min(bucket_start(t, granularity) + STEPS[granularity], left)
+        yield bucket_start(t, granularity), (end - t).total_seconds()
+        t = end
+
+
+class _Buckets(defaultdict):
+    """(granularity, bucket) -> [started, spot_seconds, revenue, peak], for one lot."""
+
+    def __init__(self):
+        super().__init__(lambda: [0, 0.0, 0.0, 0])
+
+    def started(self, at, occupied):
+        for g in STEPS:
+            row = self[g, bucket_start(at, g)]
+            row[0] += 1
+            row[3] = max(row[3], occupied)
+
+    def closed(self, parked, left, cost, occupied_before):
+        for g in STEPS:
+            for bucket, seconds in _spread(parked, left, g):
+                self[g, bucket][1] += seconds
+            row = self[g, bucket_start(left, g)]
+            row[2] += cost or 0
+            row[3] = max(row[3], occupied_before)
+
+    def rows(self, lot_id):
+        return [{'lot_id': lot_id, 'granularity': g, 'bucket_start': bucket,
+                 'reservations_started': started, 'spot_seconds': seconds,
+                 'revenue': revenue, 'peak_occupied': peak}
+                for (g, bucket), (started, seconds, revenue, peak) in self.items()]
+
+
+def _add(rows):
+    """Merge rows into the rollups: counts add up, peak keeps the larger value."""
+    if not rows:
+        return
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(_table)
+    new = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[_table.c.lot_id, _table.c.granularity, _table.c.bucket_start],
+        set_={
+            'reservations_started': _table.c.reservations_started + new.reservations_started,
+            'spot_seconds': _table.c.spot_seconds + new.spot_seconds,
+            'revenue': _table.c.revenue + new.revenue,
+            'peak_occupied': case((new.peak_occupied > _table.c.peak_occupied, new.peak_occupied),
+                                  else_=_table.c.peak_occupied),
+        })
+    db.session.execute(stmt, rows)
+
+
+def _occupied(lot_id):
+    db.session.flush()  # the counter UPDATE from shift_counts must land first
+    return db.session.execute(select(ParkingLot.occupied_spots).where(ParkingLot.id == lot_id)).scalar()
+
+
+# --- incremental updates, called in the reserve / release transaction ---
+def record_reserved(lot_id, parked, count=1):
+    """``count`` reservations started at ``parked`` (after the lot counters moved)."""
+    buckets = _Buckets()
+    occupied = _occupied(lot_id)
+    for i in range(count):
+        buckets.started(parked, occupied - count + 1 + i)
+    _add(buckets.rows(lot_id))
+
+
+def record_released(lot_id, parked, left, cost):
+    record_released_many(lot_id, [(parked, left, cost)])
+
+
+def record_released_many(lot_id, closed):
+    """Reservations closed together: [(parked, left, cost)] (after the lot counters moved)."""
+    buckets = _Buckets()
+    occupied = _occupied(lot_id)
+    for i, (parked, left, cost) in enumerate(closed):
+        buckets.closed(parked, left, cost, occupied + len(closed) - i)
+    _add(buckets.rows(lot_id))
+
+
+# --- backfill ---
+def rebuild_lot(lot_id, chunk_rows=5000):
+    """Recompute one lot's rollups from its reservations; the caller commits.
+
+    Replays starts and releases in time order, so peak occupancy comes out as
+    the incremental path records it: the occupancy seen right after each
+    reservation starts and right before each one is released.
+    """
+    # Lock the lot (no-op on SQLite) and take the write lock before reading, so no
+    # reservation can commit between the read and the rewrite
+    db.session.execute(select(ParkingLot.id).where(ParkingLot.id == lot_id).with_for_update())
+    db.session.execute(delete(_table).where(_table.c.lot_id == lot_id))
+    # hot and archived reservations, in start order
+    stmt = archive.across(lambda model: (
+        select(model.parking_timestamp.label('parked'), model.leaving_timestamp, model.parking_cost,
+               ParkingLot.price, model.id.label('reservation_id'))
+        .join(ParkingSpot, ParkingSpot.id == model.spot_id)
+        .join(ParkingLot, ParkingLot.id == ParkingSpot.lot_id)
+        .where(ParkingSpot.lot_id == lot_id, model.parking_timestamp.is_not(None))
+    ))
+    stmt = stmt.order_by(stmt.selected_columns.parked, stmt.selected_columns.reservation_id)
+    buckets = _Buckets()
+    leaving = []  # heap of (left, seq, parked, cost): started, not yet released
+    occupied = 0
+    seq = 0
+
+    def release_until(t):
+        nonlocal occupied
+        while leaving and (t is None or leaving[0][0] <= t):
+            left, _, parked, cost = heapq.heappop(leaving)
+            buckets.closed(parked, left, cost, occupied)
+            occupied -= 1
+
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=chunk_rows))
+    for parked, left, cost, price, _ in result:
+        release_until(parked)
+        occupied += 1
+        buckets.started(parked, occupied)
+        if left is not None:
+            seq += 1
+            if cost is None:
+                cost = billing.cost(parked, left, price)
+            heapq.heappush(leaving, (left, seq, parked, cost))
+    release_until(None)
+    rows = buckets.rows(lot_id)
+    _add(rows)
+    return len(rows)
+
+
+# --- charts ---
+def series(granularity, buckets=None, lot_id=None, end=None):
+    """The last ``buckets`` hours/days up to ``end`` as parallel lists, zero-filled.
+
+    Reads at most buckets x lots rollup rows through the primary key or the
+    window index, however long the reservation history is. Across all lots,
+    peak_occupied is the sum of the per-lot peaks.
+    """
+    step = STEPS[granularity]
+    buckets = min(buckets or WINDOW_DEFAULT[granularity], WINDOW_MAX[granularity])
+    last = bucket_start(end or datetime.utcnow(), granularity)
+    first = last - step * (buckets - 1)
+    stmt = (select(_table.c.bucket_start,
+                   db.func.sum(_table.c.reservations_started),
+                   db.func.sum(_table.c.spot_seconds),
+                   db.func.sum(_table.c.revenue),
+                   db.func.sum(_table.c.peak_occupied))
+            .where(_table.c.granularity == granularity,
+                   _table.c.bucket_start >= first, _table.c.bucket_start <= last)
+            .group_by(_table.c.bucket_start))
+    if lot_id is not None:
+        stmt = stmt.where(_table.c.lot_id == lot_id)
+    found = {row[0]: row[1:] for row in db.session.execute(stmt)}
+    out = {'granularity': granularity, 'labels': [], 'reservations': [], 'spot_hours': [],
+           'revenue': [], 'peak_occupied': []}
+    fmt = '%Y-%m-%d %H:00' if granularity == 'hour' else '%Y-%m-%d'
+    for i in range(buckets):
+        bucket = first + step * i
+        started, seconds, revenue, peak = found.get(bucket, (0, 0, 0, 0))
+        out['labels'].append(bucket.strftime(fmt))
+        out['reservations'].append(started)
+        out['spot_hours'].append(round(seconds / 3600, 2))
+        out['revenue'].append(round(revenue, 2))
+        out['peak_occupied'].append(peak)
+    return out
@@ -0,0 +1,73 @@
+import re
+from sqlalchemy import case, column, inspect, literal_column, or_, select, table
+from models.file1 import db, ParkingLot
+
+PER_PAGE = 20
+AUTOCOMPLETE_LIMIT = 8
+
+_WORD = re.compile(r'\w+')
+_fts = table('parking_lots_fts', column('rowid'), column('rank'))
+_fts_ready = {}
+
+
+def fts_enabled():
+    """True when the FTS5 index exists (SQLite databases created or migrated with it)."""
+    engine = db.engine
+    if engine not in _fts_ready:
+        _fts_ready[engine] = (engine.dialect.name == 'sqlite'
+                              and inspect(engine).has_table('parking_lots_fts'))
+    return _fts_ready[engine]
+
+
+def _match_query(term):
+    # every word must match, each as a prefix: "brig ro" -> "brig"* "ro"*
+    return ' '.join(f'"{word}"*' for word in _WORD.findall(term))
+
+
+def _pin_prefix(term):
+    # pin codes are digits, so [term, term + ':') is exactly "starts with term" on the index
+    return (ParkingLot.pin_code >= term) & (ParkingLot.pin_code < term + ':')
+
+
+def _ranked(term, ranked=True):
+    """Select of ParkingLot matching term, best first (or in id order when not ranked)."""
+    if term.isdigit() and fts_enabled():
+        # pin codes starting with the digits first, then names and addresses containing
+        # them ("100" -> "100 Feet Road"); both sides are index lookups, OR-ed by rowid
+        pin = _pin_prefix(term)
+        words = select(_fts.c.rowid).where(literal_column('parking_lots_fts').op('MATCH')(_match_query(term)))
+        return (select(ParkingLot)
+                .where(or_(pin, ParkingLot.id.in_(words)))
+                .order_by(case((pin, 0), else_=1), ParkingLot.pin_code, ParkingLot.id))
+    if fts_enabled():
+        match = _match_query(term)
+        if match:
+            stmt = (select(ParkingLot)
+                    .join(_fts, _fts.c.rowid == ParkingLot.id)
+                    .where(literal_column('parking_lots_fts').op('MATCH')(match)))
+            # bm25 has to score every hit; rowid order is the index's own order, so LIMIT stops early
+            return stmt.order_by(_fts.c.rank, ParkingLot.id) if ranked else stmt.order_by(_fts.c.rowid)
+    # Other databases (or a DB without the index): substring match, as before
+    pattern = f"%{term}%"
+    return (select(ParkingLot)
+            .where(or_(ParkingLot.address.ilike(pattern),
+                       ParkingLot.prime_location_name.ilike(pattern),
+                       ParkingLot.pin_code.ilike(pattern)))
+            .order_by(ParkingLot.id))
+
+
+def search_lots(term, page=1, per_page=PER_PAGE):
+    """One page of lots matching term; returns (lots, has_more)."""
+    stmt = _ranked(term).limit(per_page + 1).offset((max(page, 1) - 1) * per_page)
+    lots = db.session.execute(stmt).scalars().all()
+    return lots[:per_page], len(lots) > per_page
+
+
+def autocomplete(term, limit=AUTOCOMPLETE_LIMIT):
+    """First few matches for the search box; unranked so it stays fast on broad prefixes."""
+    return db.session.execute(_ranked(term, ranked=False).limit(limit)).scalars().all()
+
+
+def lot_ids(term):
+    """Unranked select of matching lot ids, for combining with other filters."""
+    return _ranked(term).with_only_columns(ParkingLot.id).order_by(None)
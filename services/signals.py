@@ -0,0 +1,16 @@
+from blinker import Namespace
+
+# Sent after the change is committed. Receivers keep derived in-process state
+# (caches, free lists) in step; they must not write to the database.
+_signals = Namespace()
+
+# sender: lot_id; kwargs: spot_id, reservation_id
+spot_reserved = _signals.signal('spot-reserved')
+# sender: lot_id; kwargs: spot_id, reservation_id, cost (None if not billed)
+spot_released = _signals.signal('spot-released')
+# sender: lot_id; kwargs: spot_id; a single free spot deleted by an admin
+spot_removed = _signals.signal('spot-removed')
+# sender: lot_id (None for bulk changes); lot created, edited, deleted or spots added/removed
+lot_changed = _signals.signal('lot-changed')
+# sender: user_id; user registered, profile edited or role changed
+user_changed = _signals.signal('user-changed')
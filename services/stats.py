@@ -0,0 +1,103 @@
+import threading
+import time
+from flask import current_app
+from models.file1 import db, User, ParkingLot
+from services import archive, signals
+
+DEFAULT_TTL = 30  # seconds; override with STATS_CACHE_TTL
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry and hit/miss counters."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = 0
+
+    def get_or_set(self, key, compute, ttl):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._data[key] = (now + ttl, value)
+        return value
+
+    def update(self, key, fn):
+        """Apply fn to a cached value in place (no-op if absent or expired)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._data[key] = (entry[0], fn(entry[1]))
+
+    def invalidate(self, key=None):
+        with self._lock:
+            self.invalidations += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+cache = TTLCache()
+
+
+def _compute_totals():
+    total_lots, total_spots = db.session.query(
+        db.func.count(ParkingLot.id),
+        db.func.coalesce(db.func.sum(ParkingLot.available_spots + ParkingLot.occupied_spots), 0)
+    ).one()
+    # hot and archived reservations
+    reservations = [db.session.query(db.func.count(model.id),
+                                     db.func.coalesce(db.func.sum(model.parking_cost), 0)).one()
+                    for model in archive.MODELS]
+    return {
+        'total_lots': total_lots,
+        'total_spots': total_spots,
+        'total_users': User.query.filter(User.role != 'admin').count(),
+        'total_reservations': sum(count for count, _ in reservations),
+        'total_revenue': sum(revenue for _, revenue in reservations),
+    }
+
+
+def dashboard_totals():
+    """Site-wide totals for the admin pages, recomputed at most once per TTL per worker."""
+    ttl = current_app.config.get('STATS_CACHE_TTL', DEFAULT_TTL)
+    return cache.get_or_set('totals', _compute_totals, ttl)
+
+
+# Reservations and releases adjust the cached totals in place; lot and user changes drop them.
+def _on_reserved(sender, **kwargs):
+    cache.update('totals', lambda t: dict(t, total_reservations=t['total_reservations'] + 1))
+
+
+def _on_released(sender, cost=None, **kwargs):
+    if cost:
+        cache.update('totals', lambda t: dict(t, total_revenue=t['total_revenue'] + cost))
+
+
+def _invalidate(sender, **kwargs):
+    cache.invalidate('totals')
+
+
+signals.spot_reserved.connect(_on_reserved)
+signals.spot_released.connect(_on_released)
+signals.lot_changed.connect(_invalidate)
+signals.spot_removed.connect(_invalidate)
+signals.user_changed.connect(_invalidate)
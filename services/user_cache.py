@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.orm import make_transient_to_detached
+from models.file1 import db, User
+from services import signals
+
+DEFAULT_SIZE = 1024  # users per worker; override with USER_CACHE_SIZE
+DEFAULT_TTL = 60     # seconds; override with USER_CACHE_TTL
+# The password hash never goes into the cache; it is loaded from the DB only when read.
+CACHED_COLUMNS = ('id', 'username', 'role', 'full_name')
+
+
+class LocalStore:
+    """Bounded LRU with per-entry expiry, private to one worker process."""
+
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisStore:
+    """Shared store so every worker sees the same entries and invalidations."""
+
+    prefix = 'parking:user:'
+
+    def __init__(self, url):
+        import redis  # only needed when USER_CACHE_URL is set
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._redis.get(f'{self.prefix}{key}')
+        return json.loads(raw) if raw else None
+
+    def set(self, key, value, ttl):
+        self._redis.set(f'{self.prefix}{key}', json.dumps(value), ex=max(int(ttl), 1))
+
+    def delete(self, key=None):
+        if key is not None:
+            self._redis.delete(f'{self.prefix}{key}')
+            return
+        for name in self._redis.scan_iter(f'{self.prefix}*'):
+            self._redis.delete(name)
+
+    def __len__(self):
+        return sum(1 for _ in self._redis.scan_iter(f'{self.prefix}*'))
+
+
+class UserCache:
+    """Identity cache for Flask-Login's user_loader.
+
+    A hit rebuilds the User from cached columns and attaches it to the session
+    without a SELECT. Entries are dropped on ``user_changed`` (registration,
+    profile edits, role changes); with the in-process store other workers
+    catch up within USER_CACHE_TTL, with USER_CACHE_URL (Redis) immediately.
+    """
+
+    def __init__(self):
+        self.store = LocalStore()
+        self.ttl = DEFAULT_TTL
+        self.enabled = True
+        self.hits = self.misses = self.invalidations = 0
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CACHE_ENABLED', True)
+        app.config.setdefault('USER_CACHE_SIZE', DEFAULT_SIZE)
+        app.config.setdefault('USER_CACHE_TTL', DEFAULT_TTL)
+        app.config.setdefault('USER_CACHE_URL', None)
+        self.enabled = app.config['USER_CACHE_ENABLED']
+        self.ttl = app.config['USER_CACHE_TTL']
+        if app.config['USER_CACHE_URL']:
+            self.store = RedisStore(app.config['USER_CACHE_URL'])
+        else:
+            self.store = LocalStore(app.config['USER_CACHE_SIZE'])
+
+    def load(self, user_id):
+        """The User for user_id (or None), from the cache when possible."""
+        if not self.enabled:
+            return db.session.get(User, user_id)
+        attrs = self.store.get(user_id)
+        if attrs is None:
+            self.misses += 1
+            user = db.session.get(User, user_id)
+            if user is not None:
+                self.store.set(user_id, {c: getattr(user, c) for c in CACHED_COLUMNS}, self.ttl)
+            return user
+        self.hits += 1
+        user = User(**attrs)
+        make_transient_to_detached(user)
+        # load=False trusts the cached state; edits to current_user still flush as usual
+        return db.session.merge(user, load=False)
+
+    def invalidate(self, user_id=None):
+        self.invalidations += 1
+        self.store.delete(user_id)
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.store),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+user_cache = UserCache()
+
+
+def _on_user_changed(user_id, **kwargs):
+    user_cache.invalidate(user_id)
+
+
+signals.user_changed.connect(_on_user_changed)
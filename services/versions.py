@@ -0,0 +1,81 @@
+import threading
+import time
+from services import signals
+
+DEFAULT_TTL = 2.0  # seconds; override with LOT_VERSION_TTL
+
+
+class LotVersions:
+    """Per-worker copy of parking_lots.version, for answering conditional GETs without a query.
+
+    Changes made by this worker drop the entry at once (via the after-commit
+    signals); changes made by other workers are noticed when the entry expires,
+    so a poll may see a 304 for at most LOT_VERSION_TTL after someone else's change.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._data = {}
+        self._all = None  # (expires, ((lot_id, version), ...)) for the all-lots listing
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def init_app(self, app):
+        app.config.setdefault('LOT_VERSION_TTL', DEFAULT_TTL)
+        self.ttl = app.config['LOT_VERSION_TTL']
+
+    def cached(self, lot_id):
+        """The lot's version if known and fresh, else None (no database access)."""
+        entry = self._data.get(lot_id)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def remember(self, lot_id, version):
+        self._data[lot_id] = (time.monotonic() + self.ttl, version)
+
+    def cached_all(self):
+        entry = self._all
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def remember_all(self, pairs):
+        """Record (lot_id, version) for every lot, as just read from the database."""
+        pairs = tuple(pairs)
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._all = (expires, pairs)
+            for lot_id, version in pairs:
+                self._data[lot_id] = (expires, version)
+        return pairs
+
+    def forget(self, lot_id=None):
+        with self._lock:
+            self._all = None
+            if lot_id is None:
+                self._data.clear()
+            else:
+                self._data.pop(lot_id, None)
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self._data), 'hits': self.hits, 'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None}
+
+
+lot_versions = LotVersions()
+
+
+def _on_lot_event(lot_id, **kwargs):
+    lot_versions.forget(lot_id)
+
+
+signals.spot_reserved.connect(_on_lot_event)
+signals.spot_released.connect(_on_lot_event)
+signals.lot_changed.connect(_on_lot_event)
+signals.spot_removed.connect(_on_lot_event)
@@ -0,0 +1,55 @@
+"""Fixtures for the regression tests: throwaway apps and a SQL statement counter.
+
+Run from the repository root with ``python -m pytest``. Each app gets its own
+SQLite file under pytest's temporary directory, never instance/parking_app.db.
+"""
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from benchmarks.common import make_app
+from models.file1 import db
+from services import stats
+from services.allocation import allocator
+from services.nearby import nearby
+from services.occupancy import occupancy
+from services.versions import lot_versions
+
+
+@pytest.fixture(scope='session')
+def app_factory(tmp_path_factory):
+    """new_app(**config) builds the app on a new, empty database."""
+    def new_app(**config):
+        # the per-worker caches are module globals keyed by row ids; a new database starts them cold
+        stats.cache.invalidate()
+        occupancy.forget()
+        lot_versions.forget()
+        allocator.forget()
+        nearby.mark_dirty()
+        path = tmp_path_factory.mktemp('db') / 'parking_test.db'
+        return make_app(f'sqlite:///{path}', **config)
+    return new_app
+
+
+@pytest.fixture
+def app(app_factory):
+    return app_factory()
+
+
+@pytest.fixture
+def count_queries():
+    """``with count_queries(app) as statements:`` collects every SQL statement the app runs inside."""
+    @contextmanager
+    def counting(app):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return counting
@@ -0,0 +1,31 @@
+"""SQL statements per request must not grow with the number of rows (no N+1 queries).
+
+Every view is loaded on a database seeded at 1x and at 10x the data; the
+statement counts must be equal.
+"""
+import pytest
+from benchmarks.common import login_client, seed_lots, seed_reservations, seed_users
+
+ADMIN_ROUTES = ['/admin', '/admin/users', '/admin/parking_records', '/admin/summary']
+USER_ROUTES = ['/user/dashboard', '/user/history', '/user/summary']
+
+
+def statements_for(app_factory, count_queries, route, scale):
+    app = app_factory()
+    with app.app_context():
+        seed_lots(5 * scale, 20)
+        (admin_id,) = seed_users(1, role='admin')
+        user_ids = seed_users(20 * scale)
+        seed_reservations(200 * scale, user_ids, 5 * scale * 20)
+    client = login_client(app, admin_id if route in ADMIN_ROUTES else user_ids[0])
+    with count_queries(app) as statements:
+        resp = client.get(route)
+    assert resp.status_code == 200, (route, resp.status_code)
+    return len(statements)
+
+
+@pytest.mark.parametrize('route', ADMIN_ROUTES + USER_ROUTES)
+def test_statement_count_does_not_grow_with_data(app_factory, count_queries, route):
+    small = statements_for(app_factory, count_queries, route, 1)
+    large = statements_for(app_factory, count_queries, route, 10)
+    assert small == large, f'{route}: {small} statements at 1x, {large} at 10x'
@@ -0,0 +1,75 @@
+"""EXPLAIN QUERY PLAN check for the hot lookups in controllers/user.py and controllers/admin.py.
+
+A seeded, ANALYZEd database with part of the history archived; no hot query
+may be planned as a full table scan or need a temp B-tree to sort. Paged
+history queries run against both the hot and the archive table, and the
+UNION ALL selects built with services.archive.across are checked as the
+controllers build them.
+"""
+from datetime import datetime
+import pytest
+from benchmarks.common import seed_lots, seed_reservations, seed_users
+from models.file1 import db, ParkingSpot, Reservation
+from services import archive
+from services.pagination import PER_PAGE, newest_first, older_than
+
+DEEP = (datetime(2025, 3, 1), 5000)
+
+HOT_QUERIES = {
+    'active reservation by user': lambda: Reservation.query.filter_by(user_id=7, leaving_timestamp=None),
+    'active reservation by spot': lambda: Reservation.query.filter_by(spot_id=42, leaving_timestamp=None),
+    'first free spot in lot': lambda: ParkingSpot.query.filter_by(lot_id=3, status='A'),
+    # admin lot panel: the spots a user has ever parked in
+    'spots of a user, hot + archive': lambda: archive.across(
+        lambda model: db.select(model.spot_id).where(model.user_id == 7)),
+    # user summary: visits per lot
+    'visits of a user, hot + archive': lambda: archive.across(
+        lambda model: db.select(model.id, model.spot_id).where(model.user_id == 7)),
+}
+for model in archive.MODELS:
+    table = model.__tablename__
+    HOT_QUERIES.update({
+        f'user history, first page ({table})': lambda model=model: newest_first(
+            model.query.filter_by(user_id=7)).limit(PER_PAGE + 1),
+        f'user history, deep page ({table})': lambda model=model: newest_first(
+            older_than(model.query.filter_by(user_id=7), *DEEP)).limit(PER_PAGE + 1),
+        f'all records, first page ({table})': lambda model=model: newest_first(
+            model.query).limit(PER_PAGE + 1),
+        f'all records, deep page ({table})': lambda model=model: newest_first(
+            older_than(model.query, *DEEP)).limit(PER_PAGE + 1),
+    })
+
+
+def plan_problems(plan_rows):
+    problems = []
+    for row in plan_rows:
+        detail = row[-1]
+        if detail.startswith('SCAN ') and 'USING' not in detail:
+            problems.append(detail)
+        if 'USE TEMP B-TREE' in detail:
+            problems.append(detail)
+    return problems
+
+
+@pytest.fixture(scope='module')
+def seeded_app(app_factory):
+    app = app_factory()
+    with app.app_context():
+        seed_lots(20, 200)
+        user_ids = seed_users(500)
+        seed_reservations(20000, user_ids, 20 * 200)
+        # about the older half of the history moves to reservations_archive
+        assert archive.archive_closed(older_than_days=0, now=datetime(2025, 4, 15))
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+    return app
+
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_an_index(seeded_app, name):
+    with seeded_app.app_context():
+        query = HOT_QUERIES[name]()
+        statement = getattr(query, 'statement', query)
+        sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+        plan = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)).all()
+    assert not plan_problems(plan), f'{name}: ' + '; '.join(row[-1] for row in plan)
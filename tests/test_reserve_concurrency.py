@@ -0,0 +1,79 @@
+"""Concurrent reservations on one lot must never double-book a spot.
+
+Threads, each logged in as a different user, POST /user/reserve/<lot_id> at
+once. They are split across two SpotAllocator instances, each with its own
+candidate lists, as in separate gunicorn workers. Every instance loads its list
+up front; then the first worker's threads reserve, and after them the other
+worker's threads all at once, on lists whose spots the first worker has mostly
+taken. Afterwards no spot may hold more than one active reservation, and
+min(reservers, spots) reservations must exist: nobody is turned away as "lot
+full" while spots are free.
+"""
+import threading
+import pytest
+from sqlalchemy import func
+from benchmarks.common import login_client, seed_lots, seed_users
+from models.file1 import db, ParkingLot, ParkingSpot, Reservation
+from services import reservations
+from services.allocation import SpotAllocator
+
+WORKERS = 2
+
+
+class PerWorker:
+    """Stands in for the module allocator: each thread uses the instance of its worker."""
+
+    def __init__(self, allocators):
+        self.allocators = allocators
+        self.local = threading.local()
+
+    def __getattr__(self, name):
+        return getattr(self.allocators[self.local.worker], name)
+
+
+@pytest.mark.parametrize('reservers, spots', [(96, 100), (64, 40)], ids=['free spots left', 'oversubscribed'])
+def test_no_double_booking_across_workers(app, monkeypatch, reservers, spots):
+    allocators = [SpotAllocator() for _ in range(WORKERS)]
+    monkeypatch.setattr(reservations, 'allocator', PerWorker(allocators))
+    with app.app_context():
+        (lot_id,) = seed_lots(1, spots)
+        user_ids = seed_users(reservers)
+        for allocator in allocators:
+            allocator._refill(lot_id)
+    clients = [login_client(app, uid) for uid in user_ids]
+    workers = [i % WORKERS for i in range(len(clients))]
+    waves = [[i for i, w in enumerate(workers) if w == 0], [i for i, w in enumerate(workers) if w != 0]]
+    errors = []
+
+    def reserve(client, worker, barrier):
+        reservations.allocator.local.worker = worker
+        barrier.wait()
+        try:
+            resp = client.post(f'/user/reserve/{lot_id}', data={'vehicle_number': 'TN01AB1234'})
+            if resp.status_code != 302:
+                errors.append(resp.status_code)
+        except Exception as exc:  # reported by the assertion below
+            errors.append(repr(exc))
+
+    for wave in waves:
+        barrier = threading.Barrier(len(wave))
+        threads = [threading.Thread(target=reserve, args=(clients[i], workers[i], barrier)) for i in wave]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+
+    with app.app_context():
+        doubles = (db.session.query(Reservation.spot_id)
+                   .filter(Reservation.leaving_timestamp.is_(None))
+                   .group_by(Reservation.spot_id)
+                   .having(func.count(Reservation.id) > 1).all())
+        active = Reservation.query.filter_by(leaving_timestamp=None).count()
+        occupied = ParkingSpot.query.filter_by(lot_id=lot_id, status='O').count()
+        lot = db.session.get(ParkingLot, lot_id)
+        counters = (lot.available_spots, lot.occupied_spots)
+    expected = min(reservers, spots)
+    assert not errors, errors[:5]
+    assert not doubles, f'double-booked spots: {doubles}'
+    assert active == occupied == expected, (active, occupied, expected)
+    assert counters == (spots - expected, expected)